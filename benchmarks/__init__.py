@@ -0,0 +1,56 @@
+import os
+import socket
+import sys
+import time
+from contextlib import contextmanager
+from http.client import HTTPConnection
+
+import django
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    os.environ.setdefault('SECRET_KEY', 'benchmarks')
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Run the block against a throwaway test database, like the test runner does."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(server, port, workers, threads):
+    if server == 'gunicorn':
+        return [sys.executable, '-m', 'gunicorn', 'config.wsgi', '--workers', str(workers),
+                '--threads', str(threads), '--bind', f'127.0.0.1:{port}', '--log-level', 'warning']
+    return [sys.executable, '-m', 'uvicorn', 'config.asgi:application', '--workers', str(workers),
+            '--port', str(port), '--no-access-log', '--log-level', 'warning']
+
+
+def wait_until_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/api/v1/')
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
@@ -0,0 +1,126 @@
+"""
+Requests per second and latency of card and dish lists served by gunicorn
+(WSGI) and uvicorn (ASGI) over the same SQLite dataset. Under uvicorn both the
+regular viewsets and the async endpoints (``api/v1/async/...``) are measured.
+
+    pip install gunicorn uvicorn
+    python -m benchmarks.asgi --workers 2 --concurrency 16 --duration 10
+
+Responses are not cached (dummy cache backend), so every request reaches the database.
+"""
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+
+DATABASE = os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+os.environ.update({
+    'SQL_ENGINE': 'django.db.backends.sqlite3',
+    'SQL_DATABASE': DATABASE,
+    'CACHE_BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    'DEBUG': '0',
+    'DJANGO_ALLOWED_HOSTS': '127.0.0.1',
+})
+
+from benchmarks import free_port, server_command, setup, wait_until_ready  # noqa: E402
+
+setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from menu.models import Dish, Menu  # noqa: E402
+
+
+def create_dataset(menus, dishes_per_menu):
+    call_command('migrate', verbosity=0)
+    user = get_user_model().objects.create_user(username="benchmark", password="benchmark")
+    Dish.objects.bulk_create(
+        Dish(name=f"Dish {i}", description="Benchmark dish", price="10.50", prep_time=10,
+             is_vegetarian=bool(i % 2), author=user)
+        for i in range(menus * dishes_per_menu)
+    )
+    dish_ids = list(Dish.objects.order_by('pk').values_list('pk', flat=True))
+    for i in range(menus):
+        menu = Menu.objects.create(name=f"Menu {i}", description="Benchmark card", author=user)
+        menu.dish.set(dish_ids[i * dishes_per_menu:(i + 1) * dishes_per_menu])
+    return Token.objects.create(user=user).key
+
+
+def load(port, path, headers, concurrency, duration):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+
+    def worker():
+        connection = HTTPConnection('127.0.0.1', port, timeout=30)
+        while time.monotonic() < deadline:
+            start = time.monotonic()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors.append(response.status)
+            except OSError as error:
+                errors.append(str(error))
+                connection.close()
+                connection = HTTPConnection('127.0.0.1', port, timeout=30)
+                continue
+            latencies.append(time.monotonic() - start)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    return {
+        'rps': round(len(latencies) / duration, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2) if latencies else None,
+        'p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2) if latencies else None,
+        'errors': len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--menus', type=int, default=200)
+    parser.add_argument('--dishes-per-menu', type=int, default=10)
+    options = parser.parse_args()
+
+    token = create_dataset(options.menus, options.dishes_per_menu)
+    headers = {'Authorization': f'Token {token}'}
+    scenarios = [
+        ('gunicorn', ['/api/v1/cards/', '/api/v1/dishes/']),
+        ('uvicorn', ['/api/v1/cards/', '/api/v1/dishes/', '/api/v1/async/cards/', '/api/v1/async/dishes/']),
+    ]
+
+    results = []
+    for server, paths in scenarios:
+        port = free_port()
+        process = subprocess.Popen(server_command(server, port, options.workers, options.threads), env=os.environ)
+        try:
+            wait_until_ready(port)
+            for path in paths:
+                load(port, path, headers, options.concurrency, 1)
+                stats = load(port, path, headers, options.concurrency, options.duration)
+                results.append({'server': server, 'path': path, **stats})
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+"""
+Load test of the API over a generated catalogue (``generate_menu_data``): cards list, search and ordering,
+dish create/retrieve/update/delete and token login/logout. Reports requests per second, p50/p95/p99 latency,
+SQL queries per request and peak RSS as JSON, to be compared between commits.
+
+    python -m benchmarks.load --duration 10 --output before.json
+    python -m benchmarks.load --server gunicorn --workers 2 --concurrency 16   # pip install gunicorn uvicorn
+
+Without ``--server`` requests go through the Django test client in this process, one at a time. Queries
+per request are always counted in process. The catalogue is generated into a temporary SQLite database,
+set ``BENCHMARK_DATABASE`` to keep it and reuse it in the next runs (same ``--seed``, same data).
+Responses are not cached (dummy cache backend), so every request reaches the database.
+"""
+import argparse
+import itertools
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+
+DATABASE = os.environ.get('BENCHMARK_DATABASE') or os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+os.environ.update({
+    'SQL_ENGINE': 'django.db.backends.sqlite3',
+    'SQL_DATABASE': DATABASE,
+    'CACHE_BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    'DEBUG': '0',
+    'DJANGO_ALLOWED_HOSTS': '127.0.0.1 testserver',
+})
+
+from benchmarks import free_port, server_command, setup, wait_until_ready  # noqa: E402
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.authtoken.models import Token  # noqa: E402
+
+from menu.management.commands.generate_menu_data import FOODS, MENU_KINDS  # noqa: E402
+from menu.models import Dish, Menu  # noqa: E402
+
+PREFIX = 'gen'
+SEARCH_TERMS = [term.lower() for term in FOODS + MENU_KINDS]
+ORDERINGS = ['name', '-name', 'dishes_count', '-dishes_count']
+
+
+def cards_list(send, i, dataset):
+    send('GET', '/api/v1/cards/', token=dataset['token'])
+
+
+def cards_search(send, i, dataset):
+    send('GET', f'/api/v1/cards/?search={SEARCH_TERMS[i % len(SEARCH_TERMS)]}', token=dataset['token'])
+
+
+def cards_order(send, i, dataset):
+    send('GET', f'/api/v1/cards/?ordering={ORDERINGS[i % len(ORDERINGS)]}', token=dataset['token'])
+
+
+def dish_crud(send, i, dataset):
+    token = dataset['token']
+    status, body = send('POST', '/api/v1/dishes/', {
+        'name': f"Benchmark dish {i}", 'description': "Benchmark dish", 'price': '10.50', 'prep_time': 10,
+        'is_vegetarian': False,
+    }, token=token)
+    if status != 201:
+        return
+    path = f"/api/v1/dishes/{json.loads(body)['id']}/"
+    send('GET', path, token=token)
+    send('PATCH', path, {'price': '12.00'}, token=token)
+    send('DELETE', path, token=token)
+
+
+def auth(send, i, dataset):
+    # The benchmark user is never logged out, logout deletes the token it shares with other scenarios.
+    username = f"{PREFIX}_user_{1 + i % (dataset['users'] - 1)}"
+    status, body = send('POST', '/accounts/login/', {'username': username, 'password': 'password'})
+    if status != 200:
+        return
+    token = json.loads(body)['key']
+    send('GET', '/accounts/user/', token=token)
+    send('POST', '/accounts/logout/', token=token)
+
+
+SCENARIOS = {
+    'cards_list': cards_list,
+    'cards_search': cards_search,
+    'cards_order': cards_order,
+    'dish_crud': dish_crud,
+    'auth': auth,
+}
+
+
+class InProcessTransport:
+    def __init__(self):
+        self.client = Client()
+
+    def send(self, method, path, data=None, token=None):
+        headers = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+        body = json.dumps(data) if data is not None else ''
+        response = self.client.generic(method, path, body, content_type='application/json', **headers)
+        # Requests authenticate by token only, a session cookie from login would switch them to sessions.
+        self.client.cookies.clear()
+        return response.status_code, response.content
+
+
+class HTTPTransport:
+    def __init__(self, port):
+        self.port = port
+        self.connection = HTTPConnection('127.0.0.1', port, timeout=30)
+
+    def send(self, method, path, data=None, token=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Token {token}'
+        try:
+            self.connection.request(method, path, json.dumps(data) if data is not None else None, headers)
+            response = self.connection.getresponse()
+            return response.status, response.read()
+        except OSError:
+            self.connection.close()
+            self.connection = HTTPConnection('127.0.0.1', self.port, timeout=30)
+            return 0, b''
+
+
+def create_dataset(options):
+    """Migrate and generate the catalogue in a subprocess, so it does not count in the peak RSS of this one."""
+    User = get_user_model()
+    users = User.objects.filter(username__startswith=f'{PREFIX}_user_')
+    if User._meta.db_table not in connection.introspection.table_names() or not users.exists():
+        manage = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py')]
+        subprocess.run(manage + ['migrate', '--verbosity', '0'], check=True)
+        subprocess.run(manage + [
+            'generate_menu_data', '--prefix', PREFIX, '--users', str(options.users), '--dishes', str(options.dishes),
+            '--menus', str(options.menus), '--seed', str(options.seed),
+        ], check=True)
+    return {
+        'token': Token.objects.get_or_create(user=users.get(username=f'{PREFIX}_user_0'))[0].key,
+        'users': users.count(),
+        'dishes': Dish.objects.count(),
+        'menus': Menu.objects.count(),
+        'menu_dishes': Menu.dish.through.objects.count(),
+    }
+
+
+def count_queries(scenario, dataset, iterations):
+    """Average SQL queries per request of ``scenario``, in process."""
+    transport = InProcessTransport()
+    requests = 0
+
+    def send(*args, **kwargs):
+        nonlocal requests
+        requests += 1
+        return transport.send(*args, **kwargs)
+
+    with CaptureQueriesContext(connection) as queries:
+        for i in range(iterations):
+            scenario(send, i, dataset)
+    return round(len(queries) / requests, 2) if requests else None
+
+
+def percentile(latencies, share):
+    return round(latencies[min(int(len(latencies) * share), len(latencies) - 1)] * 1000, 2) if latencies else None
+
+
+def load(transport_factory, scenario, dataset, concurrency, duration):
+    latencies, errors = [], []
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration
+
+    def worker():
+        transport = transport_factory()
+
+        def send(*args, **kwargs):
+            start = time.perf_counter()
+            status, body = transport.send(*args, **kwargs)
+            # list.append is atomic, workers share the lists without a lock.
+            latencies.append(time.perf_counter() - start)
+            if not 200 <= status < 400:
+                errors.append(status)
+            return status, body
+
+        while time.perf_counter() < deadline:
+            scenario(send, next(counter), dataset)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': percentile(latencies, 0.5),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+    }
+
+
+def peak_rss_kb(pid):
+    """Largest peak RSS (``VmHWM``) of ``pid`` and its child processes, read from /proc (Linux only)."""
+    peaks, pids = [], [pid]
+    while pids:
+        pid = pids.pop()
+        try:
+            with open(f'/proc/{pid}/status') as status:
+                peaks += [int(line.split()[1]) for line in status if line.startswith('VmHWM:')]
+            with open(f'/proc/{pid}/task/{pid}/children') as children:
+                pids += [int(child) for child in children.read().split()]
+        except OSError:
+            continue
+    return max(peaks, default=None)
+
+
+def current_commit():
+    result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                            capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help="Run only these, repeatable.")
+    parser.add_argument('--server', choices=['gunicorn', 'uvicorn'], help="Load a local server instead.")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4, help="gunicorn threads per worker")
+    parser.add_argument('--concurrency', type=int, default=16, help="Clients of --server, in process always 1.")
+    parser.add_argument('--duration', type=float, default=10, help="Seconds per scenario.")
+    parser.add_argument('--warmup', type=int, default=20, help="Iterations per scenario counting queries.")
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--dishes', type=int, default=20000)
+    parser.add_argument('--menus', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="Also write the JSON report to this file.")
+    options = parser.parse_args()
+    if options.users < 2:
+        parser.error("--users must be at least 2, one for the API requests and the rest for login/logout.")
+
+    dataset = create_dataset(options)
+    scenarios = {name: SCENARIOS[name] for name in options.scenario or SCENARIOS}
+    queries = {name: count_queries(scenario, dataset, options.warmup) for name, scenario in scenarios.items()}
+
+    process = None
+    if options.server:
+        port = free_port()
+        process = subprocess.Popen(server_command(options.server, port, options.workers, options.threads),
+                                   env=os.environ)
+        wait_until_ready(port)
+        transport_factory, concurrency = lambda: HTTPTransport(port), options.concurrency
+    else:
+        transport_factory, concurrency = InProcessTransport, 1
+
+    results = []
+    try:
+        for name, scenario in scenarios.items():
+            load(transport_factory, scenario, dataset, concurrency, 1)
+            stats = load(transport_factory, scenario, dataset, concurrency, options.duration)
+            results.append({'scenario': name, **stats, 'queries_per_request': queries[name]})
+        if process is not None:
+            peak_rss = peak_rss_kb(process.pid)
+        else:
+            # ru_maxrss is in kilobytes on Linux.
+            peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report = {
+        'commit': current_commit(),
+        'server': options.server or 'in-process',
+        'concurrency': concurrency,
+        'dataset': {name: value for name, value in dataset.items() if name != 'token'},
+        'peak_rss_kb': peak_rss,
+        'scenarios': results,
+    }
+    print(json.dumps(report, indent=2))
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(report, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
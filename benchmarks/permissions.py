@@ -0,0 +1,56 @@
+"""
+Queries per /api/v1/cards/ request for a user with permissions.
+
+    python -m benchmarks.permissions
+
+``cold`` requests load the permission snapshot from the database, as every
+request did before it was cached; ``warm`` requests reuse the cached snapshot.
+Snapshots are only cached in a cache shared by processes, a file based one
+unless ``CACHE_BACKEND`` is set.
+"""
+import json
+import os
+import tempfile
+
+from benchmarks import setup, test_database
+
+if 'CACHE_BACKEND' not in os.environ:
+    os.environ.update({
+        'CACHE_BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'CACHE_LOCATION': tempfile.mkdtemp(),
+    })
+
+setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.contrib.auth.models import Permission  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url)
+    return len(queries)
+
+
+def main(requests=10):
+    with test_database():
+        user = get_user_model().objects.create_user(username="benchmark", password="benchmark")
+        user.user_permissions.add(Permission.objects.get(codename="view_menu"))
+        client = Client()
+        client.login(username="benchmark", password="benchmark")
+        url = reverse("menu:cards-list")
+
+        cache.clear()
+        cold = count_queries(client, url)
+        warm = [count_queries(client, url) for _ in range(requests)]
+
+    print(json.dumps({"cold": cold, "warm": max(warm)}))
+
+
+if __name__ == '__main__':
+    main()
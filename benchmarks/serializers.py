@@ -0,0 +1,51 @@
+"""
+Serialization time of a card with 100 dishes and of a list of 1000 dishes
+with DishSerializer and with the FastListSerializer read path.
+
+    python -m benchmarks.serializers
+"""
+import json
+import timeit
+
+from benchmarks import setup, test_database
+
+setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+
+from menu.models import Dish, Menu  # noqa: E402
+from menu.serializers import DishSerializer, FastListSerializer, MenuReadSerializer  # noqa: E402
+
+
+def best_ms(func, repeat, number):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number * 1000
+
+
+def main(dishes=1000, card_dishes=100, repeat=5, number=10):
+    with test_database():
+        user = get_user_model().objects.create(username="benchmark")
+        Dish.objects.bulk_create(
+            Dish(name=f"Dish {i}", description="Benchmark dish", price="10.50", prep_time=10,
+                 is_vegetarian=bool(i % 2), author=user)
+            for i in range(dishes)
+        )
+        menu = Menu.objects.create(name="Benchmark", description="Benchmark card", author=user)
+        menu.dish.set(Dish.objects.all()[:card_dishes])
+        menu = Menu.objects.prefetch_related('dish').get(pk=menu.pk)
+
+        fast = FastListSerializer(DishSerializer, {})
+        results = {
+            "card_dishes": card_dishes,
+            "card_ms": best_ms(lambda: MenuReadSerializer(menu).data, repeat, number),
+            "dishes": dishes,
+            "dishes_ms": best_ms(lambda: DishSerializer(Dish.objects.all(), many=True).data, repeat, number),
+            "dishes_fast_ms": best_ms(
+                lambda: fast.to_representation(Dish.objects.values(*fast.value_fields)), repeat, number
+            ),
+        }
+
+    print(json.dumps(results))
+
+
+if __name__ == '__main__':
+    main()
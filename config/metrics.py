@@ -0,0 +1,322 @@
+"""
+Per-request instrumentation: SQL query count, database time, serialization
+time and total latency by view.
+
+Sampled requests carry a ``RequestMetrics`` in a context variable, so queries
+run by ``sync_to_async`` threads of async views are counted too. Totals are
+kept per process and exposed in the Prometheus text format by ``metrics_view``.
+With ``METRICS_DIR`` every process also writes its totals there and the view
+sums them, so servers with several workers report the totals of all of them.
+With ``METRICS_SAMPLE_RATE=0`` (the default) the middleware removes itself.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from functools import wraps
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+from config.settings import METRICS_ALLOWED_IPS, METRICS_DIR, METRICS_FLUSH_INTERVAL, METRICS_SAMPLE_RATE
+
+logger = logging.getLogger('metrics')
+
+_current = ContextVar('request_metrics', default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT'))
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'db_time', 'serialization_time', 'serializing')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialization_time = 0.0
+        self.serializing = False
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - start
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+def measures_serialization(method):
+    """Add the time spent in ``method`` to the serialization time of the request, outermost call only."""
+
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        metrics = _current.get()
+        if metrics is None or metrics.serializing:
+            return method(*args, **kwargs)
+        metrics.serializing = True
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            metrics.serialization_time += time.perf_counter() - start
+            metrics.serializing = False
+
+    return wrapper
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels) + '}'
+
+
+class Registry:
+    """
+    Thread-safe counters and histograms of one process.
+
+    With a ``directory`` the totals are also written to a file of this process
+    there, at most every ``flush_interval`` seconds, see ``collect``.
+    """
+
+    metrics = (
+        ('http_requests_total', 'counter', "Sampled requests."),
+        ('http_request_duration_seconds', 'histogram', "Total request latency."),
+        ('http_request_db_queries', 'histogram', "SQL queries per request."),
+        ('http_request_db_duration_seconds_total', 'counter', "Time spent in SQL queries."),
+        ('http_request_serialization_duration_seconds_total', 'counter', "Time spent serializing and rendering."),
+    )
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.lock = threading.Lock()
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.clear()
+
+    def clear(self):
+        self.counters = {}
+        self.histograms = {}
+        self.flushed_at = None
+        self.pid = os.getpid()
+        # Unique per process: a restarted worker reusing a pid must not overwrite the totals of the exited one.
+        self.file_name = f'{self.pid}-{uuid.uuid4().hex}.json'
+
+    def check_fork(self):
+        # A forked worker starts from zero, the totals recorded before the fork stay with the parent.
+        if os.getpid() != self.pid:
+            self.clear()
+
+    def increment(self, name, labels, value=1):
+        self.counters[name, labels] = self.counters.get((name, labels), 0) + value
+
+    def observe(self, name, labels, value, buckets):
+        histogram = self.histograms.get((name, labels))
+        if histogram is None:
+            histogram = self.histograms[name, labels] = [buckets, [0] * len(buckets), 0.0, 0]
+        for index, bound in enumerate(buckets):
+            if value <= bound:
+                histogram[1][index] += 1
+        histogram[2] += value
+        histogram[3] += 1
+
+    def record(self, view, method, status, metrics, duration):
+        labels = (('view', view), ('method', method))
+        with self.lock:
+            self.check_fork()
+            self.increment('http_requests_total', labels + (('status', status),))
+            self.observe('http_request_duration_seconds', labels, duration, LATENCY_BUCKETS)
+            self.observe('http_request_db_queries', labels, metrics.queries, QUERY_BUCKETS)
+            self.increment('http_request_db_duration_seconds_total', labels, metrics.db_time)
+            self.increment('http_request_serialization_duration_seconds_total', labels, metrics.serialization_time)
+        if self.directory:
+            self.flush()
+
+    def dump(self):
+        return {
+            'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+            'histograms': [[name, labels, buckets, counts, total, count]
+                           for (name, labels), (buckets, counts, total, count) in self.histograms.items()],
+        }
+
+    def merge(self, data):
+        """Add totals written by ``flush``."""
+        with self.lock:
+            for name, labels, value in data['counters']:
+                self.increment(name, tuple(map(tuple, labels)), value)
+            for name, labels, buckets, counts, total, count in data['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                histogram = self.histograms.setdefault(key, [tuple(buckets), [0] * len(buckets), 0.0, 0])
+                histogram[1] = [merged + added for merged, added in zip(histogram[1], counts)]
+                histogram[2] += total
+                histogram[3] += count
+
+    def flush(self, force=False):
+        """Write the totals of this process to its file in ``directory``, at most every ``flush_interval`` seconds."""
+        now = time.monotonic()
+        with self.lock:
+            self.check_fork()
+            if not force and self.flushed_at is not None and now - self.flushed_at < self.flush_interval:
+                return
+            self.flushed_at = now
+            data = json.dumps(self.dump())
+            path = os.path.join(self.directory, self.file_name)
+        os.makedirs(self.directory, exist_ok=True)
+        # Scrapes of other processes read the file at any time, it is replaced whole.
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as file:
+            file.write(data)
+        os.replace(temp_path, path)
+
+    def render(self):
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (buckets, list(counts), total, count))
+                                for key, (buckets, counts, total, count) in self.histograms.items())
+        lines = []
+        for metric, kind, help_text in self.metrics:
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}']
+            for (name, labels), value in counters:
+                if name == metric:
+                    lines.append(f'{name}{format_labels(labels)} {value}')
+            for (name, labels), (buckets, counts, total, count) in histograms:
+                if name != metric:
+                    continue
+                for bound, bucket_count in zip(buckets, counts):
+                    lines.append(f'{name}_bucket{format_labels(labels + (("le", f"{bound:g}"),))} {bucket_count}')
+                lines.append(f'{name}_bucket{format_labels(labels + (("le", "+Inf"),))} {count}')
+                lines.append(f'{name}_sum{format_labels(labels)} {total}')
+                lines.append(f'{name}_count{format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry(METRICS_DIR, METRICS_FLUSH_INTERVAL)
+
+
+def collect(directory):
+    """
+    Registry with the totals of every process that wrote to ``directory``. Files of exited
+    workers are kept so totals never go backwards, clear the directory when the server starts.
+    """
+    totals = Registry()
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as file:
+                totals.merge(json.load(file))
+        except (OSError, ValueError):
+            continue
+    return totals
+
+
+class MetricsMiddleware:
+    """Record sampled requests in ``registry`` and log them as JSON to the ``metrics`` logger."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not METRICS_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        metrics, start = self.start()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, metrics, start)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        metrics, start = self.start()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, metrics, start)
+        return response
+
+    def sampled(self):
+        return METRICS_SAMPLE_RATE >= 1 or random.random() < METRICS_SAMPLE_RATE
+
+    def start(self):
+        # Connections opened before this module was imported miss the connection_created signal.
+        for connection in connections.all():
+            install_query_recorder(connection)
+        return RequestMetrics(), time.perf_counter()
+
+    def finish(self, request, response, metrics, start):
+        duration = time.perf_counter() - start
+        match = request.resolver_match
+        # Unmatched paths share one label, so 404 scans cannot grow the registry.
+        view = match.view_name if match is not None else 'unmatched'
+        # Clients choose the method, any verb outside the standard ones would be a new label.
+        method = request.method if request.method in METHODS else 'other'
+        registry.record(view, method, response.status_code, metrics, duration)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'view': view,
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+                'db_queries': metrics.queries,
+                'db_ms': round(metrics.db_time * 1000, 2),
+                'serialization_ms': round(metrics.serialization_time * 1000, 2),
+            }))
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition of ``registry``, or of all processes with ``METRICS_DIR``,
+    only for ``METRICS_ALLOWED_IPS`` (none by default).
+    Only ``REMOTE_ADDR`` is checked, so do not allow the address of a reverse proxy.
+    """
+    if request.META.get('REMOTE_ADDR') not in METRICS_ALLOWED_IPS:
+        raise Http404
+    if registry.directory:
+        registry.flush(force=True)
+        text = collect(registry.directory).render()
+    else:
+        text = registry.render()
+    return HttpResponse(text, content_type='text/plain; version=0.0.4; charset=utf-8')
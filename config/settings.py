@@ -57,16 +57,20 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'menu.authentication.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+if DEBUG:
+    # The toolbar middleware is sync only, under ASGI it would serialize every request.
+    MIDDLEWARE.append('debug_toolbar.middleware.DebugToolbarMiddleware')
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
@@ -139,6 +143,9 @@ STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
+# menu.storage.ContentAddressedStorage stores files once per content, existing deployments opt in (see readme).
+DEFAULT_FILE_STORAGE = os.environ.get("DEFAULT_FILE_STORAGE", "django.core.files.storage.FileSystemStorage")
+SERVE_MEDIA = bool(int(os.environ.get("SERVE_MEDIA", DEBUG)))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
@@ -148,16 +155,28 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
-
+        'menu.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated'
     ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_RENDERER_CLASSES': [
+        'menu.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'menu.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get("PAGE_SIZE", 50)),
     'DATETIME_FORMAT': "%Y-%m-%d",
 }
 
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", 500))
+MAX_BULK_SIZE = int(os.environ.get("MAX_BULK_SIZE", 1000))
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", 2000))
+FAST_LIST_SERIALIZATION = bool(int(os.environ.get("FAST_LIST_SERIALIZATION", 1)))
+SEARCH_BACKEND = os.environ.get("SEARCH_BACKEND", "")
+SEARCH_CONFIG = os.environ.get("SEARCH_CONFIG", "simple")
+
 # EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 
@@ -166,11 +185,67 @@ EMAIL_BACKEND = 'sendgrid_backend.SendgridBackend'
 SENDGRID_API_KEY = os.environ.get("SENDGRID_API_KEY")
 SENDGRID_SANDBOX_MODE_IN_DEBUG = False
 EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER")
+EMAIL_BATCH_SIZE = int(os.environ.get("EMAIL_BATCH_SIZE", 500))
+EMAIL_WORKERS = int(os.environ.get("EMAIL_WORKERS", 4))
 
 SCHEDULER_HOUR = int(os.environ.get("SCHEDULER_HOUR", 22))
 SCHEDULER_MINUTE = int(os.environ.get("SCHEDULER_MINUTE", 45))
+SCHEDULER_LOCK_FILE = os.environ.get("SCHEDULER_LOCK_FILE", os.path.join(BASE_DIR, "scheduler.lock"))
 
 IMAGE_TYPES = ['image/jpeg', 'image/png']
+IMAGE_VARIANTS = {
+    'thumbnail': int(os.environ.get("IMAGE_THUMBNAIL_WIDTH", 320)),
+    'medium': int(os.environ.get("IMAGE_MEDIUM_WIDTH", 960)),
+}
+IMAGE_QUALITY = int(os.environ.get("IMAGE_QUALITY", 80))
+IMAGE_WORKERS = int(os.environ.get("IMAGE_WORKERS", 2))
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
+PERMISSIONS_CACHE_TIMEOUT = int(os.environ.get("PERMISSIONS_CACHE_TIMEOUT", 60))
+TOKEN_CACHE_TIMEOUT = int(os.environ.get("TOKEN_CACHE_TIMEOUT", 300))
+TOKEN_LOCAL_CACHE_TIMEOUT = int(os.environ.get("TOKEN_LOCAL_CACHE_TIMEOUT", 5))
+TOKEN_LOCAL_CACHE_SIZE = int(os.environ.get("TOKEN_LOCAL_CACHE_SIZE", 10000))
+
+# django.contrib.sessions.backends.cached_db, .db or .signed_cookies. Sessions are only cached in a cache shared
+# by all processes, with the per-process LocMemCache a logout would not reach the copies of other processes.
+SESSION_ENGINE = os.environ.get("SESSION_ENGINE", (
+    "django.contrib.sessions.backends.db" if CACHES["default"]["BACKEND"].endswith(".LocMemCache")
+    else "django.contrib.sessions.backends.cached_db"
+))
+SESSION_USER_CACHE_TIMEOUT = int(os.environ.get("SESSION_USER_CACHE_TIMEOUT", 300))
+SESSION_CLEANUP_BATCH_SIZE = int(os.environ.get("SESSION_CLEANUP_BATCH_SIZE", 1000))
+SESSION_CLEANUP_MINUTE = int(os.environ.get("SESSION_CLEANUP_MINUTE", 30))
+RESPONSE_CACHE_ALIAS = os.environ.get("RESPONSE_CACHE_ALIAS", "default")
+RESPONSE_CACHE_TIMEOUT = int(os.environ.get("RESPONSE_CACHE_TIMEOUT", 300))
+
+METRICS_SAMPLE_RATE = float(os.environ.get("METRICS_SAMPLE_RATE", 0))
+# Totals of each process are written here, so servers with several workers report all of them.
+METRICS_DIR = os.environ.get("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 1))
+# Opt-in: behind a reverse proxy on the same host every client connects from 127.0.0.1.
+METRICS_ALLOWED_IPS = os.environ.get("METRICS_ALLOWED_IPS", "").split()
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # One JSON line per sampled request at INFO.
+        'metrics': {
+            'handlers': ['console'],
+            'level': os.environ.get("METRICS_LOG_LEVEL", "WARNING"),
+            'propagate': False,
+        },
+    },
+}
 
 AUTH_USER_MODEL = 'users.CustomUser'
 
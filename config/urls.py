@@ -13,16 +13,18 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
 
-from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.views.generic import RedirectView
 from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
 from config import settings
+from config.metrics import metrics_view
+from menu.storage import serve_media
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -45,10 +47,16 @@ urlpatterns = [
     path('accounts/registration/', include('dj_rest_auth.registration.urls')),
     path('api-auth/', include('rest_framework.urls')),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    path('internal/metrics/', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
     import debug_toolbar
 
     urlpatterns.append(path('__debug__/', include(debug_toolbar.urls)))
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+
+if settings.SERVE_MEDIA:
+    urlpatterns.append(
+        re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.*)$', serve_media,
+                {'document_root': settings.MEDIA_ROOT})
+    )
\ No newline at end of file
@@ -1,5 +1,4 @@
 from django.apps import AppConfig
-import os
 
 app_name = 'menu'
 
@@ -7,6 +6,6 @@ class MenuConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'menu'
 
-    if os.environ.get('RUN_MAIN', None) != 'true':
-        from menu.jobs import start_scheduler
-        start_scheduler()
+    def ready(self):
+        import menu.checks  # noqa: F401
+        import menu.signals  # noqa: F401
@@ -0,0 +1,68 @@
+"""
+Async read endpoints for cards and dishes.
+
+Django 3.2 has no async ORM, so every request runs the regular viewset -
+authentication, permission snapshot, queries and rendering - in one
+``sync_to_async`` call. Under ASGI that call goes to the shared thread pool
+instead of the single thread-sensitive thread used for all requests, so slow
+queries of one request do not queue the others. Responses are identical to
+the ones of ``menu.views``.
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import HttpResponse
+
+from menu.views import DishViewSet, MenuViewSet
+
+
+def rendered(view):
+    """Call a sync view and return its response rendered to a plain ``HttpResponse``."""
+
+    def handle(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        plain = HttpResponse(response.content, status=response.status_code)
+        if not response.has_header('Content-Type'):
+            del plain['Content-Type']
+        for header, value in response.items():
+            plain[header] = value
+        plain.cookies = response.cookies
+        return plain
+
+    return handle
+
+
+def with_connection_cleanup(handle):
+    """Keep pooled threads' database connections within ``CONN_MAX_AGE``, like request signals do."""
+
+    def run(*args, **kwargs):
+        close_old_connections()
+        try:
+            return handle(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return run
+
+
+def async_view(viewset, actions, **initkwargs):
+    handle = rendered(viewset.as_view(actions, **initkwargs))
+    pooled = sync_to_async(with_connection_cleanup(handle), thread_sensitive=False)
+    # Under WSGI the request thread already owns the connection, stay on it.
+    request_thread = sync_to_async(handle)
+
+    async def view(request, *args, **kwargs):
+        if isinstance(request, ASGIRequest):
+            return await pooled(request, *args, **kwargs)
+        return await request_thread(request, *args, **kwargs)
+
+    view.csrf_exempt = True
+    return view
+
+
+card_list = async_view(MenuViewSet, {'get': 'list'}, basename='cards', detail=False)
+card_detail = async_view(MenuViewSet, {'get': 'retrieve'}, basename='cards', detail=True)
+dish_list = async_view(DishViewSet, {'get': 'list'}, basename='dishes', detail=False)
+dish_detail = async_view(DishViewSet, {'get': 'retrieve'}, basename='dishes', detail=True)
@@ -0,0 +1,158 @@
+"""
+Token and session authentication without the user query on every request.
+
+``CachedTokenAuthentication`` resolves a token from an in-process LRU, then
+from the shared cache and only then with the query of ``TokenAuthentication``.
+Deleting a token (``dj_rest_auth`` logout) and saving or deleting its user drop
+it from the shared cache and from the LRU of the process that made the change
+(see ``menu.signals``); LRUs of other processes keep it for at most
+``TOKEN_LOCAL_CACHE_TIMEOUT`` seconds. The shared layer is only used when the
+default cache is shared between processes, never with ``LocMemCache``, where
+other processes would keep revoked tokens.
+
+``CachedAuthenticationMiddleware`` loads the user of a session (browsable API,
+admin) from the shared cache, for sessions with the auth hash of the cached
+user. Saving or deleting the user drops the entry. Without a shared cache it
+loads the user like ``AuthenticationMiddleware``.
+"""
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha256
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from config.settings import (
+    SESSION_USER_CACHE_TIMEOUT,
+    TOKEN_CACHE_TIMEOUT,
+    TOKEN_LOCAL_CACHE_SIZE,
+    TOKEN_LOCAL_CACHE_TIMEOUT,
+)
+from menu.cache import shared_cache
+
+
+class LRUCache:
+    """Thread-safe mapping of at most ``size`` entries, each expiring ``timeout`` seconds after it was set."""
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.size <= 0 or self.timeout <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_tokens = LRUCache(TOKEN_LOCAL_CACHE_SIZE, TOKEN_LOCAL_CACHE_TIMEOUT)
+
+
+def token_cache_key(key):
+    # Raw tokens are credentials, they do not go into cache keys.
+    return f"menu:tokens:{sha256(key.encode()).hexdigest()}"
+
+
+def invalidate_token(key):
+    cache_key = token_cache_key(key)
+    local_tokens.delete(cache_key)
+    cache = shared_cache()
+    if cache is not None:
+        cache.delete(cache_key)
+
+
+def invalidate_user_tokens(user_pk):
+    for key in Token.objects.filter(user_id=user_pk).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` with the token and its user cached for ``TOKEN_CACHE_TIMEOUT`` seconds."""
+
+    def authenticate_credentials(self, key):
+        cache_key = token_cache_key(key)
+        token = local_tokens.get(cache_key)
+        if token is None:
+            cache = shared_cache()
+            token = cache.get(cache_key) if cache is not None else None
+            if token is None:
+                # Unknown tokens and inactive users raise here and are never cached.
+                user, token = super().authenticate_credentials(key)
+                if cache is not None:
+                    cache.set(cache_key, token, TOKEN_CACHE_TIMEOUT)
+            local_tokens.set(cache_key, token)
+        return token.user, token
+
+
+def session_user_cache_key(user_pk):
+    return f"menu:session-users:{user_pk}"
+
+
+def invalidate_session_user(user_pk):
+    cache = shared_cache()
+    if cache is not None:
+        cache.delete(session_user_cache_key(user_pk))
+
+
+def get_session_user(request):
+    """``django.contrib.auth.get_user`` from the cache when the session auth hash matches the cached user."""
+    session = request.session
+    user_pk = session.get(SESSION_KEY)
+    backend_path = session.get(BACKEND_SESSION_KEY)
+    session_hash = session.get(HASH_SESSION_KEY)
+    cache = shared_cache()
+    if cache is None or user_pk is None or not session_hash or backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+
+    key = session_user_cache_key(user_pk)
+    cached = cache.get(key)
+    if cached is not None:
+        cached_backend, cached_hash, user = cached
+        if cached_backend == backend_path and constant_time_compare(cached_hash, session_hash):
+            return user
+
+    # Verifies the session hash and flushes sessions of changed passwords, those users are never cached.
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        cache.set(key, (backend_path, user.get_session_auth_hash(), user), SESSION_USER_CACHE_TIMEOUT)
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """``AuthenticationMiddleware`` loading ``request.user`` with ``get_session_user``."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_session_user(request))
@@ -0,0 +1,48 @@
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from config.settings import RESPONSE_CACHE_ALIAS
+
+RESPONSES_VERSION_KEY = 'menu:responses:version'
+
+
+def shared_cache(alias='default'):
+    """Cache ``alias`` when it is shared between processes, ``None`` for the per-process ``LocMemCache``."""
+    backend = caches[alias]
+    return None if isinstance(backend, LocMemCache) else backend
+
+
+def response_cache():
+    """The response cache, ``None`` for a per-process ``LocMemCache``, invalidations would miss other processes."""
+    return shared_cache(RESPONSE_CACHE_ALIAS)
+
+
+def invalidate_responses():
+    """Drop every cached response at once by moving to a new key version."""
+    cache = response_cache()
+    if cache is None:
+        return
+    try:
+        cache.incr(RESPONSES_VERSION_KEY)
+    except ValueError:
+        cache.set(RESPONSES_VERSION_KEY, 2, None)
+
+
+def response_cache_key(cache, request, view):
+    params = sorted(
+        (key, value)
+        for key in request.query_params
+        for value in request.query_params.getlist(key)
+        if value != ''
+    )
+    lookup = view.kwargs.get(view.lookup_url_kwarg or view.lookup_field, '')
+    # Cached data holds absolute links and the ETag depends on the format, both are part of the key.
+    raw = (
+        f"{request.get_host()}:{request.accepted_renderer.format}:"
+        f"{view.basename}:{view.action}:{lookup}:{urlencode(params)}"
+    )
+    version = cache.get_or_set(RESPONSES_VERSION_KEY, 1, None)
+    return f"menu:responses:{version}:{md5(raw.encode()).hexdigest()}"
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+CACHED_SESSION_ENGINES = ('django.contrib.sessions.backends.cache', 'django.contrib.sessions.backends.cached_db')
+
+
+@register()
+def session_cache_check(app_configs, **kwargs):
+    """Cached sessions need a cache shared by all processes, a logout must reach every copy of the session."""
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES \
+            and isinstance(caches[settings.SESSION_CACHE_ALIAS], LocMemCache):
+        return [Error(
+            f"SESSION_ENGINE {settings.SESSION_ENGINE} caches sessions in the per-process LocMemCache.",
+            hint="Configure a shared CACHE_BACKEND (e.g. Redis) or use django.contrib.sessions.backends.db.",
+            id='menu.E001',
+        )]
+    return []
@@ -0,0 +1,86 @@
+from datetime import date, datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.template.loader import get_template
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+
+class DailyDigest:
+    """
+    Dishes created and updated on a single day, rendered as the update email.
+
+    Both sets come from one range-filtered query and the rendered HTML of a
+    finished day is kept in the cache, so retries do not touch the database.
+    """
+    template_name = 'menu/email.html'
+    cache_timeout = 60 * 60 * 24
+
+    def __init__(self, day):
+        self.day = day
+
+    @classmethod
+    def for_yesterday(cls):
+        return cls(date.today() - timedelta(days=1))
+
+    @property
+    def title(self):
+        return f"Update on {self.day + timedelta(days=1)}"
+
+    @property
+    def cache_key(self):
+        return f"menu:digest:{self.day.isoformat()}"
+
+    @property
+    def bounds(self):
+        start = timezone.make_aware(datetime.combine(self.day, time.min))
+        end = timezone.make_aware(datetime.combine(self.day + timedelta(days=1), time.min))
+        return start, end
+
+    @cached_property
+    def dishes(self):
+        from menu.models import Dish
+
+        start, end = self.bounds
+        created = Q(created_at__gte=start, created_at__lt=end)
+        updated = Q(updated_at__gte=start, updated_at__lt=end)
+        rows = Dish.objects.filter(created | updated).annotate(
+            is_created=ExpressionWrapper(created, output_field=BooleanField()),
+            is_updated=ExpressionWrapper(updated, output_field=BooleanField()),
+        ).order_by('pk').values('name', 'price', 'is_created', 'is_updated')
+
+        created_dishes, updated_dishes = [], []
+        for row in rows:
+            if row['is_created']:
+                created_dishes.append(row)
+            if row['is_updated']:
+                updated_dishes.append(row)
+        return created_dishes, updated_dishes
+
+    @property
+    def created_dishes(self):
+        return self.dishes[0]
+
+    @property
+    def updated_dishes(self):
+        return self.dishes[1]
+
+    def render(self):
+        context = {
+            "updated_dishes": self.updated_dishes,
+            "created_dishes": self.created_dishes,
+            "date_to_search": self.day
+        }
+        return get_template(self.template_name).render(context)
+
+    @cached_property
+    def html(self):
+        if self.day >= date.today():
+            return self.render()
+
+        html = cache.get(self.cache_key)
+        if html is None:
+            html = self.render()
+            cache.set(self.cache_key, html, self.cache_timeout)
+        return html
@@ -0,0 +1,60 @@
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+
+from config.settings import EXPORT_CHUNK_SIZE
+from menu.renderers import FastJSONRenderer, NDJSONRenderer
+from menu.serializers import FastListSerializer
+
+
+def export_items(queryset, serializer_class, context, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the serialized rows of ``queryset`` holding at most ``chunk_size`` rows
+    in memory; nested relations cost one query per chunk.
+    """
+    serializer = FastListSerializer(serializer_class, context)
+    pk_name = queryset.model._meta.pk.attname
+    rows = queryset.values(*dict.fromkeys(serializer.value_fields + [pk_name])).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield from serializer.to_representation(chunk)
+
+
+def encode_json(items):
+    encode = FastJSONRenderer().render
+    separator = b'['
+    for item in items:
+        yield separator + encode(item)
+        separator = b','
+    yield b']' if separator == b',' else b'[]'
+
+
+def encode_ndjson(items):
+    encode = FastJSONRenderer().render
+    for item in items:
+        yield encode(item) + b'\n'
+
+
+ENCODERS = {
+    FastJSONRenderer.format: encode_json,
+    NDJSONRenderer.format: encode_ndjson,
+}
+
+
+class ExportMixin:
+    """
+    ``GET <list>/export/`` streams every row of the filtered list as a JSON array,
+    or as NDJSON with ``?format=ndjson``, without pagination and in constant memory.
+    """
+
+    @action(detail=False, renderer_classes=[FastJSONRenderer, NDJSONRenderer])
+    def export(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        items = export_items(queryset, self.get_serializer_class(), self.get_serializer_context())
+        response = StreamingHttpResponse(ENCODERS[renderer.format](items), content_type=renderer.media_type)
+        response['Content-Disposition'] = f'attachment; filename="{self.basename}.{renderer.format}"'
+        return response
@@ -0,0 +1,98 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from config.settings import IMAGE_QUALITY, IMAGE_VARIANTS, IMAGE_WORKERS
+from menu.cache import invalidate_responses
+from menu.models import Dish
+
+VARIANTS_DIR = 'variants'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix='images')
+        return _executor
+
+
+def variant_name(name, variant):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return os.path.join(Dish._meta.get_field('image').upload_to, VARIANTS_DIR, f'{stem}_{variant}.webp')
+
+
+def render_variant(image, width):
+    """Return ``image`` scaled down to at most ``width`` pixels wide, encoded as WebP."""
+    variant = image.copy()
+    variant.thumbnail((width, image.height), Image.LANCZOS)
+    output = BytesIO()
+    variant.save(output, 'WEBP', quality=IMAGE_QUALITY, method=4)
+    return output.getvalue()
+
+
+def process_image(dish_id):
+    """
+    Read the image of a dish once, store its dimensions and a WebP variant per
+    ``IMAGE_VARIANTS`` width. Returns False when the dish or its image changed meanwhile.
+    """
+    name = Dish.objects.filter(pk=dish_id).values_list('image', flat=True).first()
+    if not name:
+        return False
+
+    storage = Dish._meta.get_field('image').storage
+    with storage.open(name) as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.mode or 'transparency' in image.info else 'RGB')
+
+        variants = {}
+        for variant, width in IMAGE_VARIANTS.items():
+            variants[variant] = storage.save(variant_name(name, variant), ContentFile(render_variant(image, width)))
+
+    # Filtering on the image skips results for a file that was replaced while processing. Variants are derived
+    # data, updated_at is left alone so reprocessing does not list dishes as updated in the daily digest.
+    updated = Dish.objects.filter(pk=dish_id, image=name).update(
+        image_width=image.width,
+        image_height=image.height,
+        image_variants=variants,
+    )
+    if updated:
+        invalidate_responses()
+    return bool(updated)
+
+
+def run(dish_id):
+    try:
+        return process_image(dish_id)
+    except Exception:
+        logging.exception(f"Could not process image of dish {dish_id}")
+        return False
+
+
+def run_pooled(dish_id):
+    close_old_connections()
+    try:
+        return run(dish_id)
+    finally:
+        close_old_connections()
+
+
+def schedule(dish_id):
+    """
+    Process the image of a dish after the current transaction commits, on the
+    image worker pool. With ``IMAGE_WORKERS=0`` it runs in the committing thread.
+    """
+    if IMAGE_WORKERS:
+        transaction.on_commit(lambda: get_executor().submit(run_pooled, dish_id))
+    else:
+        transaction.on_commit(lambda: run(dish_id))
@@ -0,0 +1,254 @@
+import csv
+import json
+import time
+from itertools import islice
+from urllib.parse import urlparse
+
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from rest_framework import serializers
+
+from config.settings import MEDIA_URL
+from menu.cache import invalidate_responses
+from menu.models import Dish, Menu
+from menu.search import get_search_backend
+from menu.serializers import DishSerializer, MenuSerializer
+
+
+def read_json(stream, buffer_size=1 << 16):
+    """Yield the items of a JSON array one by one, without loading the whole document."""
+    decoder = json.JSONDecoder()
+    buffer, position, started = '', 0, False
+    while True:
+        chunk = stream.read(buffer_size)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if not started and position < len(buffer):
+                if buffer[position] != '[':
+                    raise ValueError("Expected a JSON array")
+                started, position = True, position + 1
+                continue
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if not chunk:
+                    raise
+                break
+            yield item
+        if not chunk:
+            return
+
+
+def read_ndjson(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+READERS = {
+    'json': read_json,
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+class DishImportSerializer(DishSerializer):
+    id = serializers.IntegerField(required=False, min_value=1)
+    author = serializers.IntegerField(required=False, min_value=1)
+    image = serializers.CharField(required=False, allow_blank=True, max_length=100)
+
+    class Meta(DishSerializer.Meta):
+        fields = DishSerializer.Meta.fields + ('author',)
+
+
+class MenuImportSerializer(MenuSerializer):
+    id = serializers.IntegerField(required=False, min_value=1)
+    author = serializers.IntegerField(required=False, min_value=1)
+    # Uniqueness and dish existence are checked once per batch by the importer.
+    name = serializers.CharField(max_length=255)
+    dish = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False)
+
+    class Meta:
+        model = Menu
+        fields = ('id', 'name', 'description', 'author', 'dish')
+
+
+class Importer:
+    """
+    Validate and insert rows in batches: field rules come from the API
+    serializers, cross-row rules (existing ids, authors, ...) cost one query per
+    batch, and every batch is written with ``bulk_create`` in its own transaction.
+
+    Invalid rows are skipped and reported in ``errors`` as ``(row number, errors)``.
+    """
+    model = None
+    serializer_class = None
+
+    def __init__(self, batch_size=1000, author=None):
+        self.batch_size = batch_size
+        self.author = author
+        self.serializer = self.serializer_class()
+        self.imported = 0
+        self.errors = []
+        self.explicit_ids = False
+
+    def normalize(self, item):
+        if 'fields' in item:
+            item = {**item['fields'], 'id': item.get('pk')}
+        return {key: value for key, value in item.items() if value not in (None, '') or key == 'image'}
+
+    def validate(self, item):
+        try:
+            return self.serializer.run_validation(self.normalize(item)), None
+        except serializers.ValidationError as error:
+            return None, error.detail
+
+    def check_batch(self, rows):
+        """Return errors by row number for the rules that need the database."""
+        errors = {}
+        ids = [row['id'] for _, row in rows if 'id' in row]
+        taken = set(self.model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        authors = {row['author'] for _, row in rows if 'author' in row}
+        known_authors = set(get_user_model().objects.filter(pk__in=authors).values_list('pk', flat=True))
+
+        seen = set()
+        for number, row in rows:
+            if 'id' in row and (row['id'] in taken or row['id'] in seen):
+                errors[number] = {'id': [f"Object with id {row['id']} already exists."]}
+            elif 'author' in row and row['author'] not in known_authors:
+                errors[number] = {'author': [f"User {row['author']} does not exist."]}
+            elif 'author' not in row and self.author is None:
+                errors[number] = {'author': ["This field is required without --author."]}
+            seen.add(row.get('id'))
+        return errors
+
+    def build(self, row):
+        row = dict(row)
+        row['author_id'] = row.pop('author', None) or self.author.pk
+        return self.model(**row)
+
+    def write(self, rows):
+        self.model.objects.bulk_create([self.build(row) for _, row in rows])
+
+    def import_batch(self, items, first_number):
+        rows = []
+        for number, item in enumerate(items, first_number):
+            row, errors = self.validate(item)
+            if errors:
+                self.errors.append((number, errors))
+            else:
+                rows.append((number, row))
+
+        batch_errors = self.check_batch(rows)
+        self.errors.extend(sorted(batch_errors.items()))
+        rows = [(number, row) for number, row in rows if number not in batch_errors]
+        if rows:
+            self.explicit_ids = self.explicit_ids or any('id' in row for _, row in rows)
+            with transaction.atomic():
+                self.write(rows)
+        self.imported += len(rows)
+
+    def run(self, items, progress=None):
+        """Import ``items``; ``progress(imported, elapsed)`` is called after every batch."""
+        start = time.monotonic()
+        items = iter(items)
+        number = 1
+        while True:
+            batch = list(islice(items, self.batch_size))
+            if not batch:
+                break
+            self.import_batch(batch, number)
+            number += len(batch)
+            if progress is not None:
+                progress(self.imported, time.monotonic() - start)
+
+        if self.explicit_ids:
+            self.reset_sequences()
+        if self.imported:
+            invalidate_responses()
+        return self.imported, time.monotonic() - start
+
+    def reset_sequences(self):
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [self.model]):
+                cursor.execute(sql)
+
+
+class DishImporter(Importer):
+    model = Dish
+    serializer_class = DishImportSerializer
+
+    def normalize(self, item):
+        item = super().normalize(item)
+        # Exports carry image URLs, the model stores paths relative to MEDIA_ROOT.
+        path = urlparse(item.get('image') or '').path
+        item['image'] = path[len(MEDIA_URL):] if path.startswith(MEDIA_URL) else path
+        return item
+
+
+class MenuImporter(Importer):
+    model = Menu
+    serializer_class = MenuImportSerializer
+
+    def normalize(self, item):
+        item = super().normalize(item)
+        dishes = item.get('dish', [])
+        if isinstance(dishes, str):
+            dishes = dishes.split()
+        item['dish'] = [dish['id'] if isinstance(dish, dict) else dish for dish in dishes]
+        return item
+
+    def check_batch(self, rows):
+        errors = super().check_batch(rows)
+        names = [row['name'] for _, row in rows]
+        taken = set(Menu.objects.filter(name__in=names).values_list('name', flat=True))
+        dish_ids = {dish_id for _, row in rows for dish_id in row.get('dish', [])}
+        known_dishes = set(Dish.objects.filter(pk__in=dish_ids).values_list('pk', flat=True))
+
+        seen = set()
+        for number, row in rows:
+            if number in errors:
+                continue
+            missing = sorted(set(row.get('dish', [])) - known_dishes)
+            if row['name'] in taken or row['name'] in seen:
+                errors[number] = {'name': ["menu with this name already exists."]}
+            elif missing:
+                errors[number] = {'dish': [f'Invalid pk "{pk}" - object does not exist.' for pk in missing]}
+            seen.add(row['name'])
+        return errors
+
+    def build(self, row):
+        row = dict(row)
+        row.pop('dish', None)
+        return super().build(row)
+
+    def write(self, rows):
+        super().write(rows)
+        # Names are unique, so they map rows to primary keys on every database.
+        menu_ids = dict(Menu.objects.filter(name__in=[row['name'] for _, row in rows]).values_list('name', 'pk'))
+        through = Menu.dish.through
+        through.objects.bulk_create(
+            [
+                through(menu_id=menu_ids[row['name']], dish_id=dish_id)
+                for _, row in rows
+                for dish_id in dict.fromkeys(row.get('dish', []))
+            ]
+        )
+        Menu.objects.filter(pk__in=menu_ids.values()).refresh_dishes_count()
+        get_search_backend().index(list(menu_ids.values()))
+
+
+IMPORTERS = {
+    'cards': MenuImporter,
+    'dishes': DishImporter,
+}
@@ -1,10 +1,186 @@
-from apscheduler.schedulers.background import BackgroundScheduler
+import fcntl
+import pickle
+import zlib
+from contextlib import contextmanager
 
-from config.settings import SCHEDULER_HOUR, SCHEDULER_MINUTE
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore, ConflictingIdError, JobLookupError
+from apscheduler.schedulers.blocking import BlockingScheduler
+from apscheduler.util import datetime_to_utc_timestamp, utc_timestamp_to_datetime
+from django.contrib.sessions.models import Session
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from config.settings import (
+    SCHEDULER_HOUR,
+    SCHEDULER_LOCK_FILE,
+    SCHEDULER_MINUTE,
+    SESSION_CLEANUP_BATCH_SIZE,
+    SESSION_CLEANUP_MINUTE,
+)
 from menu.utils import send_update_email
 
 
-def start_scheduler():
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(send_update_email, 'cron', minute=SCHEDULER_MINUTE, hour=SCHEDULER_HOUR, replace_existing=True)
-    scheduler.start()
+class SchedulerLocked(Exception):
+    pass
+
+
+class DjangoJobStore(BaseJobStore):
+    """APScheduler job store keeping pickled jobs in the ``ScheduledJob`` table."""
+
+    def __init__(self, pickle_protocol=pickle.HIGHEST_PROTOCOL):
+        super().__init__()
+        self.pickle_protocol = pickle_protocol
+
+    @property
+    def jobs(self):
+        from menu.models import ScheduledJob
+        return ScheduledJob.objects
+
+    def lookup_job(self, job_id):
+        job_state = self.jobs.filter(id=job_id).values_list('job_state', flat=True).first()
+        return self._reconstitute_job(job_state) if job_state else None
+
+    def get_due_jobs(self, now):
+        return self._get_jobs(next_run_time__lte=datetime_to_utc_timestamp(now))
+
+    def get_next_run_time(self):
+        next_run_time = self.jobs.filter(next_run_time__isnull=False).order_by(
+            'next_run_time').values_list('next_run_time', flat=True).first()
+        return utc_timestamp_to_datetime(next_run_time)
+
+    def get_all_jobs(self):
+        jobs = self._get_jobs()
+        self._fix_paused_jobs_sorting(jobs)
+        return jobs
+
+    def add_job(self, job):
+        try:
+            with transaction.atomic():
+                self.jobs.create(id=job.id, **self._serialize(job))
+        except IntegrityError:
+            raise ConflictingIdError(job.id)
+
+    def update_job(self, job):
+        if not self.jobs.filter(id=job.id).update(**self._serialize(job)):
+            raise JobLookupError(job.id)
+
+    def remove_job(self, job_id):
+        deleted, _ = self.jobs.filter(id=job_id).delete()
+        if not deleted:
+            raise JobLookupError(job_id)
+
+    def remove_all_jobs(self):
+        self.jobs.all().delete()
+
+    def _serialize(self, job):
+        return {
+            'next_run_time': datetime_to_utc_timestamp(job.next_run_time),
+            'job_state': pickle.dumps(job.__getstate__(), self.pickle_protocol),
+        }
+
+    def _reconstitute_job(self, job_state):
+        job_state = pickle.loads(bytes(job_state))
+        job_state['jobstore'] = self
+        job = Job.__new__(Job)
+        job.__setstate__(job_state)
+        job._scheduler = self._scheduler
+        job._jobstore_alias = self._alias
+        return job
+
+    def _get_jobs(self, **filters):
+        jobs = []
+        failed_job_ids = set()
+        rows = self.jobs.filter(**filters).order_by('next_run_time').values_list('id', 'job_state')
+        for job_id, job_state in rows:
+            try:
+                jobs.append(self._reconstitute_job(job_state))
+            except BaseException:
+                self._logger.exception('Unable to restore job "%s" -- removing it', job_id)
+                failed_job_ids.add(job_id)
+
+        if failed_job_ids:
+            self.jobs.filter(id__in=failed_job_ids).delete()
+        return jobs
+
+
+@contextmanager
+def single_instance_lock(name='menu-scheduler'):
+    """
+    Hold a cluster wide lock for the lifetime of the block: a session advisory
+    lock on PostgreSQL, an exclusive file lock on other databases.
+    """
+    if connection.vendor == 'postgresql':
+        key = zlib.crc32(name.encode())
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [key])
+            if not cursor.fetchone()[0]:
+                raise SchedulerLocked(name)
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [key])
+    else:
+        with open(SCHEDULER_LOCK_FILE, 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise SchedulerLocked(name)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def send_update_email_job():
+    close_old_connections()
+    try:
+        send_update_email()
+    finally:
+        close_old_connections()
+
+
+def clear_expired_sessions(batch_size=SESSION_CLEANUP_BATCH_SIZE):
+    """
+    Delete sessions expired before now, ``batch_size`` rows per DELETE, so no
+    single statement holds locks on ``django_session`` for long.
+    """
+    now = timezone.now()
+    deleted = 0
+    while True:
+        keys = list(Session.objects.filter(expire_date__lt=now).values_list('session_key', flat=True)[:batch_size])
+        if not keys:
+            return deleted
+        deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+
+
+def clear_expired_sessions_job():
+    close_old_connections()
+    try:
+        clear_expired_sessions()
+    finally:
+        close_old_connections()
+
+
+def create_scheduler(scheduler_class=BlockingScheduler):
+    scheduler = scheduler_class(
+        jobstores={'default': DjangoJobStore()},
+        job_defaults={'coalesce': True, 'max_instances': 1},
+    )
+    scheduler.add_job(
+        send_update_email_job,
+        'cron',
+        id='send_update_email',
+        minute=SCHEDULER_MINUTE,
+        hour=SCHEDULER_HOUR,
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        clear_expired_sessions_job,
+        'cron',
+        id='clear_expired_sessions',
+        minute=SESSION_CLEANUP_MINUTE,
+        replace_existing=True,
+    )
+    return scheduler
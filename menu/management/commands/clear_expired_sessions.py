@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from config.settings import SESSION_CLEANUP_BATCH_SIZE
+from menu.jobs import clear_expired_sessions
+
+
+class Command(BaseCommand):
+    help = "Delete expired database sessions in batches, unlike clearsessions which runs one DELETE."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SESSION_CLEANUP_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        deleted = clear_expired_sessions(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired sessions"))
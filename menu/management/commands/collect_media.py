@@ -0,0 +1,54 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from menu.models import Dish
+from menu.storage import TEMP_DIR
+
+
+def walk(storage, directory):
+    if not storage.exists(directory):
+        return
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield posixpath.join(directory, name)
+    for name in directories:
+        yield from walk(storage, posixpath.join(directory, name))
+
+
+class Command(BaseCommand):
+    help = "Delete dish images and image variants that no dish refers to anymore."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=3600,
+                            help="Keep files modified in the last N seconds, e.g. uploads not committed yet.")
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        field = Dish._meta.get_field('image')
+        storage = field.storage
+        # Identical uploads share one file, so a file stays while any dish refers to it. References are streamed
+        # from the database, only the set of referenced names is kept: one entry per stored file, not per dish.
+        referenced = set()
+        rows = Dish.objects.exclude(image='').values_list('image', 'image_variants')
+        for image, variants in rows.iterator(chunk_size=2000):
+            referenced.add(image)
+            referenced.update(variants.values())
+
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+        deleted = freed = 0
+        for directory in (field.upload_to.strip('/'), TEMP_DIR):
+            for name in walk(storage, directory):
+                if name in referenced or storage.get_modified_time(name) > cutoff:
+                    continue
+                freed += storage.size(name)
+                if not options['dry_run']:
+                    storage.delete(name)
+                deleted += 1
+
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {deleted} unreferenced files ({freed / 1024 / 1024:.1f} MiB), {len(referenced)} files in use"
+        ))
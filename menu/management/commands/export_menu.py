@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from config.settings import EXPORT_CHUNK_SIZE
+from menu.export import ENCODERS, export_items
+from menu.models import Dish, Menu
+from menu.serializers import DishSerializer, MenuReadSerializer
+
+EXPORTS = {
+    'cards': (Menu, MenuReadSerializer),
+    'dishes': (Dish, DishSerializer),
+}
+
+
+class Command(BaseCommand):
+    help = "Stream all cards or dishes as a JSON array or NDJSON, in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(ENCODERS), default='json')
+        parser.add_argument('--output', help="File to write to, standard output by default.")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        model, serializer_class = EXPORTS[options['kind']]
+        items = export_items(model.objects.order_by('pk'), serializer_class, {}, options['chunk_size'])
+        chunks = ENCODERS[options['format']](items)
+
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
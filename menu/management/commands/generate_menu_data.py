@@ -0,0 +1,169 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from menu.cache import invalidate_responses
+from menu.models import Dish, Menu
+from menu.search import get_search_backend
+
+ADJECTIVES = ['Spicy', 'Grilled', 'Roasted', 'Smoked', 'Creamy', 'Crispy', 'Fresh', 'Braised', 'Sweet', 'Rustic']
+FOODS = ['Burger', 'Pierogi', 'Soup', 'Salad', 'Pasta', 'Risotto', 'Curry', 'Taco', 'Pizza', 'Stew', 'Pancake',
+         'Dumplings', 'Schnitzel', 'Ramen', 'Goulash']
+MENU_KINDS = ['Lunch', 'Dinner', 'Breakfast', 'Seasonal', 'Vegan', 'Kids', 'Chef', 'Weekend', 'Tasting', 'Street food']
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible synthetic catalogue for benchmarks: users, dishes, menus and menu-dish links, "
+        "with skewed authors, empty and very large menus."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--dishes', type=int, default=10000)
+        parser.add_argument('--menus', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--prefix', default='gen', help="Prefix of generated user names and menu names.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--mean-menu-size', type=float, default=12, help="Mean dishes of a regular menu.")
+        parser.add_argument('--empty-menus', type=float, default=0.1, help="Share of menus without dishes.")
+        parser.add_argument('--large-menus', type=float, default=0.01, help="Share of very large menus.")
+        parser.add_argument('--large-menu-size', type=int, default=1000)
+        parser.add_argument('--author-skew', type=float, default=1.2,
+                            help="Zipf exponent of authors: the n-th user writes ~1/n^skew of the catalogue.")
+        parser.add_argument('--days', type=int, default=30, help="Spread creation dates over the last N days.")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError("At least one user is needed to author the catalogue.")
+        self.options = options
+        self.batch_size = options['batch_size']
+        self.rng = random.Random(options['seed'])
+        prefix = options['prefix']
+        if get_user_model().objects.filter(username__startswith=f'{prefix}_user_').exists():
+            raise CommandError(f"Users prefixed '{prefix}_user_' already exist, pick another --prefix.")
+
+        start = time.monotonic()
+        user_ids = self.create_users(prefix)
+        dish_ids = self.create_dishes(user_ids)
+        menu_sizes = [self.menu_size(len(dish_ids)) for _ in range(options['menus'])]
+        menu_ids = self.create_menus(prefix, user_ids, menu_sizes)
+        links = self.create_links(menu_ids, menu_sizes, dish_ids)
+        self.spread_dates(Dish, dish_ids)
+        self.spread_dates(Menu, menu_ids)
+
+        self.timed("search index", lambda: get_search_backend().index(menu_ids))
+        invalidate_responses()
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(user_ids)} users, {len(dish_ids)} dishes, {len(menu_ids)} menus and {links} links "
+            f"in {time.monotonic() - start:.1f}s"
+        ))
+
+    def timed(self, label, create):
+        start = time.monotonic()
+        result = create()
+        if self.options['verbosity'] > 1:
+            self.stdout.write(f"{label}: {time.monotonic() - start:.2f}s")
+        return result
+
+    def insert(self, model, objects):
+        """Bulk insert ``objects`` in batches of ``--batch-size``, holding one batch at a time."""
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                model.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+
+    def insert_returning_ids(self, label, model, objects):
+        # Primary keys are read back, bulk_create only returns them on some databases.
+        with transaction.atomic():
+            last_pk = model.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+            self.timed(label, lambda: self.insert(model, objects))
+            return list(model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True))
+
+    def create_users(self, prefix):
+        User = get_user_model()
+        password = make_password('password')
+        return self.insert_returning_ids("users", User, (
+            User(username=f'{prefix}_user_{i}', email=f'{prefix}_user_{i}@example.com', password=password)
+            for i in range(self.options['users'])
+        ))
+
+    def authors(self, user_ids, count):
+        weights = [1 / rank ** self.options['author_skew'] for rank in range(1, len(user_ids) + 1)]
+        return self.rng.choices(user_ids, cum_weights=list(accumulate(weights)), k=count)
+
+    def create_dishes(self, user_ids):
+        count = self.options['dishes']
+        rng = self.rng
+        authors = self.authors(user_ids, count)
+
+        def dishes():
+            for i, author_id in enumerate(authors):
+                food = rng.choice(FOODS)
+                yield Dish(
+                    name=f"{rng.choice(ADJECTIVES)} {food} {i}",
+                    description=f"{food} made to a house recipe.",
+                    price=Decimal(f"{rng.lognormvariate(3, 0.5) + 0.01:.2f}"),
+                    prep_time=rng.randint(5, 120),
+                    is_vegetarian=rng.random() < 0.3,
+                    author_id=author_id,
+                )
+
+        return self.insert_returning_ids("dishes", Dish, dishes())
+
+    def menu_size(self, dishes):
+        roll = self.rng.random()
+        if roll < self.options['empty_menus'] or not dishes:
+            return 0
+        if roll < self.options['empty_menus'] + self.options['large_menus']:
+            return min(self.options['large_menu_size'], dishes)
+        mean = max(self.options['mean_menu_size'] - 1, 0.001)
+        return min(1 + int(self.rng.expovariate(1 / mean)), dishes)
+
+    def create_menus(self, prefix, user_ids, menu_sizes):
+        rng = self.rng
+        authors = self.authors(user_ids, len(menu_sizes))
+        menus = (
+            Menu(name=f"{prefix} {rng.choice(MENU_KINDS)} menu {i}", description="Generated menu",
+                 author_id=author_id, dishes_count=size)
+            for i, (author_id, size) in enumerate(zip(authors, menu_sizes))
+        )
+        return self.insert_returning_ids("menus", Menu, menus)
+
+    def create_links(self, menu_ids, menu_sizes, dish_ids):
+        through = Menu.dish.through
+
+        def links():
+            for menu_id, size in zip(menu_ids, menu_sizes):
+                for dish_id in self.rng.sample(dish_ids, size):
+                    yield through(menu_id=menu_id, dish_id=dish_id)
+
+        with transaction.atomic():
+            self.timed("menu dishes", lambda: self.insert(through, links()))
+        return sum(menu_sizes)
+
+    def spread_dates(self, model, ids):
+        """Give consecutive rows increasing creation dates over the last ``--days`` days, one UPDATE per day."""
+        if not ids:
+            return
+        days = max(self.options['days'], 1)
+        now = timezone.now()
+        chunk = -(-len(ids) // days)
+        with transaction.atomic():
+            for day, start in enumerate(range(0, len(ids), chunk)):
+                date = now - timedelta(days=days - day)
+                model.objects.filter(pk__gte=ids[start], pk__lte=ids[min(start + chunk, len(ids)) - 1]).update(
+                    created_at=date, updated_at=date)
@@ -0,0 +1,54 @@
+import json
+import os
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from menu.importer import IMPORTERS, READERS
+
+
+class Command(BaseCommand):
+    help = "Stream cards or dishes from a JSON, NDJSON or CSV file into the database in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path', help="File to read, '-' for standard input.")
+        parser.add_argument('--format', choices=sorted(READERS), help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--author', help="Username set as the author of rows without one.")
+        parser.add_argument('--max-errors', type=int, default=20, help="Number of invalid rows to print.")
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f"Unknown format {file_format!r}, use --format")
+
+        author = None
+        if options['author']:
+            try:
+                author = get_user_model().objects.get(username=options['author'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User {options['author']!r} does not exist")
+
+        importer = IMPORTERS[options['kind']](options['batch_size'], author)
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            imported, elapsed = importer.run(READERS[file_format](stream), self.report_progress)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for number, errors in importer.errors[:options['max_errors']]:
+            self.stderr.write(f"Row {number}: {json.dumps(errors)}")
+        rate = imported / elapsed if elapsed else imported
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} {options['kind']} in {elapsed:.2f}s ({rate:.0f} rows/s), "
+            f"skipped {len(importer.errors)} invalid rows"
+        ))
+
+    def report_progress(self, imported, elapsed):
+        if self.verbosity > 1:
+            self.stdout.write(f"{imported} rows ({imported / elapsed if elapsed else imported:.0f} rows/s)")
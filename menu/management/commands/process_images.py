@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from config.settings import IMAGE_WORKERS
+from menu.images import get_executor, run, run_pooled
+from menu.models import Dish
+
+
+class Command(BaseCommand):
+    help = "Store dimensions and generate resized variants of dish images, e.g. after import_menu."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Reprocess images that already have variants.")
+
+    def handle(self, *args, **options):
+        dishes = Dish.objects.exclude(image='')
+        if not options['all']:
+            dishes = dishes.filter(image_width__isnull=True)
+        dish_ids = list(dishes.order_by('pk').values_list('pk', flat=True))
+
+        results = get_executor().map(run_pooled, dish_ids) if IMAGE_WORKERS else map(run, dish_ids)
+        processed = sum(1 for result in results if result)
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} of {len(dish_ids)} dish images"))
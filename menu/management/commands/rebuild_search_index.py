@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from menu.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the card search index from menus and their dishes."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.index()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt search index with {type(backend).__name__}"))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from menu.models import Menu
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored Menu.dishes_count from the menu-dish join table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_pk = Menu.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+        repaired = 0
+        for start in range(0, last_pk, batch_size):
+            repaired += Menu.objects.filter(pk__gt=start, pk__lte=start + batch_size).refresh_dishes_count()
+        self.stdout.write(self.style.SUCCESS(f"Recomputed dishes_count of {repaired} menus"))
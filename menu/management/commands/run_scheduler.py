@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from menu.jobs import SchedulerLocked, create_scheduler, single_instance_lock
+
+
+class Command(BaseCommand):
+    help = "Run the periodic jobs (update email, expired sessions cleanup) in a dedicated worker process."
+
+    def handle(self, *args, **options):
+        try:
+            with single_instance_lock():
+                scheduler = create_scheduler()
+                self.stdout.write(self.style.SUCCESS("Scheduler started"))
+                try:
+                    scheduler.start()
+                except (KeyboardInterrupt, SystemExit):
+                    scheduler.shutdown()
+        except SchedulerLocked:
+            raise CommandError("Another scheduler instance is already running")
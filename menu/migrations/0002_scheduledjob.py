@@ -0,0 +1,21 @@
+# Generated by Django 3.2 on 2026-10-18 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledJob',
+            fields=[
+                ('id', models.CharField(max_length=191, primary_key=True, serialize=False)),
+                ('next_run_time', models.FloatField(db_index=True, null=True)),
+                ('job_state', models.BinaryField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 15:33
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_dishes_count(apps, schema_editor):
+    Menu = apps.get_model('menu', 'Menu')
+    dishes = Menu.dish.through.objects.filter(menu_id=OuterRef('pk')).order_by().values(
+        'menu_id').annotate(count=Count('pk')).values('count')
+    Menu.objects.update(dishes_count=Coalesce(Subquery(dishes), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0002_scheduledjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menu',
+            name='dishes_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(populate_dishes_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0003_menu_dishes_count'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='menu',
+            name='dishes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='dish',
+            index=models.Index(fields=['created_at', 'id'], name='dish_created_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dish',
+            index=models.Index(fields=['updated_at', 'id'], name='dish_updated_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['dishes_count', 'id'], name='menu_dishes_count_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['created_at', 'id'], name='menu_created_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='menu',
+            index=models.Index(fields=['updated_at', 'id'], name='menu_updated_at_id_idx'),
+        ),
+    ]
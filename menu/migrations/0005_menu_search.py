@@ -0,0 +1,60 @@
+# Generated by Django 3.2 on 2026-10-18 15:46
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from config.settings import SEARCH_CONFIG
+
+POSTGRES_POPULATE = """
+UPDATE menu_menu m SET search_vector =
+    setweight(to_tsvector(%(config)s::regconfig, COALESCE(m.name, '')), 'A')
+    || setweight(to_tsvector(%(config)s::regconfig, COALESCE(m.description, '')), 'B')
+    || setweight(to_tsvector(%(config)s::regconfig, COALESCE((
+        SELECT string_agg(d.name, ' ') FROM menu_menu_dish md JOIN menu_dish d ON d.id = md.dish_id
+        WHERE md.menu_id = m.id
+    ), '')), 'C')
+"""
+
+SQLITE_POPULATE = """
+INSERT INTO menu_menu_search (rowid, name, description, dishes)
+SELECT m.id, m.name, m.description, (
+    SELECT group_concat(d.name, ' ') FROM menu_menu_dish md JOIN menu_dish d ON d.id = md.dish_id
+    WHERE md.menu_id = m.id
+) FROM menu_menu m
+"""
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE INDEX IF NOT EXISTS menu_search_vector_idx ON menu_menu USING gin (search_vector)')
+        schema_editor.execute(POSTGRES_POPULATE, {'config': SEARCH_CONFIG})
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS menu_menu_search USING fts5(name, description, dishes)'
+        )
+        schema_editor.execute(SQLITE_POPULATE)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS menu_search_vector_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS menu_menu_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('menu', '0004_hot_column_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menu',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,225 @@
+from functools import partial
+from hashlib import md5
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import serializers, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from config.settings import FAST_LIST_SERIALIZATION, MAX_BULK_SIZE, RESPONSE_CACHE_TIMEOUT
+from menu.cache import invalidate_responses, response_cache, response_cache_key
+from menu.serializers import FastListSerializer
+
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer list and retrieve requests with 304 Not Modified when the client
+    already has the current representation.
+
+    List validators come from an aggregate query over the filtered queryset,
+    detail validators from the object, so a 304 never serializes anything.
+    """
+
+    def list(self, request, *args, **kwargs):
+        last_modified, count = self.get_list_last_modified(self.filter_queryset(self.get_queryset()))
+        render = partial(super().list, request, *args, **kwargs)
+        return self.conditional_response(request, f"{count}:{last_modified}", last_modified, render)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        last_modified = self.get_object_last_modified(instance)
+        render = partial(self.render_instance, instance)
+        return self.conditional_response(request, f"{instance.pk}:{last_modified}", last_modified, render)
+
+    def render_instance(self, instance):
+        return Response(self.get_serializer(instance).data)
+
+    def get_list_last_modified(self, queryset):
+        aggregate = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('pk'))
+        return aggregate['last_modified'], aggregate['count']
+
+    def get_object_last_modified(self, instance):
+        return instance.updated_at
+
+    def conditional_response(self, request, version, last_modified, render):
+        raw = f"{self.basename}:{request.accepted_renderer.format}:{version}"
+        etag = quote_etag(md5(raw.encode()).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if not_modified is not None:
+            return set_validators(not_modified, etag, timestamp)
+        return set_validators(render(), etag, timestamp)
+
+
+class AnonymousResponseCacheMixin:
+    """
+    Serve list and retrieve responses of anonymous users from the response cache.
+
+    Keys are versioned, writes to menus and dishes bump the version
+    (see ``menu.signals``), so stale entries are never read. Responses are
+    not cached when ``RESPONSE_CACHE_ALIAS`` is a per-process ``LocMemCache``,
+    the version bump would not reach other processes.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = response_cache()
+        if cache is None or request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        key = response_cache_key(cache, request, self)
+        cached = cache.get(key)
+        if cached is not None:
+            data, headers = cached
+            response = Response(data, headers=headers)
+            last_modified = parse_http_date_safe(headers.get('Last-Modified', ''))
+            return get_conditional_response(request, headers.get('ETag'), last_modified, response)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            headers = {header: response[header] for header in VALIDATOR_HEADERS if response.has_header(header)}
+            cache.set(key, (response.data, headers), RESPONSE_CACHE_TIMEOUT)
+        return response
+
+
+class FastListMixin:
+    """
+    Serve list actions from ``.values()`` rows through ``FastListSerializer``
+    when ``FAST_LIST_SERIALIZATION`` is enabled.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not FAST_LIST_SERIALIZATION:
+            return super().list(request, *args, **kwargs)
+
+        serializer = FastListSerializer(self.get_serializer_class(), self.get_serializer_context())
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        pk_name = queryset.model._meta.pk.attname
+        ordering = [
+            pk_name if field.lstrip('-') == 'pk' else field.lstrip('-')
+            for field in queryset.query.order_by
+            if isinstance(field, str)
+        ]
+        rows = queryset.values(*dict.fromkeys(serializer.value_fields + ordering + [pk_name]))
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation(page))
+        return Response(serializer.to_representation(rows))
+
+
+class BulkModelMixin:
+    """
+    List-body POST, PATCH and DELETE on the list route (see ``menu.routers``).
+
+    All items are validated and permission-checked before anything is written,
+    writes use bulk queries in one transaction. When any item fails nothing is
+    written and the response holds one error entry per item, in request order.
+    """
+    bulk_max_size = MAX_BULK_SIZE
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+
+        items = self.get_bulk_items(request)
+        serializer = self.get_serializer(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            self.perform_bulk_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, request, *args, **kwargs):
+        items = self.get_bulk_items(request)
+        ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+        instances, errors = self.get_bulk_objects(request, ids)
+        if any(errors):
+            raise ValidationError(errors)
+
+        serializer = self.get_serializer(instances, data=items, many=True, partial=True)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            self.perform_bulk_update(serializer)
+        return Response(serializer.data)
+
+    def bulk_destroy(self, request, *args, **kwargs):
+        items = self.get_bulk_items(request)
+        ids = [item.get('id') if isinstance(item, dict) else item for item in items]
+        instances, errors = self.get_bulk_objects(request, ids)
+        if any(errors):
+            raise ValidationError(errors)
+
+        with transaction.atomic():
+            self.perform_bulk_destroy(instances)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def get_bulk_items(self, request):
+        if not isinstance(request.data, list):
+            message = serializers.ListSerializer.default_error_messages['not_a_list'].format(
+                input_type=type(request.data).__name__
+            )
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]})
+        if len(request.data) > self.bulk_max_size:
+            message = f"Ensure this list has no more than {self.bulk_max_size} items."
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [message]})
+        return request.data
+
+    def get_bulk_objects(self, request, ids):
+        """
+        Load the objects of ``ids`` in one query and check object permissions
+        of each. Returns the objects and the per-item errors, both in ``ids`` order.
+        """
+        valid_ids = {pk for pk in ids if isinstance(pk, int) and not isinstance(pk, bool)}
+        objects = self.filter_queryset(self.get_queryset()).prefetch_related(None).in_bulk(valid_ids)
+
+        instances, errors, seen = [], [], set()
+        for pk in ids:
+            instance = objects.get(pk) if pk in valid_ids else None
+            if pk not in valid_ids:
+                error = {'id': ['A valid integer is required.']}
+            elif instance is None:
+                error = {'id': ['Not found.']}
+            elif pk in seen:
+                error = {'id': ['Duplicate id.']}
+            elif not self.has_bulk_object_permission(request, instance):
+                error = {'id': ['You do not have permission to perform this action.']}
+            else:
+                error = {}
+            seen.add(pk)
+            instances.append(instance)
+            errors.append(error)
+        return instances, errors
+
+    def has_bulk_object_permission(self, request, obj):
+        return all(permission.has_object_permission(request, self, obj) for permission in self.get_permissions())
+
+    def perform_bulk_create(self, serializer):
+        serializer.save()
+        invalidate_responses()
+
+    def perform_bulk_update(self, serializer):
+        serializer.save()
+        invalidate_responses()
+
+    def perform_bulk_destroy(self, instances):
+        self.get_queryset().model.objects.filter(pk__in=[instance.pk for instance in instances]).delete()
+        invalidate_responses()
@@ -1,8 +1,23 @@
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinLengthValidator, MinValueValidator
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+class MenuQuerySet(models.QuerySet):
+    def refresh_dishes_count(self, touch=False):
+        """Recompute dishes_count; with ``touch`` also mark the menus as updated now."""
+        dishes = Menu.dish.through.objects.filter(menu_id=OuterRef('pk')).order_by().values(
+            'menu_id').annotate(count=Count('pk')).values('count')
+        fields = {'dishes_count': Coalesce(Subquery(dishes), 0)}
+        if touch:
+            fields['updated_at'] = timezone.now()
+        return self.update(**fields)
 
 
 class Menu(models.Model):
@@ -12,6 +27,18 @@ class Menu(models.Model):
     description = models.TextField(max_length=1500)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    dishes_count = models.PositiveIntegerField(default=0, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = MenuQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['dishes_count', 'id'], name='menu_dishes_count_id_idx'),
+            models.Index(fields=['created_at', 'id'], name='menu_created_at_id_idx'),
+            # Also covers Max(updated_at) and Count(id) of the list validators, an index-only scan.
+            models.Index(fields=['updated_at', 'id'], name='menu_updated_at_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -27,6 +54,26 @@ class Dish(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_vegetarian = models.BooleanField()
     image = models.ImageField(upload_to='photos/', blank=True)
+    # Filled by menu.images off the request path, so the file is never reopened to read them.
+    image_width = models.PositiveIntegerField(null=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, editable=False)
+    image_variants = models.JSONField(default=dict, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='dish_created_at_id_idx'),
+            # Also covers Max(updated_at) and Count(id) of the list validators, an index-only scan.
+            models.Index(fields=['updated_at', 'id'], name='dish_updated_at_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
+
+
+class ScheduledJob(models.Model):
+    id = models.CharField(max_length=191, primary_key=True)
+    next_run_time = models.FloatField(null=True, db_index=True)
+    job_state = models.BinaryField()
+
+    def __str__(self):
+        return self.id
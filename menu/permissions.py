@@ -1,15 +1,82 @@
+from collections import namedtuple
+
 from rest_framework.permissions import SAFE_METHODS, IsAuthenticatedOrReadOnly, IsAuthenticated
 
+from config.settings import PERMISSIONS_CACHE_TIMEOUT
+from menu.cache import shared_cache
+
+PermissionSnapshot = namedtuple('PermissionSnapshot', ['user_permissions', 'permissions'])
+
+ANONYMOUS_SNAPSHOT = PermissionSnapshot(frozenset(), frozenset())
+
+PERMISSIONS_VERSION_KEY = 'menu:permissions:version'
+
+
+def permissions_cache_key(cache, user_pk):
+    # v2: snapshots without is_staff / is_superuser, cached entries of the old shape are not read.
+    return f"menu:permissions:v2:{cache.get_or_set(PERMISSIONS_VERSION_KEY, 1, None)}:{user_pk}"
+
+
+def invalidate_user_permissions(user_pk):
+    cache = shared_cache()
+    if cache is not None:
+        cache.delete(permissions_cache_key(cache, user_pk))
+
+
+def invalidate_all_permissions():
+    cache = shared_cache()
+    if cache is None:
+        return
+    try:
+        cache.incr(PERMISSIONS_VERSION_KEY)
+    except ValueError:
+        cache.set(PERMISSIONS_VERSION_KEY, 2, None)
+
+
+def load_permission_snapshot(user):
+    if not getattr(user, 'is_authenticated', False):
+        return ANONYMOUS_SNAPSHOT
+
+    snapshot = None
+    # Only cached in a cache shared by all processes, invalidations must reach every copy of the snapshot.
+    cache = shared_cache()
+    if cache is not None:
+        key = permissions_cache_key(cache, user.pk)
+        snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = PermissionSnapshot(
+            frozenset(user.get_user_permissions()),
+            frozenset(user.get_all_permissions()),
+        )
+        if cache is not None:
+            cache.set(key, snapshot, PERMISSIONS_CACHE_TIMEOUT)
+    return snapshot
+
+
+def get_permission_snapshot(request):
+    """Permission snapshot of the request user, loaded once per request."""
+    snapshot = getattr(request, '_permission_snapshot', None)
+    if snapshot is None:
+        snapshot = load_permission_snapshot(request.user)
+        request._permission_snapshot = snapshot
+    return snapshot
+
+
+def is_owner_or_staff_or_admin(request, obj):
+    # The flags are loaded with the user, a cached copy would keep write access of demoted staff.
+    user = request.user
+    return obj.author_id == getattr(user, 'pk', None) or user.is_staff or user.is_superuser
+
 
 class IsOwnerOrStaffOrAdminOrReadOnly(IsAuthenticatedOrReadOnly):
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
             return True
 
-        return obj.author == request.user or request.user.is_staff or request.user.is_superuser
+        return is_owner_or_staff_or_admin(request, obj)
 
 
 class IsOwnerOrStaffOrAdmin(IsAuthenticated):
 
     def has_object_permission(self, request, view, obj):
-        return obj.author == request.user or request.user.is_staff or request.user.is_superuser
+        return is_owner_or_staff_or_admin(request, obj)
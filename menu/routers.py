@@ -0,0 +1,13 @@
+from rest_framework.routers import DefaultRouter, Route
+
+
+class BulkRouter(DefaultRouter):
+    """
+    Default router that also maps list-body PATCH and DELETE on list URLs to the
+    ``bulk_update`` and ``bulk_destroy`` actions of viewsets which define them.
+    """
+    routes = [
+        route._replace(mapping={**route.mapping, 'patch': 'bulk_update', 'delete': 'bulk_destroy'})
+        if isinstance(route, Route) and route.mapping.get('get') == 'list' else route
+        for route in DefaultRouter.routes
+    ]
@@ -0,0 +1,163 @@
+import re
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, FloatField, OuterRef, Subquery, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from django.utils.module_loading import import_string
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from config.settings import SEARCH_BACKEND, SEARCH_CONFIG
+from menu.models import Menu
+
+RANK_FIELD = 'search_rank'
+
+
+def search_terms(text):
+    return re.findall(r'\w+', text)
+
+
+class BaseSearchBackend:
+    """
+    Full text search over menu names, descriptions and the names of their dishes.
+
+    ``search`` filters a menu queryset and annotates it with ``search_rank``,
+    ``index`` and ``remove`` keep the search index in sync (see ``menu.signals``).
+    """
+
+    def search(self, queryset, terms):
+        raise NotImplementedError
+
+    def index(self, menu_ids=None):
+        pass
+
+    def remove(self, menu_ids):
+        pass
+
+
+class LikeSearchBackend(BaseSearchBackend):
+    """Substring match on the menu name, for databases without a full text index."""
+
+    def search(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(name__icontains=term)
+        return queryset.annotate(**{RANK_FIELD: Value(1.0, output_field=FloatField())})
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Prefix search on the GIN-indexed ``Menu.search_vector``, ranked with ``ts_rank``.
+
+    The vector weights the menu name (A) over its description (B) and dish names (C).
+    """
+
+    def query(self, terms):
+        return SearchQuery(' & '.join(f'{term}:*' for term in terms), config=SEARCH_CONFIG, search_type='raw')
+
+    def search(self, queryset, terms):
+        query = self.query(terms)
+        # ts_rank returns a float4, a float8 rank round-trips exactly through the JSON cursor of KeysetPagination.
+        rank = Cast(SearchRank(F('search_vector'), query), FloatField())
+        return queryset.filter(search_vector=query).annotate(**{RANK_FIELD: rank})
+
+    def vector(self):
+        dish_names = Menu.dish.through.objects.filter(menu_id=OuterRef('pk')).order_by().values(
+            'menu_id').annotate(names=StringAgg('dish__name', ' ')).values('names')
+        return (
+            SearchVector('name', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('description', weight='B', config=SEARCH_CONFIG)
+            + SearchVector(Subquery(dish_names), weight='C', config=SEARCH_CONFIG)
+        )
+
+    def index(self, menu_ids=None):
+        menus = Menu.objects.all() if menu_ids is None else Menu.objects.filter(pk__in=menu_ids)
+        menus.update(search_vector=self.vector())
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    Prefix search on the FTS5 table ``menu_menu_search`` keyed by menu id, ranked with ``bm25``.
+
+    Lets local runs and tests exercise the same API as the PostgreSQL backend.
+    """
+    table = 'menu_menu_search'
+    weights = (10.0, 4.0, 1.0)
+    batch_size = 500
+
+    def query(self, terms):
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def search(self, queryset, terms):
+        query = self.query(terms)
+        matches = RawSQL(f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [query])
+        weights = ', '.join(str(weight) for weight in self.weights)
+        rank = RawSQL(
+            f'SELECT -bm25({self.table}, {weights}) FROM {self.table} '
+            f'WHERE {self.table} MATCH %s AND rowid = "{Menu._meta.db_table}"."id"',
+            [query],
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=matches).annotate(**{RANK_FIELD: rank})
+
+    @property
+    def insert_sql(self):
+        through = Menu.dish.through._meta.db_table
+        return (
+            f'INSERT INTO {self.table} (rowid, name, description, dishes) '
+            f'SELECT m.id, m.name, m.description, ('
+            f'SELECT group_concat(d.name, \' \') FROM {through} md '
+            f'JOIN {Menu.dish.field.related_model._meta.db_table} d ON d.id = md.dish_id WHERE md.menu_id = m.id'
+            f') FROM {Menu._meta.db_table} m'
+        )
+
+    def index(self, menu_ids=None):
+        with connection.cursor() as cursor:
+            if menu_ids is None:
+                cursor.execute(f'DELETE FROM {self.table}')
+                cursor.execute(self.insert_sql)
+                return
+            menu_ids = list(menu_ids)
+            for start in range(0, len(menu_ids), self.batch_size):
+                batch = menu_ids[start:start + self.batch_size]
+                placeholders = ', '.join(['%s'] * len(batch))
+                cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', batch)
+                cursor.execute(f'{self.insert_sql} WHERE m.id IN ({placeholders})', batch)
+
+    def remove(self, menu_ids):
+        menu_ids = list(menu_ids)
+        with connection.cursor() as cursor:
+            for start in range(0, len(menu_ids), self.batch_size):
+                batch = menu_ids[start:start + self.batch_size]
+                placeholders = ', '.join(['%s'] * len(batch))
+                cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', batch)
+
+
+SEARCH_BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_search_backend():
+    if SEARCH_BACKEND:
+        return import_string(SEARCH_BACKEND)()
+    return SEARCH_BACKENDS.get(connection.vendor, LikeSearchBackend)()
+
+
+class MenuSearchFilter(SearchFilter):
+    """
+    Search cards through the configured search backend. Unless the request asks
+    for an explicit ``ordering``, results come best match first.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = search_terms(request.query_params.get(self.search_param, ''))
+        if not terms:
+            return queryset
+
+        queryset = get_search_backend().search(queryset, terms)
+        if OrderingFilter.ordering_param not in request.query_params:
+            queryset = queryset.order_by('-' + RANK_FIELD, 'pk')
+        return queryset
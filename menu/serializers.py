@@ -1,33 +1,245 @@
+from copy import deepcopy
+
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connection, transaction
+from django.utils import timezone
 from rest_framework import serializers
 
+from config.metrics import measures_serialization
+from config.settings import IMAGE_TYPES, MAX_BULK_SIZE
+from menu.cache import invalidate_responses
 from menu.models import Menu, Dish
+from menu.search import get_search_backend
 
 
-class MenuSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Menu
-        exclude = ("author", )
-        read_only_fields = ('created_at', 'updated_at')
+class CachedFieldsMixin:
+    """
+    Build the model serializer fields once per class.
+
+    Every instance gets a deep copy of the cached, unbound fields instead of
+    introspecting the model again.
+    """
+
+    def get_fields(self):
+        cls = type(self)
+        fields = cls.__dict__.get('_cached_fields')
+        if fields is None:
+            fields = super().get_fields()
+            cls._cached_fields = fields
+        return deepcopy(fields)
+
+    @measures_serialization
+    def to_representation(self, instance):
+        return super().to_representation(instance)
 
-    def __init__(self, *args, **kwargs):
-        super(MenuSerializer, self).__init__(*args, **kwargs)
+
+class ImageVariantsField(serializers.Field):
+    """Absolute URLs of the resized variants of an image (see ``menu.images``) by variant name."""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        storage = Dish._meta.get_field('image').storage
         request = self.context.get('request')
-        if request and request.method == 'GET':
-            self.Meta.depth = 1
+        urls = {}
+        for variant, name in value.items():
+            url = storage.url(name)
+            urls[variant] = request.build_absolute_uri(url) if request is not None else url
+        return urls
+
+
+class DishListSerializer(serializers.ListSerializer):
+    """Create and update many dishes with bulk queries."""
+    batch_size = 500
+
+    def create(self, validated_data):
+        author = self.context["request"].user
+        dishes = [Dish(**item, author=author) for item in validated_data]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Dish.objects.bulk_create(dishes, batch_size=self.batch_size)
         else:
-            self.Meta.depth = 0
+            # Primary keys of bulk inserted rows are only known with RETURNING.
+            for dish in dishes:
+                dish.save(force_insert=True)
+        return dishes
+
+    def update(self, instances, validated_data):
+        now = timezone.now()
+        fields = {'updated_at'}
+        for instance, item in zip(instances, validated_data):
+            for attr, value in item.items():
+                setattr(instance, attr, value)
+            instance.updated_at = now
+            fields.update(item)
+        Dish.objects.bulk_update(instances, fields, batch_size=self.batch_size)
+        return instances
+
+
+class DishSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
+    class Meta:
+        model = Dish
+        fields = ('id', 'name', 'description', 'price', 'prep_time', 'is_vegetarian', 'image', 'image_width',
+                  'image_height', 'image_variants')
+        list_serializer_class = DishListSerializer
+
+    def validate_image(self, value):
+        # The image field sets content_type from the format detected by Pillow, not from the request.
+        if isinstance(value, UploadedFile) and value.content_type not in IMAGE_TYPES:
+            raise serializers.ValidationError(f"Unsupported image type, allowed types: {', '.join(IMAGE_TYPES)}.")
+        return value
 
     def create(self, validated_data):
         validated_data["author"] = self.context["request"].user
         return super().create(validated_data)
 
 
-class DishSerializer(serializers.ModelSerializer):
+class MenuDishSerializer(DishSerializer):
+
+    class Meta(DishSerializer.Meta):
+        fields = ('id', 'name', 'description', 'price', 'prep_time', 'created_at', 'updated_at', 'is_vegetarian',
+                  'image', 'image_width', 'image_height', 'image_variants', 'author')
+        read_only_fields = fields
 
+
+class MenuSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     class Meta:
-        model = Dish
-        fields = ('id', 'name', 'description', 'price', 'prep_time', 'is_vegetarian', 'image')
+        model = Menu
+        exclude = ("author", "dishes_count", "search_vector")
+        read_only_fields = ('created_at', 'updated_at')
 
     def create(self, validated_data):
         validated_data["author"] = self.context["request"].user
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+
+class MenuReadSerializer(CachedFieldsMixin, serializers.ModelSerializer):
+    dish = MenuDishSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Menu
+        fields = ('id', 'name', 'description', 'created_at', 'updated_at', 'dish')
+        read_only_fields = fields
+
+
+class MenuDishesSerializer(serializers.Serializer):
+    """
+    Add, remove or set the dishes of a menu.
+
+    The change is diffed against the join table and applied with one bulk
+    INSERT and one DELETE, so the number of queries does not grow with the
+    number of dishes.
+    """
+    action = serializers.ChoiceField(choices=('add', 'remove', 'set'))
+    dishes = serializers.ListField(child=serializers.IntegerField(), max_length=MAX_BULK_SIZE)
+
+    def validate_dishes(self, value):
+        dish_ids = set(value)
+        missing = dish_ids - set(Dish.objects.filter(pk__in=dish_ids).values_list('pk', flat=True))
+        if missing:
+            raise serializers.ValidationError([f'Invalid pk "{pk}" - object does not exist.' for pk in sorted(missing)])
+        return dish_ids
+
+    def update(self, instance, validated_data):
+        through = Menu.dish.through
+        action, dish_ids = validated_data['action'], validated_data['dishes']
+        with transaction.atomic():
+            list(Menu.objects.select_for_update().filter(pk=instance.pk).values_list('pk'))
+            existing = set(through.objects.filter(menu_id=instance.pk).values_list('dish_id', flat=True))
+            if action == 'remove':
+                self.added, self.removed = set(), existing & dish_ids
+            else:
+                self.added = dish_ids - existing
+                self.removed = existing - dish_ids if action == 'set' else set()
+
+            if self.removed:
+                through.objects.filter(menu_id=instance.pk, dish_id__in=self.removed).delete()
+            if self.added:
+                through.objects.bulk_create(through(menu_id=instance.pk, dish_id=pk) for pk in sorted(self.added))
+            if self.added or self.removed:
+                Menu.objects.filter(pk=instance.pk).refresh_dishes_count(touch=True)
+                get_search_backend().index([instance.pk])
+                invalidate_responses()
+        instance.refresh_from_db(fields=['dishes_count', 'updated_at'])
+        return instance
+
+    def to_representation(self, instance):
+        return {
+            'dishes_count': instance.dishes_count,
+            'added': sorted(self.added),
+            'removed': sorted(self.removed),
+        }
+
+
+class FastListSerializer:
+    """
+    Read-only representation of ``.values()`` rows using the fields of a model
+    serializer, without instantiating models or serializers per object.
+
+    Nested many-to-many serializers are filled from one query over the
+    join table. The output is the same as ``serializer_class(many=True).data``.
+    """
+
+    def __init__(self, serializer_class, context):
+        serializer = serializer_class(context=context)
+        self.model = serializer.Meta.model
+        self.request = context.get('request')
+        self.fields = [field for field in serializer.fields.values() if not field.write_only]
+        self.nested = {
+            field.source: FastListSerializer(type(field.child), context)
+            for field in self.fields
+            if isinstance(field, serializers.ListSerializer)
+        }
+
+    @property
+    def value_fields(self):
+        return [field.source for field in self.fields if field.source not in self.nested]
+
+    def represent(self, field, value):
+        if value is None or isinstance(field, serializers.PrimaryKeyRelatedField):
+            return value
+        if isinstance(field, serializers.FileField):
+            if not value:
+                return None
+            url = self.model._meta.get_field(field.source).storage.url(value)
+            return self.request.build_absolute_uri(url) if self.request is not None else url
+        return field.to_representation(value)
+
+    def nested_rows(self, source, parent_ids):
+        model_field = self.model._meta.get_field(source)
+        through = model_field.remote_field.through
+        parent_column = model_field.m2m_field_name()
+        child_column = model_field.m2m_reverse_field_name()
+        columns = [f'{child_column}__{name}' for name in self.nested[source].value_fields]
+
+        grouped = {parent_id: [] for parent_id in parent_ids}
+        rows = through.objects.filter(**{f'{parent_column}__in': parent_ids}).order_by(
+            child_column).values_list(parent_column, *columns)
+        for parent_id, *values in rows:
+            grouped[parent_id].append(dict(zip(self.nested[source].value_fields, values)))
+        return grouped
+
+    @measures_serialization
+    def to_representation(self, rows):
+        rows = list(rows)
+        nested = {}
+        if self.nested:
+            parent_ids = [row[self.model._meta.pk.attname] for row in rows]
+            nested = {source: self.nested_rows(source, parent_ids) for source in self.nested}
+
+        data = []
+        for row in rows:
+            item = {}
+            for field in self.fields:
+                if field.source in nested:
+                    child = self.nested[field.source]
+                    item[field.field_name] = child.to_representation(
+                        nested[field.source][row[self.model._meta.pk.attname]]
+                    )
+                else:
+                    item[field.field_name] = self.represent(field, row[field.source])
+            data.append(item)
+        return data
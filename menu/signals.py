@@ -0,0 +1,153 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from menu import images
+from menu.authentication import invalidate_session_user, invalidate_token, invalidate_user_tokens
+from menu.cache import invalidate_responses
+from menu.models import Dish, Menu
+from menu.permissions import invalidate_all_permissions, invalidate_user_permissions
+from menu.search import get_search_backend
+
+User = get_user_model()
+
+# Set while dishes are deleted in bulk by a caller doing the work of their delete signals once for all of them.
+_bulk_dish_delete = ContextVar('bulk_dish_delete', default=False)
+
+
+@contextmanager
+def bulk_dish_delete():
+    """Skip the per-dish work of dish delete signals: responses, dishes counts and the search index."""
+    token = _bulk_dish_delete.set(True)
+    try:
+        yield
+    finally:
+        _bulk_dish_delete.reset(token)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_user_permissions(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    # Logins only write last_login, which authentication does not look at.
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    invalidate_user_tokens(instance.pk)
+    invalidate_session_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_session_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_token(instance.key)
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=User.groups.through)
+def user_relations_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_user_permissions(instance.pk)
+    elif pk_set is None:
+        invalidate_all_permissions()
+    else:
+        for user_pk in pk_set:
+            invalidate_user_permissions(user_pk)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_all_permissions()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def permission_source_deleted(sender, **kwargs):
+    invalidate_all_permissions()
+
+
+@receiver(post_save, sender=Menu)
+@receiver(post_delete, sender=Menu)
+@receiver(post_save, sender=Dish)
+@receiver(post_delete, sender=Dish)
+def catalogue_changed(sender, **kwargs):
+    if not _bulk_dish_delete.get():
+        invalidate_responses()
+
+
+@receiver(post_save, sender=Menu)
+def menu_saved(sender, instance, **kwargs):
+    get_search_backend().index([instance.pk])
+
+
+@receiver(post_delete, sender=Menu)
+def menu_deleted(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+@receiver(pre_save, sender=Dish)
+def dish_saving(sender, instance, **kwargs):
+    # An uncommitted file is a new upload, the variants of the previous image no longer apply.
+    instance._image_changed = bool(instance.image) and not instance.image._committed
+    if instance._image_changed or (not instance.image and instance.image_variants):
+        instance.image_width = instance.image_height = None
+        instance.image_variants = {}
+
+
+@receiver(post_save, sender=Dish)
+def dish_saved(sender, instance, created, **kwargs):
+    if instance.__dict__.pop('_image_changed', False):
+        images.schedule(instance.pk)
+    if not created:
+        menu_ids = Menu.dish.through.objects.filter(dish_id=instance.pk).values_list('menu_id', flat=True)
+        get_search_backend().index(list(menu_ids))
+
+
+@receiver(m2m_changed, sender=Menu.dish.through)
+def menu_dishes_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and reverse:
+        instance._cleared_menu_ids = list(instance.menu.values_list('pk', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear') or pk_set == set():
+        return
+
+    invalidate_responses()
+
+    if not reverse:
+        menu_ids = [instance.pk]
+    elif action == 'post_clear':
+        menu_ids = instance.__dict__.pop('_cleared_menu_ids', [])
+    else:
+        menu_ids = list(pk_set)
+    Menu.objects.filter(pk__in=menu_ids).refresh_dishes_count(touch=True)
+    get_search_backend().index(menu_ids)
+    if not reverse:
+        instance.refresh_from_db(fields=['dishes_count', 'updated_at'])
+
+
+@receiver(pre_delete, sender=Dish)
+def dish_deleting(sender, instance, **kwargs):
+    if not _bulk_dish_delete.get():
+        instance._menu_ids = list(instance.menu.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Dish)
+def dish_deleted(sender, instance, **kwargs):
+    menu_ids = instance.__dict__.pop('_menu_ids', [])
+    if menu_ids:
+        Menu.objects.filter(pk__in=menu_ids).refresh_dishes_count(touch=True)
+        get_search_backend().index(menu_ids)
@@ -0,0 +1,72 @@
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.views.static import serve
+
+TEMP_DIR = '.uploads'
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+def is_content_addressed(name):
+    return HASHED_NAME.search(name) is not None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Store files under the SHA-256 of their content, ``<dir>/ab/abcd....ext``.
+
+    Uploads are hashed while they are streamed to a temporary file, saving
+    content that is already stored only refreshes the existing file. Files are
+    never overwritten, so their URLs can be cached forever. Nothing is deleted
+    here and files keep no reference counts: ``manage.py collect_media``
+    removes files no dish refers to, a mark and sweep over the dishes and the
+    media directory.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name depends on the content, not on what is already stored.
+        return name
+
+    def hashed_name(self, name, digest):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, digest[:2], digest + extension)
+
+    def _save(self, name, content):
+        temp_dir = self.path(TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    file.write(chunk)
+
+            name = self.hashed_name(name, digest.hexdigest())
+            path = self.path(name)
+            if os.path.exists(path):
+                # Restart the grace period of collect_media for a file that is referenced again.
+                os.utime(path)
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.chmod(temp_path, self.file_permissions_mode or 0o644)
+                os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name.replace('\\', '/')
+
+
+def serve_media(request, path, document_root=None, show_indexes=False):
+    """``django.views.static.serve`` that lets clients cache content-addressed files forever."""
+    response = serve(request, path, document_root=document_root, show_indexes=show_indexes)
+    if response.status_code == 200 and is_content_addressed(path):
+        response['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return response
@@ -0,0 +1,96 @@
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from menu.models import Dish, Menu
+
+client = Client()
+
+
+def create_catalogue(test):
+    test.user = get_user_model().objects.create_user(username="test", password="test")
+    test.dish = Dish.objects.create(
+        name="Test Meat Dish 1", description="Test meat description 1", price="10.50", prep_time=60,
+        is_vegetarian=False, author=test.user,
+    )
+    test.menu = Menu.objects.create(name="Test Menu 1", description="Test menu description 1", author=test.user)
+    test.menu.dish.add(test.dish)
+
+
+class AsyncViewsTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        create_catalogue(self)
+
+    def assertSameResponse(self, sync_url, async_url):
+        expected = client.get(sync_url)
+        response = client.get(async_url)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content.replace(sync_url.encode(), async_url.encode()))
+        self.assertEqual(response["Content-Type"], expected["Content-Type"])
+        self.assertEqual(response.get("ETag"), expected.get("ETag"))
+        return response
+
+    def test_card_list(self):
+        self.assertSameResponse(reverse("menu:cards-list"), reverse("menu:async-cards-list"))
+
+    def test_card_detail(self):
+        self.assertSameResponse(
+            reverse("menu:cards-detail", kwargs={"pk": self.menu.pk}),
+            reverse("menu:async-cards-detail", kwargs={"pk": self.menu.pk}),
+        )
+
+    def test_dish_list(self):
+        client.login(username="test", password="test")
+        self.assertSameResponse(reverse("menu:dishes-list"), reverse("menu:async-dishes-list"))
+
+    def test_dish_detail(self):
+        client.login(username="test", password="test")
+        self.assertSameResponse(
+            reverse("menu:dishes-detail", kwargs={"pk": self.dish.pk}),
+            reverse("menu:async-dishes-detail", kwargs={"pk": self.dish.pk}),
+        )
+
+    def test_dishes_not_logged_user(self):
+        response = client.get(reverse("menu:async-dishes-list"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_card_not_found(self):
+        response = client.get(reverse("menu:async-cards-detail", kwargs={"pk": 0}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_not_modified(self):
+        url = reverse("menu:async-cards-detail", kwargs={"pk": self.menu.pk})
+        etag = client.get(url)["ETag"]
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+    def test_read_only(self):
+        client.login(username="test", password="test")
+        response = client.delete(reverse("menu:async-cards-detail", kwargs={"pk": self.menu.pk}))
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+class AsyncViewsASGITest(TransactionTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        create_catalogue(self)
+
+    def test_card_list(self):
+        response = async_to_sync(AsyncClient().get)(reverse("menu:async-cards-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([menu["id"] for menu in response.json()["results"]], [self.menu.pk])
+
+    def test_dish_detail_with_token(self):
+        token = Token.objects.create(user=self.user)
+        response = async_to_sync(AsyncClient().get)(
+            reverse("menu:async-dishes-detail", kwargs={"pk": self.dish.pk}),
+            AUTHORIZATION=f"Token {token.key}",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["name"], "Test Meat Dish 1")
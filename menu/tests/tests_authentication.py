@@ -0,0 +1,214 @@
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from menu.authentication import (
+    CachedTokenAuthentication,
+    LRUCache,
+    get_session_user,
+    local_tokens,
+    shared_cache,
+)
+from menu.checks import session_cache_check
+
+
+class SharedCacheTestMixin:
+    """Run the test with a file based default cache, shared by every ``process_cache()`` like by processes."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir, True)
+        patcher = patch("menu.authentication.shared_cache", return_value=self.process_cache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def process_cache(self):
+        return FileBasedCache(self.cache_dir, {})
+
+
+class CachedTokenAuthenticationTest(SharedCacheTestMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        local_tokens.clear()
+        self.user = get_user_model().objects.create_user(username="test", password="test")
+        self.token = Token.objects.create(user=self.user)
+        self.factory = RequestFactory()
+
+    def authenticate(self, key=None):
+        request = self.factory.get("/", HTTP_AUTHORIZATION=f"Token {key or self.token.key}")
+        with CaptureQueriesContext(connection) as queries:
+            user, token = CachedTokenAuthentication().authenticate(request)
+        return user, token, len(queries)
+
+    def test_cached_lookup_runs_no_queries(self):
+        user, token, first = self.authenticate()
+        self.assertEqual(first, 1)
+        self.assertEqual((user.pk, token.key), (self.user.pk, self.token.key))
+
+        user, token, second = self.authenticate()
+        self.assertEqual(second, 0)
+        self.assertEqual((user.pk, token.key), (self.user.pk, self.token.key))
+
+    def test_shared_cache_serves_other_processes(self):
+        self.authenticate()
+        local_tokens.clear()
+        user, token, queries = self.authenticate()
+        self.assertEqual(queries, 0)
+        self.assertEqual(user.username, "test")
+
+    def test_unknown_token_is_not_cached(self):
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate("unknown")
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate("unknown")
+
+    def test_deleted_token_is_rejected(self):
+        self.authenticate()
+        self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_login_keeps_token_cached(self):
+        self.authenticate()
+        Client().login(username="test", password="test")
+        self.assertEqual(self.authenticate()[2], 0)
+
+    def test_logout_revokes_token(self):
+        client = Client()
+        headers = {"HTTP_AUTHORIZATION": f"Token {self.token.key}"}
+        self.assertEqual(client.get(reverse("menu:dishes-list"), **headers).status_code, status.HTTP_200_OK)
+
+        response = client.post(reverse("rest_logout"), **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+
+        # SessionAuthentication comes first in DEFAULT_AUTHENTICATION_CLASSES, DRF answers 403 instead of 401.
+        response = client.get(reverse("menu:dishes-list"), **headers)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_logout_revokes_token_in_other_processes(self):
+        other_process = self.process_cache()
+        with patch("menu.authentication.shared_cache", return_value=other_process):
+            self.authenticate()
+
+        headers = {"HTTP_AUTHORIZATION": f"Token {self.token.key}"}
+        self.assertEqual(Client().post(reverse("rest_logout"), **headers).status_code, status.HTTP_200_OK)
+
+        # The other process no longer has the token in its LRU, after TOKEN_LOCAL_CACHE_TIMEOUT.
+        local_tokens.clear()
+        with patch("menu.authentication.shared_cache", return_value=other_process):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate()
+
+
+class ProcessLocalCacheTest(TestCase):
+    def setUp(self) -> None:
+        local_tokens.clear()
+        self.token = Token.objects.create(user=get_user_model().objects.create_user(username="test"))
+
+    def test_locmem_is_not_shared(self):
+        self.assertIsNone(shared_cache())
+        request = RequestFactory().get("/", HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        CachedTokenAuthentication().authenticate(request)
+        local_tokens.clear()
+        with self.assertNumQueries(1):
+            CachedTokenAuthentication().authenticate(request)
+
+
+class SessionUserTest(SharedCacheTestMixin, TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="test", password="test")
+        self.client = Client()
+        self.client.login(username="test", password="test")
+
+    def session_user(self):
+        request = RequestFactory().get("/")
+        request.session = self.client.session
+        request.session.keys()
+        with CaptureQueriesContext(connection) as queries:
+            user = get_session_user(request)
+        return user, len(queries)
+
+    def test_user_cached(self):
+        user, first = self.session_user()
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(first, 1)
+
+        user, second = self.session_user()
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(second, 0)
+
+    def test_password_change_logs_out(self):
+        self.session_user()
+        self.user.set_password("changed")
+        self.user.save()
+        self.assertIsInstance(self.session_user()[0], AnonymousUser)
+
+    def test_deactivated_user_logged_out(self):
+        self.session_user()
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsInstance(self.session_user()[0], AnonymousUser)
+
+    def test_middleware_authenticates_session(self):
+        self.assertEqual(self.client.get(reverse("menu:dishes-list")).status_code, status.HTTP_200_OK)
+        self.assertEqual(Client().get(reverse("menu:dishes-list")).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_not_cached_without_shared_cache(self):
+        with patch("menu.authentication.shared_cache", return_value=None):
+            self.assertEqual(self.session_user()[1], 1)
+            user, queries = self.session_user()
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(queries, 1)
+
+    def test_cached_sessions_need_shared_cache(self):
+        self.assertEqual(session_cache_check(None), [])
+        with override_settings(SESSION_ENGINE="django.contrib.sessions.backends.cached_db"):
+            self.assertEqual([error.id for error in session_cache_check(None)], ["menu.E001"])
+
+
+class LRUCacheTest(TestCase):
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(2, 60)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+        self.assertEqual((lru.get("a"), lru.get("b"), lru.get("c")), (1, None, 3))
+
+    def test_entries_expire(self):
+        lru = LRUCache(2, 60)
+        with patch("menu.authentication.time.monotonic", return_value=0):
+            lru.set("a", 1)
+        with patch("menu.authentication.time.monotonic", return_value=60):
+            self.assertIsNone(lru.get("a"))
+
+    def test_disabled_with_zero_timeout(self):
+        lru = LRUCache(2, 0)
+        lru.set("a", 1)
+        self.assertIsNone(lru.get("a"))
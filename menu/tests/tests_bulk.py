@@ -0,0 +1,188 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from menu.models import Dish, Menu
+from menu.search import get_search_backend, search_terms
+from menu.views import DishViewSet
+
+client = Client()
+
+
+class DishBulkTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="test", password="test")
+        self.other_user = get_user_model().objects.create_user(username="other", password="other")
+        self.staff_user = get_user_model().objects.create_user(username="staff", password="staff", is_staff=True)
+        self.dishes = [self.create_dish(f"Dish {i}", self.user) for i in range(3)]
+        self.other_dish = self.create_dish("Other Dish", self.other_user)
+        self.menu = Menu.objects.create(name="Menu", description="Test menu description", author=self.user)
+        self.menu.dish.add(self.dishes[0], self.dishes[1], self.other_dish)
+        self.url = reverse("menu:dishes-list")
+
+    def create_dish(self, name, author):
+        return Dish.objects.create(
+            name=name, description="Test description", price="10.50", prep_time=10, is_vegetarian=False,
+            author=author,
+        )
+
+    def dish_data(self, name):
+        return {"name": name, "description": "Test description", "price": "12.00", "prep_time": 5,
+                "is_vegetarian": True}
+
+    def test_bulk_create(self):
+        client.login(username="test", password="test")
+        response = client.post(self.url, [self.dish_data("Soup"), self.dish_data("Pasta")],
+                               content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([dish["name"] for dish in response.data], ["Soup", "Pasta"])
+        created = Dish.objects.filter(pk__in=[dish["id"] for dish in response.data])
+        self.assertEqual({dish.author_id for dish in created}, {self.user.pk})
+        self.assertEqual(created.count(), 2)
+
+    def test_bulk_create_returns_per_item_errors(self):
+        client.login(username="test", password="test")
+        invalid = self.dish_data("Pasta")
+        del invalid["is_vegetarian"]
+        response = client.post(self.url, [self.dish_data("Soup"), invalid], content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(list(response.data[1]), ["is_vegetarian"])
+        self.assertFalse(Dish.objects.filter(name="Soup").exists())
+
+    def test_single_create_still_works(self):
+        client.login(username="test", password="test")
+        response = client.post(self.url, self.dish_data("Soup"), content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["name"], "Soup")
+
+    @patch.object(DishViewSet, "bulk_max_size", 1)
+    def test_bulk_size_is_limited(self):
+        client.login(username="test", password="test")
+        response = client.post(self.url, [self.dish_data("Soup"), self.dish_data("Pasta")],
+                               content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", response.data)
+
+    def test_bulk_update(self):
+        client.login(username="test", password="test")
+        updated_at = self.dishes[0].updated_at
+        response = client.patch(self.url, [
+            {"id": self.dishes[0].pk, "name": "Soup"},
+            {"id": self.dishes[1].pk, "price": "20.00"},
+        ], content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([dish["name"] for dish in response.data], ["Soup", "Dish 1"])
+        self.dishes[0].refresh_from_db()
+        self.dishes[1].refresh_from_db()
+        self.assertEqual(self.dishes[0].name, "Soup")
+        self.assertEqual(str(self.dishes[1].price), "20.00")
+        self.assertGreater(self.dishes[0].updated_at, updated_at)
+
+    def test_bulk_update_reindexes_menus(self):
+        client.login(username="test", password="test")
+        client.patch(self.url, [{"id": self.dishes[0].pk, "name": "Gazpacho"}], content_type="application/json")
+        menus = get_search_backend().search(Menu.objects.all(), search_terms("gazpacho"))
+        self.assertEqual([menu.pk for menu in menus], [self.menu.pk])
+
+    def test_bulk_update_checks_permissions_per_item(self):
+        client.login(username="test", password="test")
+        response = client.patch(self.url, [
+            {"id": self.dishes[0].pk, "name": "Soup"},
+            {"id": self.other_dish.pk, "name": "Pasta"},
+            {"id": 0, "name": "Pizza"},
+            {"name": "Salad"},
+        ], content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(set(response.data[1]), {"id"})
+        self.assertEqual(set(response.data[2]), {"id"})
+        self.assertEqual(set(response.data[3]), {"id"})
+        self.dishes[0].refresh_from_db()
+        self.assertEqual(self.dishes[0].name, "Dish 0")
+
+    def test_bulk_update_staff(self):
+        client.login(username="staff", password="staff")
+        response = client.patch(self.url, [{"id": self.other_dish.pk, "name": "Pasta"}],
+                                content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bulk_update_query_count(self):
+        client.login(username="test", password="test")
+        client.patch(self.url, [{"id": self.dishes[0].pk, "prep_time": 1}], content_type="application/json")
+        items = [{"id": dish.pk, "prep_time": 15} for dish in self.dishes]
+        with CaptureQueriesContext(connection) as small:
+            client.patch(self.url, items[:1], content_type="application/json")
+        with CaptureQueriesContext(connection) as large:
+            client.patch(self.url, items, content_type="application/json")
+        self.assertEqual(len(small), len(large))
+
+    def test_bulk_destroy(self):
+        client.login(username="test", password="test")
+        response = client.delete(self.url, [self.dishes[0].pk, {"id": self.dishes[2].pk}],
+                                 content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Dish.objects.filter(pk__in=[self.dishes[0].pk, self.dishes[2].pk]).exists())
+        self.menu.refresh_from_db()
+        self.assertEqual(self.menu.dishes_count, 2)
+        self.assertEqual(list(get_search_backend().search(Menu.objects.all(), ["Dish", "0"])), [])
+
+    def test_bulk_destroy_query_count(self):
+        client.login(username="test", password="test")
+        extra = [self.create_dish(f"Extra {i}", self.user) for i in range(4)]
+        self.menu.dish.add(*extra)
+        client.delete(self.url, [extra[0].pk], content_type="application/json")
+        with CaptureQueriesContext(connection) as small:
+            client.delete(self.url, [self.dishes[0].pk], content_type="application/json")
+        with CaptureQueriesContext(connection) as large:
+            client.delete(self.url, [self.dishes[1].pk, self.dishes[2].pk] + [dish.pk for dish in extra[1:]],
+                          content_type="application/json")
+        self.assertEqual(len(small), len(large))
+        self.assertFalse(Dish.objects.filter(author=self.user).exists())
+        self.menu.refresh_from_db()
+        self.assertEqual(self.menu.dishes_count, 1)
+
+    def test_bulk_destroy_is_all_or_nothing(self):
+        client.login(username="test", password="test")
+        response = client.delete(self.url, [self.dishes[0].pk, self.other_dish.pk], content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[0], {})
+        self.assertEqual(set(response.data[1]), {"id"})
+        self.assertTrue(Dish.objects.filter(pk=self.dishes[0].pk).exists())
+
+    def test_bulk_destroy_rejects_duplicates(self):
+        client.login(username="test", password="test")
+        response = client.delete(self.url, [self.dishes[0].pk, self.dishes[0].pk], content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data[1], {"id": ["Duplicate id."]})
+
+    def test_bulk_requires_list(self):
+        client.login(username="test", password="test")
+        response = client.patch(self.url, {"id": self.dishes[0].pk}, content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("non_field_errors", response.data)
+
+    def test_bulk_not_logged_user(self):
+        response = client.delete(self.url, [self.dishes[0].pk], content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_invalidates_cached_cards(self):
+        client.get(reverse("menu:cards-list"))
+        client.login(username="test", password="test")
+        client.patch(self.url, [{"id": self.dishes[0].pk, "name": "Soup"}], content_type="application/json")
+        client.logout()
+        response = client.get(reverse("menu:cards-list"))
+        names = [dish["name"] for dish in response.data["results"][0]["dish"]]
+        self.assertIn("Soup", names)
+
+    def test_cards_have_no_bulk_routes(self):
+        client.login(username="test", password="test")
+        response = client.delete(reverse("menu:cards-list"), [self.menu.pk], content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -0,0 +1,64 @@
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+
+from menu.digest import DailyDigest
+from menu.models import Dish
+
+
+class DailyDigestTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.day = date.today() - timedelta(days=1)
+        self.yesterday = timezone.make_aware(datetime.combine(self.day, time(12)))
+        self.user = get_user_model().objects.create(username="Adam")
+
+        self.created_dish = self.create_dish("Created Dish", "10.50")
+        self.updated_dish = self.create_dish("Updated Dish", "5.00")
+        self.old_dish = self.create_dish("Old Dish", "7.00")
+        Dish.objects.filter(pk=self.created_dish.pk).update(created_at=self.yesterday, updated_at=self.yesterday)
+        Dish.objects.filter(pk=self.updated_dish.pk).update(
+            created_at=self.yesterday - timedelta(days=5), updated_at=self.yesterday
+        )
+        Dish.objects.filter(pk=self.old_dish.pk).update(
+            created_at=self.yesterday - timedelta(days=5), updated_at=self.yesterday - timedelta(days=5)
+        )
+
+    def create_dish(self, name, price):
+        return Dish.objects.create(
+            name=name,
+            description="Test description",
+            price=price,
+            prep_time=60,
+            is_vegetarian=False,
+            author=self.user,
+        )
+
+    def test_dish_sets_in_one_query(self):
+        digest = DailyDigest(self.day)
+        with self.assertNumQueries(1):
+            created, updated = digest.dishes
+        self.assertEqual([dish["name"] for dish in created], ["Created Dish"])
+        self.assertEqual([dish["name"] for dish in updated], ["Created Dish", "Updated Dish"])
+
+    def test_html_lists_dishes(self):
+        html = DailyDigest(self.day).html
+        self.assertIn("<h2>New dishes</h2>", html)
+        self.assertIn("Created Dish 10.50", html)
+        self.assertIn("Updated Dish 5.00", html)
+        self.assertNotIn("Old Dish", html)
+
+    def test_html_cached_per_day(self):
+        html = DailyDigest(self.day).html
+        with self.assertNumQueries(0):
+            self.assertEqual(DailyDigest(self.day).html, html)
+
+    def test_current_day_not_cached(self):
+        DailyDigest(date.today()).html
+        self.assertIsNone(cache.get(DailyDigest(date.today()).cache_key))
+
+    def test_title(self):
+        self.assertEqual(DailyDigest.for_yesterday().title, f"Update on {date.today()}")
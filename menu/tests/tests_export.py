@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from menu.export import export_items
+from menu.models import Dish, Menu
+from menu.serializers import MenuReadSerializer
+
+client = Client()
+
+
+def read_streaming(response):
+    return b"".join(response.streaming_content)
+
+
+class ExportTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="test", password="test")
+        Dish.objects.bulk_create(
+            Dish(name=f"Dish {i}", description="Test description", price="10.50", prep_time=10,
+                 is_vegetarian=bool(i % 2), author=self.user)
+            for i in range(12)
+        )
+        self.dishes = list(Dish.objects.order_by("pk"))
+        for i in range(5):
+            menu = Menu.objects.create(name=f"Menu {i}", description="Test menu description", author=self.user)
+            menu.dish.set(self.dishes[i:i + 3])
+        self.empty_menu = Menu.objects.create(name="Empty", description="Test menu description", author=self.user)
+
+    def test_export_dishes_json(self):
+        client.login(username="test", password="test")
+        response = client.get(reverse("menu:dishes-export"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertIn('filename="dishes.json"', response["Content-Disposition"])
+
+        listed = client.get(reverse("menu:dishes-list"), {"page_size": 100}).data["results"]
+        self.assertEqual(json.loads(read_streaming(response)), json.loads(json.dumps(listed)))
+
+    def test_export_cards_ndjson(self):
+        response = client.get(reverse("menu:cards-export"), {"format": "ndjson"})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = read_streaming(response).decode().splitlines()
+        cards = [json.loads(line) for line in lines]
+
+        listed = client.get(reverse("menu:cards-list")).data["results"]
+        self.assertEqual(cards, json.loads(json.dumps(listed)))
+        self.assertNotIn(self.empty_menu.pk, [card["id"] for card in cards])
+
+    def test_export_empty(self):
+        Dish.objects.all().delete()
+        client.login(username="test", password="test")
+        self.assertEqual(read_streaming(client.get(reverse("menu:dishes-export"))), b"[]")
+        self.assertEqual(read_streaming(client.get(reverse("menu:dishes-export"), {"format": "ndjson"})), b"")
+
+    def test_export_applies_filters(self):
+        response = client.get(reverse("menu:cards-export"), {"ordering": "-name"})
+        names = [card["name"] for card in json.loads(read_streaming(response))]
+        self.assertEqual(names, ["Menu 4", "Menu 3", "Menu 2", "Menu 1", "Menu 0"])
+
+    def test_export_dishes_not_logged_user(self):
+        response = client.get(reverse("menu:dishes-export"), {"format": "ndjson"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertIn("detail", json.loads(response.content))
+
+    def test_export_reads_in_chunks(self):
+        with CaptureQueriesContext(connection) as queries:
+            items = list(export_items(Menu.objects.order_by("pk"), MenuReadSerializer, {}, chunk_size=2))
+        self.assertEqual(len(items), 6)
+        nested = [query for query in queries.captured_queries if "menu_menu_dish" in query["sql"]]
+        self.assertEqual(len(nested), 3)
+
+    def test_export_menu_command_stdout(self):
+        out = StringIO()
+        call_command("export_menu", "dishes", "--format", "ndjson", "--chunk-size", "5", stdout=out)
+        dishes = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([dish["id"] for dish in dishes], [dish.pk for dish in self.dishes])
+
+    def test_export_menu_command_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cards.json")
+            call_command("export_menu", "cards", "--output", path, stdout=StringIO())
+            with open(path) as export:
+                cards = json.load(export)
+        self.assertEqual(len(cards), 6)
+        self.assertEqual([dish["id"] for dish in cards[0]["dish"]], [dish.pk for dish in self.dishes[:3]])
@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import transaction
+from django.db.models import Count
+from django.test import TestCase
+
+from menu.models import Dish, Menu
+from menu.search import get_search_backend
+
+
+def generate(*args):
+    out = StringIO()
+    call_command("generate_menu_data", "--users", "20", "--dishes", "300", "--menus", "60",
+                 "--large-menu-size", "100", "--large-menus", "0.05", *args, stdout=out)
+    return out.getvalue()
+
+
+def snapshot():
+    """The generated catalogue, independent of primary key values."""
+    dish_index = {pk: i for i, pk in enumerate(Dish.objects.order_by("pk").values_list("pk", flat=True))}
+    user_index = {pk: i for i, pk in enumerate(get_user_model().objects.order_by("pk").values_list("pk", flat=True))}
+    dishes = [(name, str(price), user_index[author_id]) for name, price, author_id in
+              Dish.objects.order_by("pk").values_list("name", "price", "author_id")]
+    menus = [(name, user_index[author_id], dishes_count) for name, author_id, dishes_count in
+             Menu.objects.order_by("pk").values_list("name", "author_id", "dishes_count")]
+    links = sorted((menu_id, dish_index[dish_id]) for menu_id, dish_id in
+                   Menu.dish.through.objects.values_list("menu__name", "dish_id"))
+    return dishes, menus, links
+
+
+class GenerateMenuDataTest(TestCase):
+
+    def test_generates_requested_catalogue(self):
+        output = generate()
+        self.assertIn("Generated 20 users, 300 dishes, 60 menus", output)
+        self.assertEqual(get_user_model().objects.filter(username__startswith="gen_user_").count(), 20)
+        self.assertEqual(Dish.objects.count(), 300)
+        self.assertEqual(Menu.objects.count(), 60)
+
+        counts = Menu.objects.annotate(links=Count("dish")).values_list("dishes_count", "links")
+        self.assertTrue(all(dishes_count == links for dishes_count, links in counts))
+        sizes = list(Menu.objects.values_list("dishes_count", flat=True))
+        self.assertIn(0, sizes)
+        self.assertIn(100, sizes)
+        self.assertEqual(Menu.dish.through.objects.count(), sum(sizes))
+
+    def test_authors_are_skewed(self):
+        generate()
+        per_author = sorted(Dish.objects.values("author").annotate(count=Count("pk")).values_list("count", flat=True))
+        self.assertGreater(per_author[-1], 5 * per_author[len(per_author) // 2])
+
+    def test_same_seed_same_catalogue(self):
+        with transaction.atomic():
+            generate("--seed", "7")
+            first = snapshot()
+            transaction.set_rollback(True)
+        generate("--seed", "7")
+        self.assertEqual(snapshot(), first)
+
+        generate("--seed", "8", "--prefix", "other")
+        self.assertNotEqual(snapshot()[0][300:], first[0])
+
+    def test_dates_spread_over_days(self):
+        generate("--days", "10")
+        dates = {created.date() for created in Dish.objects.values_list("created_at", flat=True)}
+        self.assertEqual(len(dates), 10)
+
+    def test_menus_are_searchable(self):
+        generate()
+        name = Menu.objects.exclude(dishes_count=0).values_list("name", flat=True).first()
+        results = get_search_backend().search(Menu.objects.all(), name.split())
+        self.assertIn(name, results.values_list("name", flat=True))
+
+    def test_existing_prefix_is_rejected(self):
+        generate()
+        with self.assertRaises(CommandError):
+            generate()
@@ -0,0 +1,151 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+
+from menu import images
+from menu.models import Dish, Menu
+
+client = Client()
+
+
+def image_file(name="dish.png", size=(1200, 600), format="PNG", mode="RGB"):
+    output = BytesIO()
+    Image.new(mode, size, "orange").save(output, format)
+    return SimpleUploadedFile(name, output.getvalue())
+
+
+@patch("menu.images.IMAGE_WORKERS", 0)
+@patch("menu.images.IMAGE_VARIANTS", {"thumbnail": 320, "medium": 960})
+class ImagePipelineTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = override_settings(MEDIA_ROOT=self.media_root,
+                                     DEFAULT_FILE_STORAGE="menu.storage.ContentAddressedStorage")
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = get_user_model().objects.create_user(username="test", password="test")
+        client.login(username="test", password="test")
+        self.dish = Dish.objects.create(name="Soup", description="Test description", price="10.50", prep_time=10,
+                                        is_vegetarian=False, author=self.user)
+
+    def upload(self, file):
+        with self.captureOnCommitCallbacks(execute=True):
+            return client.patch(
+                reverse("menu:dishes-detail", args=[self.dish.pk]),
+                encode_multipart(BOUNDARY, {"image": file}),
+                content_type=MULTIPART_CONTENT,
+            )
+
+    def variant_size(self, name):
+        with Image.open(Dish._meta.get_field("image").storage.path(name)) as image:
+            return image.format, image.size
+
+    def test_upload_stores_dimensions_and_variants(self):
+        response = self.upload(image_file())
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.dish.refresh_from_db()
+        self.assertEqual((self.dish.image_width, self.dish.image_height), (1200, 600))
+        self.assertEqual(self.variant_size(self.dish.image_variants["thumbnail"]), ("WEBP", (320, 160)))
+        self.assertEqual(self.variant_size(self.dish.image_variants["medium"]), ("WEBP", (960, 480)))
+
+    def test_variants_are_not_upscaled(self):
+        self.upload(image_file(size=(400, 300)))
+        self.dish.refresh_from_db()
+        self.assertEqual(self.variant_size(self.dish.image_variants["thumbnail"]), ("WEBP", (320, 240)))
+        self.assertEqual(self.variant_size(self.dish.image_variants["medium"]), ("WEBP", (400, 300)))
+
+    def test_serializer_exposes_variant_urls(self):
+        self.upload(image_file(name="soup.jpg", format="JPEG"))
+        response = client.get(reverse("menu:dishes-list"))
+        dish = response.data["results"][0]
+        self.assertEqual((dish["image_width"], dish["image_height"]), (1200, 600))
+        self.dish.refresh_from_db()
+        self.assertEqual(dish["image_variants"], {
+            variant: f"http://testserver/media/{name}" for variant, name in self.dish.image_variants.items()
+        })
+        self.assertRegex(dish["image_variants"]["thumbnail"], r"/media/photos/variants/[0-9a-f]{2}/[0-9a-f]{64}\.webp$")
+        detail = client.get(reverse("menu:dishes-detail", args=[self.dish.pk]))
+        self.assertEqual(detail.data["image_variants"], dish["image_variants"])
+
+    def test_unsupported_image_type_is_rejected(self):
+        with patch("menu.images.schedule") as schedule:
+            response = self.upload(image_file(name="dish.png", format="GIF", mode="P"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("image", response.data)
+        schedule.assert_not_called()
+
+    def test_save_without_new_image_is_not_processed(self):
+        self.upload(image_file())
+        with patch("menu.images.schedule") as schedule:
+            response = client.patch(reverse("menu:dishes-detail", args=[self.dish.pk]), {"name": "Tomato soup"},
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        schedule.assert_not_called()
+        self.dish.refresh_from_db()
+        self.assertEqual(self.dish.image_width, 1200)
+
+    def test_removing_image_clears_variants(self):
+        self.upload(image_file())
+        self.dish.refresh_from_db()
+        self.dish.image = ""
+        self.dish.save()
+        self.dish.refresh_from_db()
+        self.assertEqual((self.dish.image_width, self.dish.image_height, self.dish.image_variants), (None, None, {}))
+
+    def test_processing_runs_after_commit_on_pool(self):
+        with patch("menu.images.IMAGE_WORKERS", 2), patch("menu.images.get_executor") as get_executor:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.dish.image = image_file()
+                self.dish.save()
+            get_executor.assert_not_called()
+            for callback in callbacks:
+                callback()
+        get_executor.return_value.submit.assert_called_once_with(images.run_pooled, self.dish.pk)
+
+    def test_processing_does_not_mark_dish_or_menus_updated(self):
+        menu = Menu.objects.create(name="Lunch", description="Test menu description", author=self.user)
+        menu.dish.add(self.dish)
+        storage = Dish._meta.get_field("image").storage
+        name = storage.save("photos/imported.png", ContentFile(image_file(size=(100, 50)).read()))
+        Dish.objects.filter(pk=self.dish.pk).update(image=name)
+        self.dish.refresh_from_db()
+        menu.refresh_from_db()
+
+        self.assertTrue(images.process_image(self.dish.pk))
+        self.assertEqual(Dish.objects.get(pk=self.dish.pk).updated_at, self.dish.updated_at)
+        self.assertEqual(Menu.objects.get(pk=menu.pk).updated_at, menu.updated_at)
+
+    def test_failed_processing_is_logged(self):
+        Dish.objects.filter(pk=self.dish.pk).update(image="photos/missing.png")
+        with self.assertLogs(level="ERROR"):
+            self.assertFalse(images.run(self.dish.pk))
+
+    def test_process_images_command(self):
+        storage = Dish._meta.get_field("image").storage
+        name = storage.save("photos/imported.png", ContentFile(image_file(size=(100, 50)).read()))
+        Dish.objects.filter(pk=self.dish.pk).update(image=name)
+        out = StringIO()
+        with patch("menu.management.commands.process_images.IMAGE_WORKERS", 0):
+            call_command("process_images", stdout=out)
+            call_command("process_images", stdout=out)
+        self.assertIn("Processed 1 of 1 dish images", out.getvalue())
+        self.assertIn("Processed 0 of 0 dish images", out.getvalue())
+        self.dish.refresh_from_db()
+        self.assertEqual((self.dish.image_width, self.dish.image_height), (100, 50))
+        self.assertEqual(set(self.dish.image_variants), {"thumbnail", "medium"})
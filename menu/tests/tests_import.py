@@ -0,0 +1,162 @@
+import io
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from menu.importer import DishImporter, MenuImporter, read_json
+from menu.models import Dish, Menu
+from menu.search import get_search_backend
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "fixtures")
+
+
+def dish_row(name, **extra):
+    return {"name": name, "description": "Test description", "price": "10.50", "prep_time": 10,
+            "is_vegetarian": False, **extra}
+
+
+class ReadJsonTest(TestCase):
+    def test_reads_items_across_buffers(self):
+        items = [{"name": f"Dish {i}", "tags": ["a, b", "]"]} for i in range(50)]
+        stream = io.StringIO(json.dumps(items, indent=2))
+        self.assertEqual(list(read_json(stream, buffer_size=7)), items)
+
+    def test_empty_array(self):
+        self.assertEqual(list(read_json(io.StringIO(" [ ] "))), [])
+
+    def test_not_an_array(self):
+        with self.assertRaises(ValueError):
+            list(read_json(io.StringIO('{"name": "Dish"}')))
+
+
+class ImportMenuTest(TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.user = get_user_model().objects.create_user(username="test", password="test")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w") as file:
+            file.write(content)
+        return path
+
+    def import_menu(self, *args):
+        out, err = StringIO(), StringIO()
+        call_command("import_menu", *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_fixtures(self):
+        call_command("loaddata", os.path.join(FIXTURES, "customuser.json"), verbosity=0)
+        out, _ = self.import_menu("dishes", os.path.join(FIXTURES, "dish.json"))
+        self.assertIn("rows/s", out)
+        self.import_menu("cards", os.path.join(FIXTURES, "menu.json"))
+
+        with open(os.path.join(FIXTURES, "menu.json")) as fixture:
+            menus = json.load(fixture)
+        for item in menus:
+            menu = Menu.objects.get(pk=item["pk"])
+            self.assertEqual(menu.author_id, item["fields"]["author"])
+            self.assertEqual(sorted(menu.dish.values_list("pk", flat=True)), sorted(item["fields"]["dish"]))
+            self.assertEqual(menu.dishes_count, len(item["fields"]["dish"]))
+        burger = [menu.pk for menu in get_search_backend().search(Menu.objects.all(), ["Burger"])]
+        self.assertEqual(burger, [item["pk"] for item in menus if 3 in item["fields"]["dish"]])
+
+    def test_explicit_ids_reset_sequences(self):
+        path = self.write("dishes.ndjson", json.dumps(dish_row("Soup", id=500, author=self.user.pk)))
+        self.import_menu("dishes", path)
+        dish = Dish.objects.create(**dish_row("Pasta"), author=self.user)
+        self.assertGreater(dish.pk, 500)
+
+    def test_export_round_trip(self):
+        dishes = [Dish.objects.create(**dish_row(f"Dish {i}"), author=self.user) for i in range(5)]
+        menu = Menu.objects.create(name="Menu", description="Test menu description", author=self.user)
+        menu.dish.set(dishes[1:4])
+        dishes_export, cards_export = StringIO(), StringIO()
+        call_command("export_menu", "dishes", "--format", "ndjson", stdout=dishes_export)
+        call_command("export_menu", "cards", stdout=cards_export)
+        Menu.objects.all().delete()
+        Dish.objects.all().delete()
+
+        self.import_menu("dishes", self.write("dishes.ndjson", dishes_export.getvalue()), "--author", "test")
+        self.import_menu("cards", self.write("cards.json", cards_export.getvalue()), "--author", "test")
+
+        menu = Menu.objects.get(name="Menu")
+        self.assertEqual(Dish.objects.count(), 5)
+        self.assertEqual(sorted(menu.dish.values_list("pk", flat=True)), [dish.pk for dish in dishes[1:4]])
+        self.assertEqual(menu.dishes_count, 3)
+
+    def test_import_csv(self):
+        path = self.write("dishes.csv", "name,description,price,prep_time,is_vegetarian\n"
+                                        "Soup,Tomato soup,5.00,10,true\nPasta,Carbonara,12.50,20,false\n")
+        self.import_menu("dishes", path, "--author", "test")
+        dishes = Menu.dish.field.related_model.objects.order_by("pk")
+        self.assertEqual([(dish.name, dish.is_vegetarian) for dish in dishes], [("Soup", True), ("Pasta", False)])
+
+        soup, pasta = dishes
+        path = self.write("cards.csv", f"name,description,dish\nLunch,Lunch card,{soup.pk} {pasta.pk}\n")
+        self.import_menu("cards", path, "--author", "test")
+        self.assertEqual(Menu.objects.get(name="Lunch").dishes_count, 2)
+
+    def test_invalid_rows_are_skipped_and_reported(self):
+        Dish.objects.create(**dish_row("Soup", id=1), author=self.user)
+        Menu.objects.create(name="Taken", description="Test menu description", author=self.user)
+        rows = [
+            dish_row("Valid"),
+            dish_row("Negative", price="-1"),
+            dish_row("Existing id", id=1),
+            dish_row("Unknown author", author=999),
+        ]
+        _, err = self.import_menu("dishes", self.write("dishes.json", json.dumps(rows)), "--author", "test")
+        self.assertEqual(list(Dish.objects.order_by("pk").values_list("name", flat=True)), ["Soup", "Valid"])
+        self.assertEqual([line.split(":")[0] for line in err.splitlines()], ["Row 2", "Row 3", "Row 4"])
+
+        menus = [
+            {"name": "Taken", "description": "Test menu description"},
+            {"name": "New", "description": "Test menu description", "dish": [999]},
+            {"name": "Twice", "description": "Test menu description"},
+            {"name": "Twice", "description": "Test menu description"},
+        ]
+        _, err = self.import_menu("cards", self.write("cards.json", json.dumps(menus)), "--author", "test")
+        self.assertEqual(sorted(Menu.objects.values_list("name", flat=True)), ["Taken", "Twice"])
+        self.assertEqual([line.split(":")[0] for line in err.splitlines()], ["Row 1", "Row 2", "Row 4"])
+
+    def test_author_is_required(self):
+        _, err = self.import_menu("dishes", self.write("dishes.json", json.dumps([dish_row("Soup")])))
+        self.assertIn("author", err)
+        self.assertFalse(Dish.objects.exists())
+
+    def test_unknown_author_option(self):
+        with self.assertRaises(CommandError):
+            self.import_menu("dishes", self.write("dishes.json", "[]"), "--author", "nobody")
+
+    def test_unknown_format(self):
+        with self.assertRaises(CommandError):
+            self.import_menu("dishes", self.write("dishes.xml", "<dishes/>"))
+
+    def test_queries_per_batch(self):
+        rows = [dish_row(f"Dish {i}") for i in range(40)]
+        with CaptureQueriesContext(connection) as small:
+            DishImporter(batch_size=40, author=self.user).run(rows[:4])
+        with CaptureQueriesContext(connection) as large:
+            DishImporter(batch_size=40, author=self.user).run(rows)
+        self.assertEqual(len(small), len(large))
+
+        dish_ids = list(Dish.objects.values_list("pk", flat=True)[:2])
+        menus = [{"name": f"Menu {i}", "description": "Menu", "dish": dish_ids} for i in range(33)]
+        with CaptureQueriesContext(connection) as small:
+            MenuImporter(batch_size=30, author=self.user).run(menus[:3])
+        with CaptureQueriesContext(connection) as large:
+            imported, _ = MenuImporter(batch_size=30, author=self.user).run(menus[3:])
+        self.assertEqual(imported, 30)
+        self.assertEqual(len(small), len(large))
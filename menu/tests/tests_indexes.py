@@ -0,0 +1,138 @@
+import re
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from menu.digest import DailyDigest
+from menu.models import Dish, Menu
+
+client = Client()
+
+HOT_ENDPOINTS = [
+    ("menu:cards-list", {}),
+    ("menu:cards-list", {"ordering": "name"}),
+    ("menu:cards-list", {"ordering": "-dishes_count"}),
+    ("menu:cards-list", {"search": "Menu 1"}),
+    ("menu:dishes-list", {}),
+]
+
+MENU_TABLES = ("menu_menu", "menu_dish", "menu_menu_dish")
+
+
+class IndexUsageTest(TestCase):
+    """Run EXPLAIN on every query of the hot endpoints and fail on full table scans."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username="test", password="test")
+        Dish.objects.bulk_create(
+            Dish(name=f"Dish {i}", description="Test description", price="10.50", prep_time=10,
+                 is_vegetarian=bool(i % 2), author=cls.user)
+            for i in range(200)
+        )
+        dishes = list(Dish.objects.all())
+        for i in range(120):
+            menu = Menu.objects.create(name=f"Menu {i}", description="Test menu description", author=cls.user)
+            menu.dish.set(dishes[i:i + i % 7])
+
+    def setUp(self) -> None:
+        cache.clear()
+        client.login(username="test", password="test")
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute("EXPLAIN " + sql)
+                plan = [row[0] for row in cursor.fetchall()]
+                cursor.execute("SET LOCAL enable_seqscan = on")
+            else:
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                plan = [row[-1] for row in cursor.fetchall()]
+        return plan
+
+    def full_scans(self, sql):
+        scans = []
+        for line in self.explain(sql):
+            if connection.vendor == "postgresql":
+                match = re.search(r"Seq Scan on (\w+)", line)
+            else:
+                match = re.fullmatch(r"SCAN (\w+)", line.strip())
+            if not match:
+                continue
+            table = match.group(1)
+            # SQLite tables are clustered on the rowid, a scan in id order walks the primary key.
+            if connection.vendor == "sqlite" and f'ORDER BY "{table}"."id" ASC' in sql:
+                continue
+            scans.append(table)
+        return scans
+
+    def assertUsesIndexes(self, queries):
+        checked = 0
+        for query in queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT") or not any(f'"{table}"' in sql for table in MENU_TABLES):
+                continue
+            checked += 1
+            self.assertEqual(self.full_scans(sql), [], sql)
+        self.assertGreater(checked, 0)
+
+    def test_hot_endpoints(self):
+        for name, params in HOT_ENDPOINTS:
+            with self.subTest(name=name, params=params):
+                client.get(reverse(name), params)
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(reverse(name), params)
+                    client.get(response.data["next"])
+                self.assertUsesIndexes(queries.captured_queries)
+
+    def test_cards_by_dishes_count_read_in_index_order(self):
+        response = client.get(reverse("menu:cards-list"), {"ordering": "-dishes_count", "page_size": 10})
+        with CaptureQueriesContext(connection) as queries:
+            client.get(response.data["next"])
+        pages = [query["sql"] for query in queries.captured_queries if '"dishes_count" DESC' in query["sql"]]
+        self.assertEqual(len(pages), 1)
+        if connection.vendor == "postgresql":
+            sorts = [line for line in self.explain(pages[0]) if re.search(r"\bSort\b", line)]
+        else:
+            sorts = [line for line in self.explain(pages[0]) if "TEMP B-TREE" in line]
+        self.assertEqual(sorts, [], pages[0])
+
+    def test_created_at_filter(self):
+        params = {
+            "created_at__gte": timezone.now() - timedelta(hours=1),
+            "created_at__lte": timezone.now() + timedelta(hours=1),
+        }
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse("menu:cards-list"), params)
+        self.assertUsesIndexes(queries.captured_queries)
+
+    def test_updated_at_filter(self):
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse("menu:cards-list"), {"updated_at": Menu.objects.first().updated_at})
+        self.assertUsesIndexes(queries.captured_queries)
+
+    def test_all_cards_for_user_with_permissions(self):
+        self.user.user_permissions.add(Permission.objects.get(codename="view_menu"))
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse("menu:cards-list"))
+        self.assertUsesIndexes(queries.captured_queries)
+
+    def test_details(self):
+        menu = Menu.objects.filter(dishes_count__gt=0).first()
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse("menu:cards-detail", kwargs={"pk": menu.pk}))
+            client.get(reverse("menu:dishes-detail", kwargs={"pk": menu.dish.first().pk}))
+        self.assertUsesIndexes(queries.captured_queries)
+
+    def test_digest(self):
+        with CaptureQueriesContext(connection) as queries:
+            DailyDigest(date.today()).dishes
+        self.assertUsesIndexes(queries.captured_queries)
@@ -0,0 +1,135 @@
+import os
+import shutil
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from apscheduler.jobstores.base import ConflictingIdError, JobLookupError
+from apscheduler.schedulers.background import BackgroundScheduler
+from django.contrib.sessions.models import Session
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from menu.jobs import (
+    DjangoJobStore,
+    SchedulerLocked,
+    clear_expired_sessions,
+    create_scheduler,
+    single_instance_lock,
+)
+from menu.models import ScheduledJob
+
+
+def job():
+    pass
+
+
+class DjangoJobStoreTest(TestCase):
+    def setUp(self) -> None:
+        self.scheduler = BackgroundScheduler(jobstores={'default': DjangoJobStore()})
+        self.next_run_time = timezone.now() + timedelta(hours=1)
+
+    def tearDown(self) -> None:
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+
+    def test_job_persisted(self):
+        self.scheduler.start(paused=True)
+        self.scheduler.add_job(job, 'date', id='job', run_date=self.next_run_time)
+
+        self.assertTrue(ScheduledJob.objects.filter(id='job').exists())
+        store = self.scheduler._lookup_jobstore('default')
+        self.assertEqual(store.lookup_job('job').id, 'job')
+        self.assertEqual(store.get_next_run_time(), self.next_run_time)
+
+    def test_due_jobs(self):
+        self.scheduler.start(paused=True)
+        self.scheduler.add_job(job, 'date', id='job', run_date=self.next_run_time)
+        store = self.scheduler._lookup_jobstore('default')
+
+        self.assertEqual(store.get_due_jobs(timezone.now()), [])
+        self.assertEqual([j.id for j in store.get_due_jobs(self.next_run_time + timedelta(seconds=1))], ['job'])
+
+    def test_conflicting_and_missing_jobs(self):
+        self.scheduler.start(paused=True)
+        self.scheduler.add_job(job, 'date', id='job', run_date=self.next_run_time)
+        store = self.scheduler._lookup_jobstore('default')
+
+        with self.assertRaises(ConflictingIdError):
+            store.add_job(store.lookup_job('job'))
+        store.remove_job('job')
+        with self.assertRaises(JobLookupError):
+            store.remove_job('job')
+
+
+class SchedulerTest(TestCase):
+    def setUp(self) -> None:
+        lock_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, lock_dir, True)
+        patcher = patch("menu.jobs.SCHEDULER_LOCK_FILE", os.path.join(lock_dir, "scheduler.lock"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_create_scheduler_registers_jobs(self):
+        scheduler = create_scheduler(BackgroundScheduler)
+        scheduler.start(paused=True)
+        try:
+            self.assertEqual({j.id for j in scheduler.get_jobs()}, {'send_update_email', 'clear_expired_sessions'})
+            self.assertEqual(ScheduledJob.objects.count(), 2)
+        finally:
+            scheduler.shutdown(wait=False)
+
+    def test_single_instance_lock(self):
+        results = []
+
+        def acquire_from_another_connection():
+            # PostgreSQL advisory locks are re-entrant within a session, a second scheduler has its own connection.
+            try:
+                with single_instance_lock('test'):
+                    results.append('acquired')
+            except SchedulerLocked:
+                results.append('locked')
+            finally:
+                connection.close()
+
+        with single_instance_lock('test'):
+            thread = threading.Thread(target=acquire_from_another_connection)
+            thread.start()
+            thread.join()
+        self.assertEqual(results, ['locked'])
+
+    @patch("menu.management.commands.run_scheduler.create_scheduler")
+    def test_run_scheduler_command(self, mock_create_scheduler):
+        call_command('run_scheduler', stdout=StringIO())
+        mock_create_scheduler.return_value.start.assert_called_once()
+
+    @patch("menu.management.commands.run_scheduler.single_instance_lock")
+    def test_run_scheduler_command_locked(self, mock_lock):
+        mock_lock.return_value.__enter__.side_effect = SchedulerLocked
+        with self.assertRaises(CommandError):
+            call_command('run_scheduler')
+
+
+class ClearExpiredSessionsTest(TestCase):
+    def setUp(self) -> None:
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f"expired{i}", session_data="", expire_date=now - timedelta(days=1))
+             for i in range(5)]
+            + [Session(session_key="active", session_data="", expire_date=now + timedelta(days=1))]
+        )
+
+    def test_deletes_expired_in_batches(self):
+        with self.assertNumQueries(7):
+            self.assertEqual(clear_expired_sessions(batch_size=2), 5)
+        self.assertEqual(list(Session.objects.values_list("session_key", flat=True)), ["active"])
+
+    def test_command(self):
+        out = StringIO()
+        call_command('clear_expired_sessions', '--batch-size', '10', stdout=out)
+        self.assertIn("Deleted 5 expired sessions", out.getvalue())
+        self.assertEqual(Session.objects.count(), 1)
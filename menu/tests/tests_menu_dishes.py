@@ -0,0 +1,136 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from menu.models import Dish, Menu
+from menu.search import get_search_backend
+
+client = Client()
+
+
+class MenuDishesActionTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="test", password="test")
+        self.other_user = get_user_model().objects.create_user(username="other", password="other")
+        Dish.objects.bulk_create(
+            Dish(name=f"Dish {i}", description="Test description", price="10.50", prep_time=10,
+                 is_vegetarian=False, author=self.user)
+            for i in range(60)
+        )
+        self.dishes = list(Dish.objects.order_by("pk"))
+        self.menu = Menu.objects.create(name="Test Menu 1", description="Test menu description", author=self.user)
+        self.menu.dish.set(self.dishes[:3])
+        self.url = reverse("menu:cards-dishes", kwargs={"pk": self.menu.pk})
+
+    def post(self, action, dishes):
+        return client.post(self.url, {"action": action, "dishes": [dish.pk for dish in dishes]},
+                           content_type="application/json")
+
+    def menu_dish_ids(self):
+        return set(self.menu.dish.values_list("pk", flat=True))
+
+    def test_add(self):
+        client.login(username="test", password="test")
+        response = self.post("add", self.dishes[2:5])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {
+            "dishes_count": 5, "added": [self.dishes[3].pk, self.dishes[4].pk], "removed": [],
+        })
+        self.assertEqual(self.menu_dish_ids(), {dish.pk for dish in self.dishes[:5]})
+
+    def test_remove(self):
+        client.login(username="test", password="test")
+        response = self.post("remove", [self.dishes[0], self.dishes[10]])
+        self.assertEqual(response.data, {"dishes_count": 2, "added": [], "removed": [self.dishes[0].pk]})
+        self.assertEqual(self.menu_dish_ids(), {self.dishes[1].pk, self.dishes[2].pk})
+
+    def test_set(self):
+        client.login(username="test", password="test")
+        response = self.post("set", self.dishes[2:4])
+        self.assertEqual(response.data, {
+            "dishes_count": 2, "added": [self.dishes[3].pk], "removed": [self.dishes[0].pk, self.dishes[1].pk],
+        })
+        self.assertEqual(self.menu_dish_ids(), {self.dishes[2].pk, self.dishes[3].pk})
+
+    def test_set_empty_clears(self):
+        client.login(username="test", password="test")
+        response = self.post("set", [])
+        self.assertEqual(response.data["dishes_count"], 0)
+        self.assertEqual(self.menu_dish_ids(), set())
+
+    def test_add_to_empty_menu(self):
+        client.login(username="test", password="test")
+        self.post("set", [])
+        response = self.post("add", self.dishes[:2])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["dishes_count"], 2)
+
+        menu = Menu.objects.create(name="Empty Menu", description="Test menu description", author=self.user)
+        response = client.post(reverse("menu:cards-dishes", kwargs={"pk": menu.pk}),
+                               {"action": "add", "dishes": [self.dishes[0].pk]}, content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["added"], [self.dishes[0].pk])
+
+    def test_change_touches_menu_and_search_index(self):
+        client.login(username="test", password="test")
+        updated_at = self.menu.updated_at
+        self.post("add", [self.dishes[42]])
+        self.menu.refresh_from_db()
+        self.assertGreater(self.menu.updated_at, updated_at)
+        menus = get_search_backend().search(Menu.objects.all(), ["Dish", "42"])
+        self.assertEqual([menu.pk for menu in menus], [self.menu.pk])
+
+    def test_no_change_keeps_menu(self):
+        client.login(username="test", password="test")
+        updated_at = self.menu.updated_at
+        response = self.post("add", self.dishes[:2])
+        self.assertEqual(response.data, {"dishes_count": 3, "added": [], "removed": []})
+        self.menu.refresh_from_db()
+        self.assertEqual(self.menu.updated_at, updated_at)
+
+    def test_constant_queries(self):
+        client.login(username="test", password="test")
+        self.post("remove", self.dishes[:3])
+        self.post("set", self.dishes[:3])
+        with CaptureQueriesContext(connection) as small:
+            self.post("set", self.dishes[3:4])
+        with CaptureQueriesContext(connection) as large:
+            self.post("set", self.dishes[4:60])
+        self.assertEqual(len(small), len(large))
+
+    def test_invalidates_cached_cards(self):
+        client.get(reverse("menu:cards-detail", kwargs={"pk": self.menu.pk}))
+        client.login(username="test", password="test")
+        self.post("set", self.dishes[:1])
+        client.logout()
+        response = client.get(reverse("menu:cards-detail", kwargs={"pk": self.menu.pk}))
+        self.assertEqual([dish["id"] for dish in response.data["dish"]], [self.dishes[0].pk])
+
+    def test_invalid_dish(self):
+        client.login(username="test", password="test")
+        response = client.post(self.url, {"action": "add", "dishes": [self.dishes[0].pk, 0]},
+                               content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["dishes"], ['Invalid pk "0" - object does not exist.'])
+        self.assertEqual(self.menu_dish_ids(), {dish.pk for dish in self.dishes[:3]})
+
+    def test_invalid_action(self):
+        client.login(username="test", password="test")
+        response = self.post("replace", self.dishes[:1])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("action", response.data)
+
+    def test_other_user(self):
+        client.login(username="other", password="other")
+        response = self.post("set", [])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(len(self.menu_dish_ids()), 3)
+
+    def test_not_logged_user(self):
+        response = self.post("set", [])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,161 @@
+import json
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import AsyncClient, Client, RequestFactory, TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from config.metrics import MetricsMiddleware, Registry, RequestMetrics, collect, registry
+from menu.models import Dish
+
+client = Client()
+
+
+def create_dishes(user, count=3):
+    Dish.objects.bulk_create(
+        Dish(name=f"Dish {i}", description="Test description", price="10.50", prep_time=10, is_vegetarian=False,
+             author=user)
+        for i in range(count)
+    )
+
+
+def sample_line(text, prefix):
+    return next(line for line in text.splitlines() if line.startswith(prefix))
+
+
+class MetricsMiddlewareTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        registry.reset()
+        self.user = get_user_model().objects.create_user(username="test", password="test")
+        create_dishes(self.user)
+        client.login(username="test", password="test")
+        for patcher in (patch("config.metrics.METRICS_SAMPLE_RATE", 1),
+                        patch("config.metrics.METRICS_ALLOWED_IPS", ["127.0.0.1"])):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def metrics(self):
+        response = client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return response.content.decode()
+
+    def test_records_requests_by_view(self):
+        client.get(reverse("menu:dishes-list"))
+        client.get(reverse("menu:dishes-list"))
+        client.get(reverse("menu:dishes-detail", args=[0]))
+        text = self.metrics()
+
+        labels = 'view="menu:dishes-list",method="GET"'
+        self.assertIn(f'http_requests_total{{{labels},status="200"}} 2', text)
+        self.assertIn('http_requests_total{view="menu:dishes-detail",method="GET",status="404"} 1', text)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', text)
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 2', text)
+        self.assertIn("# TYPE http_request_duration_seconds histogram", text)
+
+    def test_counts_queries_and_times(self):
+        with self.assertLogs("metrics", "INFO") as logs:
+            client.get(reverse("menu:dishes-list"))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["view"], "menu:dishes-list")
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["db_queries"], 0)
+        self.assertGreater(record["serialization_ms"], 0)
+        self.assertGreaterEqual(record["duration_ms"], record["db_ms"])
+
+        text = self.metrics()
+        queries = sample_line(text, 'http_request_db_queries_sum{view="menu:dishes-list"')
+        self.assertEqual(float(queries.split()[-1]), record["db_queries"])
+        self.assertIn('http_request_serialization_duration_seconds_total{view="menu:dishes-list"', text)
+
+    def test_unmatched_paths_share_a_label(self):
+        client.get("/missing/1/")
+        client.get("/missing/2/")
+        self.assertIn('http_requests_total{view="unmatched",method="GET",status="404"} 2', self.metrics())
+
+    def test_nonstandard_methods_share_a_label(self):
+        client.generic("FOO", reverse("menu:dishes-list"))
+        client.generic("BAR", reverse("menu:dishes-list"))
+        text = self.metrics()
+        self.assertIn('http_requests_total{view="menu:dishes-list",method="other",status="405"} 2', text)
+        self.assertNotIn('method="FOO"', text)
+
+    def test_metrics_endpoint_is_internal(self):
+        response = client.get(reverse("metrics"), REMOTE_ADDR="10.0.0.1")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_metrics_endpoint_needs_opt_in(self):
+        with patch("config.metrics.METRICS_ALLOWED_IPS", []):
+            self.assertEqual(client.get(reverse("metrics")).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_totals_of_all_processes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        other_process = Registry(directory)
+        other_process.record("menu:dishes-list", "GET", 200, RequestMetrics(), 0.01)
+
+        with patch.object(registry, "directory", directory):
+            client.get(reverse("menu:dishes-list"))
+            text = self.metrics()
+        labels = 'view="menu:dishes-list",method="GET"'
+        self.assertIn(f'http_requests_total{{{labels},status="200"}} 2', text)
+        self.assertIn(f'http_request_duration_seconds_count{{{labels}}} 2', text)
+
+    def test_process_files_are_flushed_at_most_every_interval(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        process = Registry(directory, flush_interval=60)
+        process.record("menu:dishes-list", "GET", 200, RequestMetrics(), 0.01)
+        process.record("menu:dishes-list", "GET", 200, RequestMetrics(), 0.01)
+        text = collect(directory).render()
+        self.assertIn('http_requests_total{view="menu:dishes-list",method="GET",status="200"} 1', text)
+
+        process.flush(force=True)
+        text = collect(directory).render()
+        self.assertIn('http_requests_total{view="menu:dishes-list",method="GET",status="200"} 2', text)
+
+    def test_sampling(self):
+        request = RequestFactory().get("/")
+        with patch("config.metrics.METRICS_SAMPLE_RATE", 0):
+            with self.assertRaises(MiddlewareNotUsed):
+                MetricsMiddleware(lambda request: HttpResponse())
+
+        with patch("config.metrics.METRICS_SAMPLE_RATE", 0.5):
+            middleware = MetricsMiddleware(lambda request: HttpResponse())
+            with patch("config.metrics.random.random", return_value=0.9):
+                middleware(request)
+            self.assertNotIn("http_requests_total{", registry.render())
+            with patch("config.metrics.random.random", return_value=0.1):
+                middleware(request)
+            self.assertIn('http_requests_total{view="unmatched",method="GET",status="200"} 1', registry.render())
+
+
+class AsyncMetricsMiddlewareTest(TransactionTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        registry.reset()
+        patcher = patch("config.metrics.METRICS_SAMPLE_RATE", 1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        user = get_user_model().objects.create_user(username="test", password="test")
+        create_dishes(user)
+        self.token = Token.objects.create(user=user)
+
+    def test_counts_queries_of_async_views(self):
+        with self.assertLogs("metrics", "INFO") as logs:
+            response = async_to_sync(AsyncClient().get)(
+                reverse("menu:async-dishes-list"), AUTHORIZATION=f"Token {self.token.key}"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["view"], "menu:async-dishes-list")
+        self.assertGreater(record["db_queries"], 0)
@@ -1,3 +1,6 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.db import DataError, IntegrityError
 from django.test import TestCase
 
@@ -36,6 +39,8 @@ class MenuTests(TestCase):
                 "description",
                 "created_at",
                 "updated_at",
+                "dishes_count",
+                "search_vector",
             ],
         )
 
@@ -109,6 +114,9 @@ class DishTests(TestCase):
                 "updated_at",
                 "is_vegetarian",
                 "image",
+                "image_width",
+                "image_height",
+                "image_variants",
             ],
         )
 
@@ -147,3 +155,67 @@ class DishTests(TestCase):
         )
         with self.assertRaises(DataError):
             dish.save()
+
+
+class MenuDishesCountTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create(username="Adam")
+        self.dishes = [
+            Dish.objects.create(
+                name=f"Test Dish {i}",
+                description="Test description",
+                price="10.50",
+                prep_time=60,
+                is_vegetarian=False,
+                author=self.user,
+            )
+            for i in range(3)
+        ]
+        self.menu = Menu.objects.create(name="Test Menu 1", description="Test menu description 1", author=self.user)
+        self.other_menu = Menu.objects.create(name="Test Menu 2", description="Test menu description 2", author=self.user)
+
+    def assertDishesCount(self, menu, count):
+        self.assertEqual(Menu.objects.get(pk=menu.pk).dishes_count, count)
+
+    def test_new_menu_is_empty(self):
+        self.assertEqual(self.menu.dishes_count, 0)
+
+    def test_add_and_remove(self):
+        self.menu.dish.add(*self.dishes)
+        self.assertEqual(self.menu.dishes_count, 3)
+        self.assertDishesCount(self.menu, 3)
+
+        self.menu.dish.add(self.dishes[0])
+        self.menu.dish.remove(self.dishes[0])
+        self.assertDishesCount(self.menu, 2)
+
+    def test_set_and_clear(self):
+        self.menu.dish.set(self.dishes[:2])
+        self.assertDishesCount(self.menu, 2)
+        self.menu.dish.clear()
+        self.assertDishesCount(self.menu, 0)
+
+    def test_reverse_side(self):
+        self.dishes[0].menu.add(self.menu, self.other_menu)
+        self.assertDishesCount(self.menu, 1)
+        self.assertDishesCount(self.other_menu, 1)
+
+        self.dishes[0].menu.clear()
+        self.assertDishesCount(self.menu, 0)
+        self.assertDishesCount(self.other_menu, 0)
+
+    def test_dish_delete(self):
+        self.menu.dish.add(*self.dishes)
+        self.other_menu.dish.add(self.dishes[0])
+
+        self.dishes[0].delete()
+        self.assertDishesCount(self.menu, 2)
+        self.assertDishesCount(self.other_menu, 0)
+
+    def test_repair_command(self):
+        self.menu.dish.add(*self.dishes)
+        Menu.objects.update(dishes_count=7)
+
+        call_command("repair_dishes_count", batch_size=1, stdout=StringIO())
+        self.assertDishesCount(self.menu, 3)
+        self.assertDishesCount(self.other_menu, 0)
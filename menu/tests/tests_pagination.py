@@ -0,0 +1,98 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from menu.models import Dish, Menu
+from menu.pagination import KeysetPagination
+
+client = Client()
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="test", password="test")
+        client.login(username="test", password="test")
+        now = timezone.now()
+        self.dishes = []
+        for i in range(7):
+            dish = self.create_dish(f"Test Dish {i}")
+            # Dishes 2 and 3 share created_at to exercise the pk tie breaker.
+            Dish.objects.filter(pk=dish.pk).update(created_at=now + timedelta(minutes=min(i, 2) if i < 4 else i))
+            self.dishes.append(dish)
+
+    def create_dish(self, name):
+        return Dish.objects.create(
+            name=name,
+            description="Test description",
+            price="10.50",
+            prep_time=60,
+            is_vegetarian=False,
+            author=self.user,
+        )
+
+    def collect(self, url, params=None, link="next"):
+        ids = []
+        response = client.get(url, params or {})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(item["id"] for item in response.data["results"])
+            if not response.data[link]:
+                return ids, response
+            response = client.get(response.data[link])
+
+    def test_first_page(self):
+        response = client.get(reverse("menu:dishes-list"), {"page_size": 3})
+        self.assertEqual([item["id"] for item in response.data["results"]], [d.pk for d in self.dishes[:3]])
+        self.assertIsNotNone(response.data["next"])
+        self.assertIsNone(response.data["previous"])
+
+    def test_walk_forward_and_back(self):
+        ids, last_page = self.collect(reverse("menu:dishes-list"), {"page_size": 3})
+        self.assertEqual(ids, [d.pk for d in self.dishes])
+
+        response = client.get(last_page.data["previous"])
+        self.assertEqual([item["id"] for item in response.data["results"]], [d.pk for d in self.dishes[3:6]])
+        self.assertIsNotNone(response.data["next"])
+
+    def test_stable_under_inserts(self):
+        response = client.get(reverse("menu:dishes-list"), {"page_size": 3})
+        new_dish = self.create_dish("Inserted Dish")
+        Dish.objects.filter(pk=new_dish.pk).update(created_at=timezone.now() - timedelta(days=1))
+
+        response = client.get(response.data["next"])
+        self.assertEqual([item["id"] for item in response.data["results"]], [d.pk for d in self.dishes[3:6]])
+
+    @patch.object(KeysetPagination, "max_page_size", 4)
+    def test_max_page_size(self):
+        response = client.get(reverse("menu:dishes-list"), {"page_size": 10 ** 6})
+        self.assertEqual(len(response.data["results"]), 4)
+
+    def test_invalid_cursor(self):
+        response = client.get(reverse("menu:dishes-list"), {"cursor": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cards_ordered_by_dishes_count(self):
+        for i in range(5):
+            menu = Menu.objects.create(name=f"Menu {i}", description="Test menu description", author=self.user)
+            menu.dish.set(self.dishes[:i % 3 + 1])
+        expected = list(Menu.objects.order_by("-dishes_count", "-pk").values_list("pk", flat=True))
+
+        ids, _ = self.collect(reverse("menu:cards-list"), {"ordering": "-dishes_count", "page_size": 2})
+        self.assertEqual(ids, expected)
+
+    def test_cards_ordered_by_name_backwards(self):
+        for i in range(5):
+            menu = Menu.objects.create(name=f"Menu {i}", description="Test menu description", author=self.user)
+            menu.dish.add(self.dishes[0])
+
+        forward, last_page = self.collect(reverse("menu:cards-list"), {"ordering": "name", "page_size": 2})
+        backward, _ = self.collect(last_page.data["previous"], link="previous")
+        self.assertEqual(len(forward), 5)
+        self.assertCountEqual(backward, forward[:-1])
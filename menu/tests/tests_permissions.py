@@ -1,8 +1,19 @@
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
 
 from menu.models import Dish, Menu
-from menu.permissions import IsOwnerOrStaffOrAdminOrReadOnly, IsOwnerOrStaffOrAdmin
+from menu.permissions import (
+    ANONYMOUS_SNAPSHOT,
+    IsOwnerOrStaffOrAdminOrReadOnly,
+    IsOwnerOrStaffOrAdmin,
+    get_permission_snapshot,
+)
 
 
 class NotLoggedInUser:
@@ -474,4 +485,94 @@ class IsOwnerOrStaffOrAdminTest(TestCase):
 
         permission = permission_check
 
-        self.assertFalse(permission)
\ No newline at end of file
+        self.assertFalse(permission)
+
+class PermissionSnapshotTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        # The LocMemCache of the tests stands in for a cache shared by processes.
+        patcher = patch("menu.permissions.shared_cache", return_value=cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.factory = RequestFactory()
+        self.user = get_user_model().objects.create(username="normal")
+        self.permission = Permission.objects.get(codename="view_menu")
+        self.group = Group.objects.create(name="editors")
+
+    def request(self):
+        request = self.factory.get("/")
+        request.user = get_user_model().objects.get(pk=self.user.pk)
+        return request
+
+    def test_demoted_staff_loses_write_access(self):
+        self.user.is_staff = True
+        self.user.save()
+        menu = Menu.objects.create(name="Other Menu", description="Test menu description",
+                                   author=get_user_model().objects.create(username="author"))
+        request = self.factory.put("/")
+        request.user = get_user_model().objects.get(pk=self.user.pk)
+        self.assertTrue(IsOwnerOrStaffOrAdmin().has_object_permission(request, None, menu))
+
+        get_user_model().objects.filter(pk=self.user.pk).update(is_staff=False)
+        request = self.factory.put("/")
+        request.user = get_user_model().objects.get(pk=self.user.pk)
+        self.assertFalse(IsOwnerOrStaffOrAdmin().has_object_permission(request, None, menu))
+
+    def test_snapshot_loaded_once_per_request(self):
+        request = self.request()
+        snapshot = get_permission_snapshot(request)
+        with self.assertNumQueries(0):
+            self.assertIs(get_permission_snapshot(request), snapshot)
+
+    def test_snapshot_shared_between_requests(self):
+        get_permission_snapshot(self.request())
+        request = self.request()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_permission_snapshot(request).permissions, frozenset())
+
+    def test_anonymous_snapshot(self):
+        request = self.factory.get("/")
+        request.user = NotLoggedInUser()
+        self.assertEqual(get_permission_snapshot(request), ANONYMOUS_SNAPSHOT)
+
+    def test_user_permission_change_invalidates(self):
+        get_permission_snapshot(self.request())
+        self.user.user_permissions.add(self.permission)
+
+        snapshot = get_permission_snapshot(self.request())
+        self.assertEqual(snapshot.user_permissions, frozenset({"menu.view_menu"}))
+
+    def test_group_permission_change_invalidates(self):
+        self.user.groups.add(self.group)
+        get_permission_snapshot(self.request())
+        self.group.permissions.add(self.permission)
+
+        snapshot = get_permission_snapshot(self.request())
+        self.assertEqual(snapshot.user_permissions, frozenset())
+        self.assertEqual(snapshot.permissions, frozenset({"menu.view_menu"}))
+
+    def test_group_membership_change_invalidates(self):
+        self.group.permissions.add(self.permission)
+        get_permission_snapshot(self.request())
+        self.group.user_set.add(self.user)
+
+        self.assertEqual(get_permission_snapshot(self.request()).permissions, frozenset({"menu.view_menu"}))
+
+    def test_staff_change_grants_write_access(self):
+        get_permission_snapshot(self.request())
+        menu = Menu.objects.create(name="Other Menu", description="Test menu description",
+                                   author=get_user_model().objects.create(username="author"))
+        self.user.is_staff = True
+        self.user.save()
+
+        request = self.request()
+        request.method = "PUT"
+        self.assertTrue(IsOwnerOrStaffOrAdmin().has_object_permission(request, None, menu))
+
+    def test_not_cached_without_shared_cache(self):
+        with patch("menu.permissions.shared_cache", return_value=None):
+            get_permission_snapshot(self.request())
+            request = self.request()
+            with CaptureQueriesContext(connection) as queries:
+                get_permission_snapshot(request)
+        self.assertGreater(len(queries), 0)
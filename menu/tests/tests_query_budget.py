@@ -0,0 +1,245 @@
+"""
+Query budgets of every API route.
+
+Each ``Endpoint`` is requested by every user on a small and on a large
+catalogue (menus x dishes per menu). A request fails the suite when its query
+count differs between the two catalogues, i.e. grows with the data (N+1), or
+exceeds the budget recorded below. Caches are cleared before every request,
+so budgets include loading the permission snapshot. Endpoints taking a list
+body are also requested with 1 and ``BULK_ITEMS`` items, the query count must
+not grow with the number of items either.
+
+Budgets are the counts on SQLite, where reindexing menus for search is a
+delete and an insert on the FTS table; on PostgreSQL it is one update.
+"""
+from collections import namedtuple
+from functools import partial
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+
+from menu.models import Dish, Menu
+from menu.urls import router
+
+client = Client()
+
+ANONYMOUS, OWNER, STAFF = 'anonymous', 'owner', 'staff'
+CATALOGUES = [(2, 2), (6, 5)]
+BULK_ITEMS = 10
+
+# ``budgets`` maps a user to the expected status code and the maximum number of queries.
+Endpoint = namedtuple('Endpoint', ['route', 'method', 'url', 'data', 'budgets'])
+
+
+def dish_data(catalogue):
+    return {"name": "Soup", "description": "Test description", "price": "12.00", "prep_time": 5,
+            "is_vegetarian": True}
+
+
+def menu_data(catalogue):
+    # Dishes of the last menu, so updating the first menu replaces all of its dishes.
+    return {"name": "New Menu", "description": "Test menu description", "dish": catalogue.dish_ids[-2:]}
+
+
+def first_dish(catalogue):
+    return reverse("menu:dishes-detail", args=[catalogue.dish_ids[0]])
+
+
+def first_menu(catalogue):
+    return reverse("menu:cards-detail", args=[catalogue.menu_ids[0]])
+
+
+def url(name):
+    return lambda catalogue: reverse(name)
+
+
+DENIED = status.HTTP_403_FORBIDDEN
+
+ENDPOINTS = [
+    # Token and user.
+    Endpoint('api-root', 'get', url("menu:api-root"), None,
+             {ANONYMOUS: (DENIED, 0), OWNER: (200, 1), STAFF: (200, 1)}),
+
+    # Token, list validators (Max(updated_at), Count(id)), page.
+    Endpoint('dishes-list', 'get', url("menu:dishes-list"), None,
+             {ANONYMOUS: (DENIED, 0), OWNER: (200, 3), STAFF: (200, 3)}),
+    # Token, insert.
+    Endpoint('dishes-list', 'post', url("menu:dishes-list"), dish_data,
+             {ANONYMOUS: (DENIED, 0), OWNER: (201, 2), STAFF: (201, 2)}),
+    # Token, dishes, savepoint, one CASE update, menus of the dishes, reindex of the menus, release.
+    Endpoint('dishes-list', 'patch', url("menu:dishes-list"),
+             lambda catalogue: [{"id": pk, "name": "Renamed"} for pk in catalogue.dish_ids[:2]],
+             {ANONYMOUS: (DENIED, 0), OWNER: (200, 8), STAFF: (200, 8)}),
+    # Token, dishes, savepoint, menus of the dishes, memberships, collector select and delete of the
+    # dishes with their (already deleted) memberships, dishes_count of the menus, reindex, release.
+    Endpoint('dishes-list', 'delete', url("menu:dishes-list"), lambda catalogue: catalogue.dish_ids[:2],
+             {ANONYMOUS: (DENIED, 0), OWNER: (204, 12), STAFF: (204, 12)}),
+    # Token, dish.
+    Endpoint('dishes-detail', 'get', first_dish, None,
+             {ANONYMOUS: (DENIED, 0), OWNER: (200, 2), STAFF: (200, 2)}),
+    # Token, dish, update, menus of the dish, reindex of the menus.
+    Endpoint('dishes-detail', 'put', first_dish, dish_data,
+             {ANONYMOUS: (DENIED, 0), OWNER: (200, 6), STAFF: (200, 6)}),
+    Endpoint('dishes-detail', 'patch', first_dish, lambda catalogue: {"name": "Renamed"},
+             {ANONYMOUS: (DENIED, 0), OWNER: (200, 6), STAFF: (200, 6)}),
+    # Token, dish, its menus, memberships, dish, dishes_count of the menus, reindex of the menus.
+    Endpoint('dishes-detail', 'delete', first_dish, None,
+             {ANONYMOUS: (DENIED, 0), OWNER: (204, 8), STAFF: (204, 8)}),
+    # Token, streamed rows.
+    Endpoint('dishes-export', 'get', url("menu:dishes-export"), None,
+             {ANONYMOUS: (DENIED, 0), OWNER: (200, 2), STAFF: (200, 2)}),
+
+    # Validators of cards and of dishes, page, dishes of the page; with a user also the token
+    # and the permission snapshot (user and group permissions).
+    Endpoint('cards-list', 'get', url("menu:cards-list"), None,
+             {ANONYMOUS: (200, 4), OWNER: (200, 7), STAFF: (200, 7)}),
+    # Token, unique name, dishes (validation and write), insert, reindex, current dishes, existing
+    # memberships, insert of memberships, dishes_count, reindex, response (menu and dishes).
+    Endpoint('cards-list', 'post', url("menu:cards-list"), menu_data,
+             {ANONYMOUS: (DENIED, 0), OWNER: (201, 15), STAFF: (201, 15)}),
+    # Card and its dishes; with a user also the token and the permission snapshot.
+    Endpoint('cards-detail', 'get', first_menu, None,
+             {ANONYMOUS: (200, 2), OWNER: (200, 5), STAFF: (200, 5)}),
+    # Token, permission snapshot, card and dishes, unique name, dishes, update, reindex, then the
+    # removal and the addition of dishes, each with dishes_count, reindex and a refresh of the card,
+    # response dishes.
+    Endpoint('cards-detail', 'put', first_menu, menu_data,
+             {ANONYMOUS: (DENIED, 0), OWNER: (200, 24), STAFF: (200, 24)}),
+    # Token, permission snapshot, card and dishes, update, reindex, response dishes.
+    Endpoint('cards-detail', 'patch', first_menu, lambda catalogue: {"description": "Changed"},
+             {ANONYMOUS: (DENIED, 0), OWNER: (200, 9), STAFF: (200, 9)}),
+    # Token, permission snapshot, card and dishes, memberships, card, removal from the search index.
+    Endpoint('cards-detail', 'delete', first_menu, None,
+             {ANONYMOUS: (DENIED, 0), OWNER: (204, 8), STAFF: (204, 8)}),
+    # Token, card, dishes, savepoint, locked card, memberships, delete and insert of memberships,
+    # dishes_count, reindex, release, dishes_count of the response.
+    Endpoint('cards-dishes', 'post', lambda catalogue: reverse("menu:cards-dishes", args=[catalogue.menu_ids[0]]),
+             lambda catalogue: {"action": "set", "dishes": catalogue.dish_ids[-2:]},
+             {ANONYMOUS: (DENIED, 0), OWNER: (200, 13), STAFF: (200, 13)}),
+    # Streamed rows and their dishes; with a user also the token and the permission snapshot.
+    Endpoint('cards-export', 'get', url("menu:cards-export"), None,
+             {ANONYMOUS: (200, 2), OWNER: (200, 5), STAFF: (200, 5)}),
+
+    # The async views run the viewsets above and count the same queries.
+    Endpoint('async-dishes-list', 'get', url("menu:async-dishes-list"), None,
+             {ANONYMOUS: (DENIED, 0), OWNER: (200, 3), STAFF: (200, 3)}),
+    Endpoint('async-dishes-detail', 'get',
+             lambda catalogue: reverse("menu:async-dishes-detail", args=[catalogue.dish_ids[0]]), None,
+             {ANONYMOUS: (DENIED, 0), OWNER: (200, 2), STAFF: (200, 2)}),
+    Endpoint('async-cards-list', 'get', url("menu:async-cards-list"), None,
+             {ANONYMOUS: (200, 4), OWNER: (200, 7), STAFF: (200, 7)}),
+    Endpoint('async-cards-detail', 'get',
+             lambda catalogue: reverse("menu:async-cards-detail", args=[catalogue.menu_ids[0]]), None,
+             {ANONYMOUS: (200, 2), OWNER: (200, 5), STAFF: (200, 5)}),
+]
+
+# List bodies of ``count`` items by method of ``dishes-list``, with the expected status code.
+BULK_PAYLOADS = {
+    'post': (201, lambda catalogue, count: [dish_data(catalogue) for _ in range(count)]),
+    'patch': (200, lambda catalogue, count: [{"id": pk, "name": "Renamed"} for pk in catalogue.dish_ids[:count]]),
+    'delete': (204, lambda catalogue, count: catalogue.dish_ids[:count]),
+}
+
+
+class Catalogue:
+    """``menus`` menus of ``dishes`` dishes each, all by the owner."""
+
+    def __init__(self, menus, dishes):
+        User = get_user_model()
+        self.users = {
+            OWNER: User.objects.create_user(username="owner"),
+            STAFF: User.objects.create_user(username="staff", is_staff=True),
+        }
+        self.tokens = {name: Token.objects.create(user=user).key for name, user in self.users.items()}
+        owner = self.users[OWNER]
+
+        Dish.objects.bulk_create(
+            Dish(name=f"Dish {i}", description="Test description", price="10.50", prep_time=10,
+                 is_vegetarian=bool(i % 2), author=owner)
+            for i in range(menus * dishes)
+        )
+        self.dish_ids = list(Dish.objects.order_by("pk").values_list("pk", flat=True))
+        Menu.objects.bulk_create(
+            Menu(name=f"Menu {i}", description="Test menu description", author=owner) for i in range(menus)
+        )
+        self.menu_ids = list(Menu.objects.order_by("pk").values_list("pk", flat=True))
+        Menu.dish.through.objects.bulk_create(
+            Menu.dish.through(menu_id=menu_id, dish_id=dish_id)
+            for i, menu_id in enumerate(self.menu_ids)
+            for dish_id in self.dish_ids[i * dishes:(i + 1) * dishes]
+        )
+        Menu.objects.refresh_dishes_count()
+
+    def headers(self, user):
+        return {} if user == ANONYMOUS else {"HTTP_AUTHORIZATION": f"Token {self.tokens[user]}"}
+
+
+class QueryBudgetTest(TestCase):
+
+    def measure(self, endpoint, user, catalogue_size):
+        """Status code and query count of one request, with every change rolled back afterwards."""
+        with transaction.atomic():
+            catalogue = Catalogue(*catalogue_size)
+            path = endpoint.url(catalogue)
+            data = endpoint.data(catalogue) if endpoint.data else None
+            kwargs = {"content_type": "application/json"} if data is not None else {}
+            cache.clear()
+
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(client, endpoint.method)(path, data, **kwargs, **catalogue.headers(user))
+                if response.streaming:
+                    b"".join(response.streaming_content)
+            transaction.set_rollback(True)
+        return response.status_code, len(queries)
+
+    def test_budgets(self):
+        for endpoint in ENDPOINTS:
+            for user, (expected_status, budget) in endpoint.budgets.items():
+                with self.subTest(route=endpoint.route, method=endpoint.method, user=user):
+                    small, large = (self.measure(endpoint, user, size) for size in CATALOGUES)
+                    self.assertEqual(small[0], expected_status)
+                    self.assertEqual(large[0], expected_status)
+                    self.assertEqual(large[1], small[1], "query count grows with the catalogue")
+                    self.assertLessEqual(small[1], budget, "query budget exceeded")
+
+    def test_bulk_queries_do_not_grow_with_items(self):
+        for method, (expected_status, data) in BULK_PAYLOADS.items():
+            # Without RETURNING from bulk inserts (SQLite) created dishes are saved one by one.
+            if method == 'post' and not connection.features.can_return_rows_from_bulk_insert:
+                continue
+            for user in (OWNER, STAFF):
+                with self.subTest(method=method, user=user):
+                    one, many = (
+                        self.measure(Endpoint('dishes-list', method, url("menu:dishes-list"),
+                                              partial(data, count=count), {}), user, CATALOGUES[-1])
+                        for count in (1, BULK_ITEMS)
+                    )
+                    self.assertEqual(one[0], expected_status)
+                    self.assertEqual(many[0], expected_status)
+                    self.assertEqual(many[1], one[1], "query count grows with the number of items")
+
+    @patch("menu.mixins.FAST_LIST_SERIALIZATION", False)
+    def test_serializer_lists_do_not_grow(self):
+        for endpoint in ENDPOINTS:
+            if endpoint.method != 'get':
+                continue
+            for user in endpoint.budgets:
+                with self.subTest(route=endpoint.route, user=user):
+                    small, large = (self.measure(endpoint, user, size) for size in CATALOGUES)
+                    self.assertEqual(large[1], small[1], "query count grows with the catalogue")
+
+    def test_every_route_has_a_budget(self):
+        budgeted = {(endpoint.route, endpoint.method) for endpoint in ENDPOINTS}
+        for pattern in router.urls:
+            actions = getattr(pattern.callback, 'actions', None) or {'get': None}
+            # HEAD is answered by the GET action.
+            for method in set(actions) - {'head'}:
+                with self.subTest(route=pattern.name, method=method):
+                    self.assertIn((pattern.name, method), budgeted)
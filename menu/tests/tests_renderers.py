@@ -0,0 +1,38 @@
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from unittest import skipIf
+from uuid import UUID
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from menu.renderers import FastJSONRenderer, NDJSONRenderer, orjson
+
+
+@skipIf(orjson is None, "orjson is not installed")
+class FastJSONRendererTest(SimpleTestCase):
+    data = {
+        "price": Decimal("12.50"),
+        "created": datetime(2021, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+        "updated": datetime(2021, 5, 1, 12, 30),
+        "day": date(2021, 5, 1),
+        "time": time(8, 15, 30, 5000),
+        "label": gettext_lazy("Menu"),
+        "uuid": UUID("2a3fae7b-e880-41eb-8f98-fa693d19a67d"),
+        "description": "\u017burek\u2028z jajkiem\u2029",
+        1: "int key",
+        "dishes": [None, True, 1.5, {"name": "Żurek"}],
+    }
+
+    def test_output_identical_to_json_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(self.data), JSONRenderer().render(self.data))
+
+    def test_aware_datetime_in_utc_ends_with_z(self):
+        self.assertIn(b'"created":"2021-05-01T12:30:15.123456Z"', FastJSONRenderer().render(self.data))
+
+    def test_ndjson_lines_identical_to_json_renderer(self):
+        content = NDJSONRenderer().render([self.data, {"price": Decimal("1.50")}])
+        self.assertEqual(
+            content.splitlines(), [JSONRenderer().render(self.data), JSONRenderer().render({"price": Decimal("1.50")})]
+        )
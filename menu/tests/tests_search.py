@@ -0,0 +1,105 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from menu.models import Dish, Menu
+from menu.search import RANK_FIELD, get_search_backend, search_terms
+
+client = Client()
+
+
+class MenuSearchTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(username="test", password="test")
+        self.soup = self.create_dish("Tomato Soup")
+        self.pasta = self.create_dish("Pasta Carbonara")
+        self.lunch = Menu.objects.create(name="Lunch", description="Served from noon", author=self.user)
+        self.lunch.dish.add(self.soup, self.pasta)
+        self.italian = Menu.objects.create(name="Italian", description="Pasta and pizza", author=self.user)
+        self.italian.dish.add(self.pasta)
+
+    def create_dish(self, name):
+        return Dish.objects.create(
+            name=name, description="Test description", price="10.50", prep_time=10, is_vegetarian=True,
+            author=self.user,
+        )
+
+    def search(self, text):
+        return list(get_search_backend().search(Menu.objects.all(), search_terms(text)).values_list('pk', flat=True))
+
+    def test_search_terms(self):
+        self.assertEqual(search_terms('"pasta" & (soup:*'), ["pasta", "soup"])
+
+    def test_prefix_match_on_all_terms(self):
+        self.assertEqual(self.search("tom sou"), [self.lunch.pk])
+        self.assertEqual(self.search("tomato pizza"), [])
+
+    def test_ranks_description_over_dish_names(self):
+        ranked = get_search_backend().search(Menu.objects.all(), ["pasta"]).order_by('-' + RANK_FIELD, 'pk')
+        self.assertEqual([menu.pk for menu in ranked], [self.italian.pk, self.lunch.pk])
+
+    def test_menu_update_is_indexed(self):
+        self.lunch.name = "Brunch"
+        self.lunch.save()
+        self.assertEqual(self.search("brunch"), [self.lunch.pk])
+        self.assertEqual(self.search("lunch"), [])
+
+    def test_dish_rename_is_indexed(self):
+        self.soup.name = "Gazpacho"
+        self.soup.save()
+        self.assertEqual(self.search("gazpacho"), [self.lunch.pk])
+        self.assertEqual(self.search("tomato"), [])
+
+    def test_dish_membership_is_indexed(self):
+        self.lunch.dish.remove(self.soup)
+        self.assertEqual(self.search("soup"), [])
+        self.soup.menu.add(self.italian)
+        self.assertEqual(self.search("soup"), [self.italian.pk])
+        self.soup.menu.clear()
+        self.assertEqual(self.search("soup"), [])
+
+    def test_dish_delete_is_indexed(self):
+        self.pasta.delete()
+        self.assertEqual(self.search("carbonara"), [])
+
+    def test_menu_delete_is_indexed(self):
+        self.lunch.delete()
+        self.assertEqual(self.search("soup"), [])
+
+    def test_rebuild_search_index(self):
+        Menu.objects.filter(pk=self.lunch.pk).update(name="Brunch")
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self.search("brunch"), [self.lunch.pk])
+
+    def test_paginate_ranked_results(self):
+        client.login(username="test", password="test")
+        response = client.get(reverse("menu:cards-list"), {"search": "pasta", "page_size": 1})
+        self.assertEqual([menu["id"] for menu in response.data["results"]], [self.italian.pk])
+
+        response = client.get(response.data["next"])
+        self.assertEqual([menu["id"] for menu in response.data["results"]], [self.lunch.pk])
+        self.assertIsNone(response.data["next"])
+
+    def test_explicit_ordering_overrides_rank(self):
+        client.login(username="test", password="test")
+        response = client.get(reverse("menu:cards-list"), {"search": "pasta", "ordering": "name"})
+        self.assertEqual([menu["id"] for menu in response.data["results"]], [self.italian.pk, self.lunch.pk])
+
+        response = client.get(reverse("menu:cards-list"), {"search": "pasta", "ordering": "-name"})
+        self.assertEqual([menu["id"] for menu in response.data["results"]], [self.lunch.pk, self.italian.pk])
+
+    def test_search_uses_full_text_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("FTS5 table is specific to SQLite")
+        queryset = get_search_backend().search(Menu.objects.all(), ["pasta"])
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            plan = " ".join(row[-1] for row in cursor.fetchall())
+        self.assertIn("VIRTUAL TABLE", plan)
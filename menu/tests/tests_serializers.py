@@ -1,9 +1,10 @@
 from datetime import datetime
+from unittest.mock import patch
 
 from django.test import TestCase
 
 from menu.models import Menu, Dish
-from menu.serializers import MenuSerializer, DishSerializer
+from menu.serializers import MenuReadSerializer, MenuSerializer, DishSerializer
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -72,7 +73,8 @@ class DishSerializerTests(TestCase):
     def test_contain_expected_fields(self):
         data = self.serializer.data[0]
         self.assertCountEqual(data.keys(),
-                              ['id', 'name', 'description', 'price', 'prep_time', 'is_vegetarian', 'image'])
+                              ['id', 'name', 'description', 'price', 'prep_time', 'is_vegetarian', 'image',
+                               'image_width', 'image_height', 'image_variants'])
 
     def test_contain_expected_values(self):
         data = self.serializer.data[0]
@@ -83,3 +85,42 @@ class DishSerializerTests(TestCase):
         self.assertEqual(data['prep_time'], self.dish_meat.prep_time)
         self.assertEqual(data['is_vegetarian'], self.dish_meat.is_vegetarian)
         self.assertEqual(bool(data['image']), bool(self.dish_meat.image))
+
+
+class MenuReadSerializerTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='Test User', email='test@user.com', password='testpass123')
+        self.menu = Menu.objects.create(
+            name='Test Menu 1',
+            description='Test menu description 1',
+            author=self.user
+        )
+        self.dish_meat = Dish.objects.create(
+            name='Test Meat Dish 1',
+            description='Test meat description 1',
+            price='10.50',
+            prep_time=60,
+            is_vegetarian=False,
+            author=self.user
+        )
+        self.menu.dish.add(self.dish_meat)
+
+    def test_nested_dishes(self):
+        data = MenuReadSerializer(self.menu).data
+        self.assertEqual(list(data.keys()), ['id', 'name', 'description', 'created_at', 'updated_at', 'dish'])
+        self.assertEqual(data['dish'][0]['id'], self.dish_meat.id)
+        self.assertEqual(data['dish'][0]['price'], '10.50')
+        self.assertEqual(data['dish'][0]['author'], self.user.id)
+
+    def test_write_serializer_uses_primary_keys(self):
+        MenuReadSerializer(self.menu).data
+        self.assertEqual(MenuSerializer(self.menu).data['dish'], [self.dish_meat.id])
+        self.assertFalse(hasattr(MenuSerializer.Meta, 'depth'))
+
+    def test_fields_built_once_per_class(self):
+        MenuReadSerializer(self.menu).data
+        with patch('rest_framework.serializers.ModelSerializer.get_fields') as get_fields:
+            fields = MenuReadSerializer(self.menu).fields
+        get_fields.assert_not_called()
+        self.assertIsNot(fields['dish'], MenuReadSerializer(self.menu).fields['dish'])
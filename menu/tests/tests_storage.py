@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+
+from menu.models import Dish
+from menu.storage import TEMP_DIR, ContentAddressedStorage, serve_media
+
+
+class ContentAddressedStorageTest(TestCase):
+    def setUp(self) -> None:
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def test_name_is_content_hash(self):
+        name = self.storage.save("photos/Soup.JPG", ContentFile(b"soup"))
+        self.assertRegex(name, r"^photos/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$")
+        self.assertEqual(os.path.basename(name)[:2], name.split("/")[1])
+        with self.storage.open(name) as file:
+            self.assertEqual(file.read(), b"soup")
+
+    def test_same_content_is_stored_once(self):
+        first = self.storage.save("photos/soup.jpg", ContentFile(b"soup"))
+        second = self.storage.save("photos/other.jpg", ContentFile(b"soup"))
+        other = self.storage.save("photos/soup.jpg", ContentFile(b"pasta"))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        directories, _ = self.storage.listdir("photos")
+        stored = sum(len(self.storage.listdir(f"photos/{directory}")[1]) for directory in directories)
+        self.assertEqual(stored, 2)
+        self.assertEqual(os.listdir(self.storage.path(TEMP_DIR)), [])
+
+    def test_saving_again_refreshes_modified_time(self):
+        name = self.storage.save("photos/soup.jpg", ContentFile(b"soup"))
+        os.utime(self.storage.path(name), (0, 0))
+        self.storage.save("photos/soup.jpg", ContentFile(b"soup"))
+        self.assertGreater(os.path.getmtime(self.storage.path(name)), time.time() - 60)
+
+    def test_large_upload_is_hashed_in_chunks(self):
+        content = ContentFile(os.urandom(3 * 64 * 1024 + 5))
+        name = self.storage.save("photos/large.png", content)
+        self.assertEqual(self.storage.size(name), content.size)
+
+    def test_content_addressed_files_are_cached_forever(self):
+        name = self.storage.save("photos/soup.jpg", ContentFile(b"soup"))
+        shutil.copy(self.storage.path(name), self.storage.path("photos/legacy.jpg"))
+        request = RequestFactory().get("/media/")
+
+        response = serve_media(request, name, document_root=self.location)
+        self.assertEqual(response["Cache-Control"], "public, max-age=31536000, immutable")
+        legacy = serve_media(request, "photos/legacy.jpg", document_root=self.location)
+        self.assertFalse(legacy.has_header("Cache-Control"))
+
+
+class CollectMediaTest(TestCase):
+    def setUp(self) -> None:
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location)
+        settings = override_settings(MEDIA_ROOT=self.location,
+                                     DEFAULT_FILE_STORAGE="menu.storage.ContentAddressedStorage")
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.storage = Dish._meta.get_field("image").storage
+        self.user = get_user_model().objects.create_user(username="test", password="test")
+
+    def create_dish(self, image, variants=None):
+        return Dish.objects.create(name="Soup", description="Test description", price="10.50", prep_time=10,
+                                   is_vegetarian=False, author=self.user, image=image, image_variants=variants or {})
+
+    def save_old(self, name, content):
+        name = self.storage.save(name, ContentFile(content))
+        os.utime(self.storage.path(name), (0, 0))
+        return name
+
+    def collect(self, *args):
+        out = StringIO()
+        call_command("collect_media", *args, stdout=out)
+        return out.getvalue()
+
+    def test_deletes_only_unreferenced_files(self):
+        shared = self.save_old("photos/soup.jpg", b"soup")
+        variant = self.save_old("photos/variants/soup_thumbnail.webp", b"thumbnail")
+        orphan = self.save_old("photos/pasta.jpg", b"pasta")
+        recent = self.storage.save("photos/new.jpg", ContentFile(b"new"))
+        first = self.create_dish(shared, {"thumbnail": variant})
+        self.create_dish(shared)
+        first.delete()
+
+        output = self.collect()
+        self.assertIn("Deleted 2 unreferenced files", output)
+        self.assertFalse(self.storage.exists(orphan))
+        self.assertTrue(self.storage.exists(shared))
+        self.assertTrue(self.storage.exists(recent))
+        self.assertFalse(self.storage.exists(variant))
+
+    def test_dry_run_keeps_files(self):
+        orphan = self.save_old("photos/pasta.jpg", b"pasta")
+        self.assertIn("Would delete 1 unreferenced files", self.collect("--dry-run"))
+        self.assertTrue(self.storage.exists(orphan))
+
+    def test_min_age(self):
+        orphan = self.storage.save("photos/pasta.jpg", ContentFile(b"pasta"))
+        self.collect("--min-age", "0")
+        self.assertFalse(self.storage.exists(orphan))
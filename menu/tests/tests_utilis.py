@@ -1,11 +1,14 @@
 from datetime import date, timedelta
-from unittest.mock import patch, call
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import formats
 
 from config.settings import EMAIL_HOST_USER
-from menu.utils import send_email, send_update_email
+from menu.utils import deliver, iter_receiver_batches, send_email, send_update_email
 
 
 class SendEmailTest(TestCase):
@@ -41,34 +44,64 @@ class SendEmailTest(TestCase):
 
 class SendUpdateEmail(TestCase):
     def setUp(self) -> None:
-        self.empty_msg = '<!doctype html>\n<html lang="en">\n<head>\n    <meta charset="UTF-8">\n    <meta name="viewport"\n          content="width=device-width, user-scalable=no, initial-scale=1.0, maximum-scale=1.0, minimum-scale=1.0">\n    <meta http-equiv="X-UA-Compatible" content="ie=edge">\n    <title>Dishes update from April 26, 2021</title>\n</head>\n<body>\n<h1>Dishes update from April 26, 2021 </h1>\n\n    <h2> No new or updated dishes </h2>\n\n\n</body>\n</html>\n'
+        cache.clear()
+        self.date_to_search = formats.date_format(date.today() - timedelta(days=1))
+        self.empty_msg = f'<!doctype html>\n<html lang="en">\n<head>\n    <meta charset="UTF-8">\n    <meta name="viewport"\n          content="width=device-width, user-scalable=no, initial-scale=1.0, maximum-scale=1.0, minimum-scale=1.0">\n    <meta http-equiv="X-UA-Compatible" content="ie=edge">\n    <title>Dishes update from {self.date_to_search}</title>\n</head>\n<body>\n<h1>Dishes update from {self.date_to_search} </h1>\n\n    <h2> No new or updated dishes </h2>\n\n\n</body>\n</html>\n'
         self.date = date.today()
 
-    @patch("menu.utils.send_email")
-    def test_no_receiver(self, mock_send_email):
-        send_update_email()
-        mock_send_email.assert_not_called()
+    def test_no_receiver(self):
+        self.assertEqual(send_update_email(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
 
-    @patch("menu.utils.send_email")
-    def test_one_receiver(self, mock_send_email):
+    def test_one_receiver(self):
         get_user_model().objects.create(username="Adam", email="test@wp.pl")
         send_update_email()
-        mock_send_email.assert_called_once()
-        mock_send_email.assert_called_with(
-            "test@wp.pl", f"Update on {self.date}", self.empty_msg
-        )
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["test@wp.pl"])
+        self.assertEqual(mail.outbox[0].subject, f"Update on {self.date}")
+        self.assertEqual(mail.outbox[0].alternatives, [(self.empty_msg, "text/html")])
 
-    @patch("menu.utils.send_email")
-    def test_two_receiver(self, mock_send_email):
+    def test_two_receiver(self):
         get_user_model().objects.create(username="Adam", email="test@wp.pl")
         get_user_model().objects.create(username="Adam2", email="test2@wp.pl")
 
-        send_update_email()
+        self.assertEqual(send_update_email(), (2, 0))
+
+        self.assertCountEqual([email.to for email in mail.outbox], [["test@wp.pl"], ["test2@wp.pl"]])
+
+    def test_receiver_without_email_skipped(self):
+        get_user_model().objects.create(username="Adam", email="test@wp.pl")
+        get_user_model().objects.create(username="Adam2")
+
+        self.assertEqual(send_update_email(), (1, 0))
+
+
+class DeliverTest(TestCase):
+    def setUp(self) -> None:
+        for i in range(5):
+            get_user_model().objects.create(username=f"user{i}", email=f"user{i}@wp.pl")
+
+    def test_receiver_batches(self):
+        batches = list(iter_receiver_batches(batch_size=2))
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(batches[0], ["user0@wp.pl", "user1@wp.pl"])
+
+    @patch("menu.utils.send_batch")
+    def test_deliver_batches_over_pool(self, mock_send_batch):
+        mock_send_batch.side_effect = lambda receivers, title, message: (len(receivers), 0)
+
+        self.assertEqual(deliver("title", "msg", batch_size=2, workers=1), (5, 0))
+        self.assertEqual(mock_send_batch.call_count, 3)
+
+    def test_deliver_sends_every_receiver(self):
+        deliver("title", "msg", batch_size=2, workers=2)
+        self.assertEqual(len(mail.outbox), 5)
+
+    @patch("menu.utils.get_connection")
+    def test_failed_batch_is_reported(self, mock_get_connection):
+        mock_get_connection.return_value.send_messages.side_effect = ConnectionError
+        with self.assertLogs(level="ERROR") as captured:
+            sent, failed = deliver("title", "msg", batch_size=2, workers=2)
 
-        self.assertEqual(mock_send_email.call_count, 2)
-        mock_send_email.assert_has_calls(
-            [
-                call("test@wp.pl", f"Update on {self.date}", self.empty_msg),
-                call("test2@wp.pl", f"Update on {self.date}", self.empty_msg),
-            ]
-        )
\ No newline at end of file
+        self.assertEqual((sent, failed), (0, 5))
+        self.assertIn("Could not send 2 of 2 emails in batch", [record.getMessage() for record in captured.records])
@@ -1,8 +1,13 @@
 import json
 from datetime import timedelta, date, datetime
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.exceptions import ErrorDetail
@@ -61,7 +66,7 @@ class DishViewSetTest(TestCase):
         response = client.get(reverse("menu:dishes-list"))
         dishes = Dish.objects.all()
         serializer = DishSerializer(dishes, many=True)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data["results"], serializer.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_post_valid_dish_not_logged_user(self):
@@ -201,61 +206,71 @@ class MenuViewSetTest(TestCase):
     def test_get_all_menus_not_logged_user(self):
         response = client.get(reverse("menu:cards-list"))
         menus = list(Menu.objects.all().order_by("pk"))
-        self.assertEqual(response.data[0]["id"], menus[0].pk)
-        self.assertEqual(response.data[1]["id"], menus[1].pk)
+        self.assertEqual(response.data["results"][0]["id"], menus[0].pk)
+        self.assertEqual(response.data["results"][1]["id"], menus[1].pk)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_get_all_menus_logged_user(self):
         client.login(username="test", password="test")
         response = client.get(reverse("menu:cards-list"))
         menus = list(Menu.objects.all().order_by("pk"))
-        self.assertEqual(response.data[0]["id"], menus[0].pk)
-        self.assertEqual(response.data[1]["id"], menus[1].pk)
+        self.assertEqual(response.data["results"][0]["id"], menus[0].pk)
+        self.assertEqual(response.data["results"][1]["id"], menus[1].pk)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_sort_name_ascending(self):
         response = client.get(reverse("menu:cards-list"), {'ordering': 'name'})
         menus = list(Menu.objects.all().order_by("name"))
-        self.assertEqual(response.data[0]["id"], menus[0].pk)
-        self.assertEqual(response.data[1]["id"], menus[1].pk)
+        self.assertEqual(response.data["results"][0]["id"], menus[0].pk)
+        self.assertEqual(response.data["results"][1]["id"], menus[1].pk)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_sort_name_descending(self):
         response = client.get(reverse("menu:cards-list"), {'ordering': '-name'})
         menus = list(Menu.objects.all().order_by("-name"))
-        self.assertEqual(response.data[0]["id"], menus[0].pk)
-        self.assertEqual(response.data[1]["id"], menus[1].pk)
+        self.assertEqual(response.data["results"][0]["id"], menus[0].pk)
+        self.assertEqual(response.data["results"][1]["id"], menus[1].pk)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_sort_dishes_count_ascending(self):
         response = client.get(reverse("menu:cards-list"), {'ordering': 'dishes_count'})
 
-        self.assertEqual(response.data[0]["id"], self.menu.pk)
-        self.assertEqual(response.data[1]["id"], self.menu_staff.pk)
+        self.assertEqual(response.data["results"][0]["id"], self.menu.pk)
+        self.assertEqual(response.data["results"][1]["id"], self.menu_staff.pk)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_sort_dishes_count_descending(self):
         response = client.get(reverse("menu:cards-list"), {'ordering': '-dishes_count'})
 
-        self.assertEqual(response.data[0]["id"], self.menu_staff.pk)
-        self.assertEqual(response.data[1]["id"], self.menu.pk)
+        self.assertEqual(response.data["results"][0]["id"], self.menu_staff.pk)
+        self.assertEqual(response.data["results"][1]["id"], self.menu.pk)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_filter_name_empty(self):
         response = client.get(reverse("menu:cards-list"), {'search': 'pawel'})
         print(response.data)
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data["results"]), 0)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_filter_one_entry(self):
+        response = client.get(reverse("menu:cards-list"), {'search': '2'})
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], self.menu_staff.pk)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_filter_ranks_name_matches_first(self):
         response = client.get(reverse("menu:cards-list"), {'search': '1'})
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["id"], self.menu.pk)
+        self.assertEqual([menu["id"] for menu in response.data["results"]], [self.menu.pk, self.menu_staff.pk])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_filter_by_dish_name(self):
+        response = client.get(reverse("menu:cards-list"), {'search': 'Dish2'})
+        self.assertEqual([menu["id"] for menu in response.data["results"]], [self.menu_staff.pk])
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_filter_two_entry(self):
         response = client.get(reverse("menu:cards-list"), {'search': 'Test'})
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_search_created_at_invalid_data(self):
@@ -267,21 +282,21 @@ class MenuViewSetTest(TestCase):
     def test_search_created_at_empty_entry(self):
         date_to_search = datetime.now() + timedelta(days=1)
         response = client.get(reverse("menu:cards-list"), {'created_at__gte': date_to_search})
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data["results"]), 0)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_search_invalid_combination_created_at(self):
         date_end = datetime.now() + timedelta(days=1)
         date_start = datetime.now() - timedelta(days=1)
         response = client.get(reverse("menu:cards-list"), {'created_at__gte': date_end, 'created_at__lte': date_start})
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data["results"]), 0)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_search_valid_combination_created_at(self):
         date_end = datetime.now() + timedelta(days=1)
         date_start = datetime.now() - timedelta(days=1)
         response = client.get(reverse("menu:cards-list"), {'created_at__gte': date_start, 'created_at__lte': date_end})
-        self.assertEqual(len(response.data), 2)
+        self.assertEqual(len(response.data["results"]), 2)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_search_updated_at_invalid_data(self):
@@ -292,8 +307,8 @@ class MenuViewSetTest(TestCase):
 
     def test_search_updated_at_valid_data(self):
         response = client.get(reverse("menu:cards-list"), {'updated_at': self.menu.updated_at})
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["id"], self.menu.pk)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], self.menu.pk)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_post_valid_menu_not_logged_user(self):
@@ -378,4 +393,251 @@ class MenuViewSetTest(TestCase):
             reverse("menu:cards-detail", kwargs={"pk": self.menu_staff.pk}),
             content_type="application/json",
         )
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+class MenuResponseCacheTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        # The LocMemCache of the tests stands in for a cache shared by processes.
+        patcher = patch("menu.cache.shared_cache", return_value=cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        client.logout()
+        self.user = get_user_model().objects.create_user(
+            username="test", password="test"
+        )
+        self.dish = Dish.objects.create(
+            name="Test Meat Dish 1",
+            description="Test meat description 1",
+            price="10.50",
+            prep_time=60,
+            is_vegetarian=False,
+            author=self.user,
+        )
+        self.menu = Menu.objects.create(
+            name="Test Menu 1", description="Test menu description 1", author=self.user
+        )
+        self.menu.dish.add(self.dish)
+
+    def test_anonymous_list_cached(self):
+        response = client.get(reverse("menu:cards-list"), {'search': 'Test', 'ordering': 'name'})
+        with self.assertNumQueries(0):
+            cached = client.get(reverse("menu:cards-list"), {'ordering': 'name', 'search': 'Test'})
+        self.assertEqual(cached.data, response.data)
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+
+    def test_anonymous_detail_cached(self):
+        response = client.get(reverse("menu:cards-detail", kwargs={"pk": self.menu.pk}))
+        with self.assertNumQueries(0):
+            cached = client.get(reverse("menu:cards-detail", kwargs={"pk": self.menu.pk}))
+        self.assertEqual(cached.data, response.data)
+
+    def test_query_string_is_part_of_key(self):
+        client.get(reverse("menu:cards-list"))
+        response = client.get(reverse("menu:cards-list"), {'search': 'pawel'})
+        self.assertEqual(len(response.data["results"]), 0)
+
+    def test_dish_change_invalidates(self):
+        client.get(reverse("menu:cards-list"))
+        self.dish.name = "Renamed Dish"
+        self.dish.save()
+
+        response = client.get(reverse("menu:cards-list"))
+        self.assertEqual(response.data["results"][0]["dish"][0]["name"], "Renamed Dish")
+
+    def test_menu_dishes_change_invalidates(self):
+        client.get(reverse("menu:cards-list"))
+        self.menu.dish.clear()
+
+        response = client.get(reverse("menu:cards-list"))
+        self.assertEqual(len(response.data["results"]), 0)
+
+    def test_logged_user_not_cached(self):
+        client.login(username="test", password="test")
+        client.get(reverse("menu:cards-list"))
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse("menu:cards-list"))
+        self.assertGreater(len(queries), 0)
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "other.testserver"])
+    def test_host_is_part_of_key(self):
+        other = Menu.objects.create(name="Test Menu 2", description="Test menu description 2", author=self.user)
+        other.dish.add(self.dish)
+        client.get(reverse("menu:cards-list"), {"page_size": 1})
+
+        response = client.get(reverse("menu:cards-list"), {"page_size": 1}, HTTP_HOST="other.testserver")
+        self.assertTrue(response.data["next"].startswith("http://other.testserver/"))
+
+    def test_format_is_part_of_key(self):
+        etag = client.get(reverse("menu:cards-list"), HTTP_ACCEPT="application/json")["ETag"]
+        response = client.get(reverse("menu:cards-list"), HTTP_ACCEPT="text/html")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_not_cached_in_process_local_cache(self):
+        with patch("menu.cache.shared_cache", return_value=None):
+            client.get(reverse("menu:cards-list"))
+            with CaptureQueriesContext(connection) as queries:
+                client.get(reverse("menu:cards-list"))
+        self.assertGreater(len(queries), 0)
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        client.logout()
+        self.user = get_user_model().objects.create_user(
+            username="test", password="test"
+        )
+        self.dish = Dish.objects.create(
+            name="Test Meat Dish 1",
+            description="Test meat description 1",
+            price="10.50",
+            prep_time=60,
+            is_vegetarian=False,
+            author=self.user,
+        )
+        self.other_dish = Dish.objects.create(
+            name="Test Meat Dish 2",
+            description="Test meat description 2",
+            price="10.50",
+            prep_time=60,
+            is_vegetarian=False,
+            author=self.user,
+        )
+        self.menu = Menu.objects.create(
+            name="Test Menu 1", description="Test menu description 1", author=self.user
+        )
+        self.menu.dish.add(self.dish)
+
+    def test_dishes_list_not_modified(self):
+        client.login(username="test", password="test")
+        response = client.get(reverse("menu:dishes-list"))
+        self.assertTrue(response.has_header("ETag"))
+        self.assertTrue(response.has_header("Last-Modified"))
+
+        response = client.get(reverse("menu:dishes-list"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+    def test_dishes_list_modified(self):
+        client.login(username="test", password="test")
+        etag = client.get(reverse("menu:dishes-list"))["ETag"]
+        self.other_dish.delete()
+
+        response = client.get(reverse("menu:dishes-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_dish_detail_not_modified_since(self):
+        client.login(username="test", password="test")
+        url = reverse("menu:dishes-detail", kwargs={"pk": self.dish.pk})
+        last_modified = client.get(url)["Last-Modified"]
+
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_card_detail_changes_with_dishes(self):
+        url = reverse("menu:cards-detail", kwargs={"pk": self.menu.pk})
+        etag = client.get(url)["ETag"]
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.menu.dish.set([self.other_dish])
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cards_list_changes_with_dish_update(self):
+        etag = client.get(reverse("menu:cards-list"))["ETag"]
+        self.dish.name = "Renamed Dish"
+        self.dish.save()
+
+        response = client.get(reverse("menu:cards-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_dish_update_does_not_touch_cards(self):
+        updated_at = self.menu.updated_at
+        self.dish.name = "Renamed Dish"
+        self.dish.save()
+
+        self.menu.refresh_from_db()
+        self.assertEqual(self.menu.updated_at, updated_at)
+
+    def test_cards_list_changes_with_bulk_dish_update(self):
+        etag = client.get(reverse("menu:cards-list"))["ETag"]
+        client.login(username="test", password="test")
+        client.patch(reverse("menu:dishes-list"), [{"id": self.dish.pk, "prep_time": 5}],
+                     content_type="application/json")
+        client.logout()
+
+        response = client.get(reverse("menu:cards-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_cards_list_validators_do_not_join_dishes(self):
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse("menu:cards-list"))
+        aggregate = next(query["sql"] for query in queries if "MAX(" in query["sql"].upper())
+        self.assertNotIn("JOIN", aggregate.upper())
+
+    @patch("menu.cache.shared_cache", return_value=cache)
+    def test_cached_cards_list_not_modified_without_queries(self, shared_cache):
+        etag = client.get(reverse("menu:cards-list"))["ETag"]
+        with self.assertNumQueries(0):
+            response = client.get(reverse("menu:cards-list"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class FastListTest(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            username="test", password="test"
+        )
+        self.user.user_permissions.add(Permission.objects.get(codename="view_menu"))
+        client.login(username="test", password="test")
+        self.dishes = [
+            Dish.objects.create(
+                name=f"Żurek {i}  ",
+                description="Test description",
+                price=f"{i}.5",
+                prep_time=60,
+                is_vegetarian=bool(i % 2),
+                author=self.user,
+            )
+            for i in range(4)
+        ]
+        Dish.objects.filter(pk=self.dishes[0].pk).update(image="photos/zurek.jpg")
+        for i in range(3):
+            menu = Menu.objects.create(name=f"Test Menu {i}", description="Test menu description", author=self.user)
+            menu.dish.set(self.dishes[:i])
+
+    def assertSameContent(self, url, params=None):
+        fast = client.get(url, params or {})
+        with patch("menu.mixins.FAST_LIST_SERIALIZATION", False), patch("menu.renderers.orjson", None):
+            slow = client.get(url, params or {})
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_dishes_identical(self):
+        response = self.assertSameContent(reverse("menu:dishes-list"))
+        self.assertEqual(response.data["results"][0]["image"], "http://testserver/media/photos/zurek.jpg")
+        self.assertEqual(response.data["results"][1]["price"], "1.50")
+
+    def test_dishes_page_identical(self):
+        response = self.assertSameContent(reverse("menu:dishes-list"), {"page_size": 2})
+        self.assertSameContent(response.data["next"])
+
+    def test_cards_identical(self):
+        response = self.assertSameContent(reverse("menu:cards-list"))
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_cards_ordering_identical(self):
+        response = self.assertSameContent(reverse("menu:cards-list"), {"ordering": "-dishes_count", "page_size": 2})
+        self.assertSameContent(response.data["next"])
+
+    def test_fast_cards_query_count(self):
+        client.get(reverse("menu:cards-list"))
+        with CaptureQueriesContext(connection) as queries:
+            client.get(reverse("menu:cards-list"))
+        with patch("menu.mixins.FAST_LIST_SERIALIZATION", False), CaptureQueriesContext(connection) as slow_queries:
+            client.get(reverse("menu:cards-list"))
+        self.assertEqual(len(queries), len(slow_queries))
@@ -1,11 +1,17 @@
-from rest_framework.routers import DefaultRouter
+from django.urls import path
 
-from menu import views
+from menu import async_views, views
+from menu.routers import BulkRouter
 
 app_name = 'menu'
 
-router = DefaultRouter()
+router = BulkRouter()
 router.register(r"dishes", views.DishViewSet, basename="dishes")
 router.register(r"cards", views.MenuViewSet, basename="cards")
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path('async/cards/', async_views.card_list, name='async-cards-list'),
+    path('async/cards/<int:pk>/', async_views.card_detail, name='async-cards-detail'),
+    path('async/dishes/', async_views.dish_list, name='async-dishes-list'),
+    path('async/dishes/<int:pk>/', async_views.dish_detail, name='async-dishes-detail'),
+]
@@ -1,11 +1,12 @@
 import logging
-from datetime import date, timedelta
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
-from django.template.loader import get_template
+from django.core.mail import EmailMultiAlternatives, get_connection, send_mail
 
-from config.settings import EMAIL_HOST_USER
+from config.settings import EMAIL_BATCH_SIZE, EMAIL_HOST_USER, EMAIL_WORKERS
+from menu.digest import DailyDigest
 
 
 def send_email(receiver, title, message):
@@ -20,22 +21,69 @@ def send_email(receiver, title, message):
         logging.error(f"Could not send email {receiver}")
 
 
+def send_batch(receivers, title, message):
+    """Send one message per receiver over a single backend connection."""
+    connection = get_connection()
+    emails = []
+    for receiver in receivers:
+        mail = EmailMultiAlternatives(title, None, EMAIL_HOST_USER, [receiver], connection=connection)
+        mail.attach_alternative(message, 'text/html')
+        emails.append(mail)
+
+    start = time.monotonic()
+    try:
+        sent = connection.send_messages(emails) or 0
+    except Exception:
+        logging.exception(f"Could not send batch of {len(emails)} emails")
+        sent = 0
+    elapsed = time.monotonic() - start
+
+    failed = len(emails) - sent
+    if failed:
+        logging.error(f"Could not send {failed} of {len(emails)} emails in batch")
+    rate = sent / elapsed if elapsed else float(sent)
+    logging.info(f"Sent {sent} emails in {elapsed:.2f}s ({rate:.1f}/s)")
+    return sent, failed
+
+
+def iter_receiver_batches(batch_size=EMAIL_BATCH_SIZE):
+    emails = get_user_model().objects.exclude(email='').order_by('pk').values_list('email', flat=True)
+    batch = []
+    for email in emails.iterator(chunk_size=batch_size):
+        batch.append(email)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def deliver(title, message, batch_size=EMAIL_BATCH_SIZE, workers=EMAIL_WORKERS):
+    """
+    Fan receiver batches out over a bounded pool; at most ``workers * 2`` batches
+    are held in memory at once. Returns the total number of sent and failed emails.
+    """
+    sent = failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for batch in iter_receiver_batches(batch_size):
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch_sent, batch_failed = future.result()
+                    sent += batch_sent
+                    failed += batch_failed
+            pending.add(executor.submit(send_batch, batch, title, message))
+
+        for future in pending:
+            batch_sent, batch_failed = future.result()
+            sent += batch_sent
+            failed += batch_failed
+
+    logging.info(f"Update email delivered to {sent} receivers, {failed} failed")
+    return sent, failed
+
+
 def send_update_email():
-    from menu.models import Dish
-    date_to_search = date.today() - timedelta(days=1)
-    dishes = Dish.objects.all()
-    updated_dishes = dishes.filter(updated_at__date=date_to_search)
-    created_dishes = dishes.filter(created_at__date=date_to_search)
-
-    context = {
-        "updated_dishes": updated_dishes,
-        "created_dishes": created_dishes,
-        "date_to_search": date_to_search
-    }
-
-    msg = get_template('menu/email.html').render(context)
-    title = f"Update on {date.today()}"
-    users = get_user_model().objects.all()
-
-    for receiver in users:
-        send_email(receiver.email, title, msg)
+    digest = DailyDigest.for_yesterday()
+    return deliver(digest.title, digest.html)
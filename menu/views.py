@@ -1,23 +1,50 @@
-from django.db.models import Count
+from django.db.models import Max, Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.filters import OrderingFilter
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.permissions import SAFE_METHODS
+from menu.cache import invalidate_responses
+from menu.export import ExportMixin
+from menu.mixins import AnonymousResponseCacheMixin, BulkModelMixin, ConditionalGetMixin, FastListMixin
 from menu.models import Menu, Dish
-from menu.serializers import MenuSerializer, DishSerializer
-from menu.permissions import IsOwnerOrStaffOrAdmin, IsOwnerOrStaffOrAdminOrReadOnly
+from menu.serializers import MenuDishesSerializer, MenuReadSerializer, MenuSerializer, DishSerializer
+from menu.permissions import IsOwnerOrStaffOrAdmin, IsOwnerOrStaffOrAdminOrReadOnly, get_permission_snapshot
+from menu.search import MenuSearchFilter, get_search_backend
+from menu.signals import bulk_dish_delete
 
 
-class DishViewSet(viewsets.ModelViewSet):
+class DishViewSet(ConditionalGetMixin, FastListMixin, BulkModelMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = DishSerializer
-    queryset = Dish.objects.all().prefetch_related('author')
+    queryset = Dish.objects.order_by('created_at', 'pk')
     permission_classes = [IsOwnerOrStaffOrAdmin]
 
+    def perform_bulk_update(self, serializer):
+        super().perform_bulk_update(serializer)
+        if any('name' in item for item in serializer.validated_data):
+            dish_ids = [dish.pk for dish in serializer.instance]
+            menu_ids = Menu.dish.through.objects.filter(dish_id__in=dish_ids).values_list('menu_id', flat=True)
+            get_search_backend().index(list(menu_ids.distinct()))
 
-class MenuViewSet(viewsets.ModelViewSet):
+    def perform_bulk_destroy(self, instances):
+        dish_ids = [dish.pk for dish in instances]
+        memberships = Menu.dish.through.objects.filter(dish_id__in=dish_ids)
+        menu_ids = list(memberships.values_list('menu_id', flat=True).distinct())
+        memberships.delete()
+        # Delete signals would query the menus of every dish, their work is done here once for all dishes.
+        with bulk_dish_delete():
+            Dish.objects.filter(pk__in=dish_ids).delete()
+        invalidate_responses()
+        Menu.objects.filter(pk__in=menu_ids).refresh_dishes_count(touch=True)
+        get_search_backend().index(menu_ids)
+
+
+class MenuViewSet(AnonymousResponseCacheMixin, ConditionalGetMixin, FastListMixin, ExportMixin,
+                  viewsets.ModelViewSet):
     serializer_class = MenuSerializer
     permission_classes = [IsOwnerOrStaffOrAdminOrReadOnly]
-    filter_backends = [OrderingFilter, DjangoFilterBackend, SearchFilter]
-    search_fields = ["name"]
+    filter_backends = [OrderingFilter, DjangoFilterBackend, MenuSearchFilter]
     filterset_fields = {
         'updated_at': ["exact"],
         'created_at': ['lte', 'gte'],
@@ -25,11 +52,35 @@ class MenuViewSet(viewsets.ModelViewSet):
     ordering_fields = ['name', 'dishes_count']
     ordering = ['pk']
 
+    def get_serializer_class(self):
+        if self.action == 'dishes':
+            return MenuDishesSerializer
+        if self.request.method in SAFE_METHODS:
+            return MenuReadSerializer
+        return MenuSerializer
+
     def get_queryset(self):
-        print(self.request.user.get_user_permissions())
-        if self.request.user.get_user_permissions():
-            queryset = Menu.objects.all().annotate(dishes_count=Count('dish')).prefetch_related('dish')
-        else:
-            queryset = Menu.objects.all().annotate(dishes_count=Count('dish')).filter(
-                dishes_count__gt=0).prefetch_related('dish')
+        queryset = Menu.objects.all()
+        if self.action != 'dishes':
+            queryset = queryset.prefetch_related(Prefetch('dish', queryset=Dish.objects.order_by('pk')))
+        # Owners must reach their empty menus to fill them, object permissions limit the action to them.
+        if self.action != 'dishes' and not get_permission_snapshot(self.request).user_permissions:
+            queryset = queryset.filter(dishes_count__gt=0)
         return queryset
+
+    @action(detail=True, methods=['post'])
+    def dishes(self, request, *args, **kwargs):
+        serializer = self.get_serializer(self.get_object(), data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+    def get_list_last_modified(self, queryset):
+        # Dish changes do not touch their menus. The latest change of any dish is one index lookup,
+        # unlike the latest change of the listed menus' dishes, which joins every membership.
+        last_modified, count = super().get_list_last_modified(queryset)
+        dishes_modified = Dish.objects.aggregate(last_modified=Max('updated_at'))['last_modified']
+        return max(filter(None, [last_modified, dishes_modified]), default=None), count
+
+    def get_object_last_modified(self, instance):
+        return max([instance.updated_at] + [dish.updated_at for dish in instance.dish.all()])